@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+ANN Index Benchmark
+
+This script measures recall@k and latency of the IVF index against exact
+search on a synthetic catalog shaped like process and FAQ embeddings.
+"""
+
+import sys
+import time
+import logging
+import argparse
+
+import numpy as np
+
+from src.ann_index import IVFIndex
+from src.similarity_index import SimilarityIndex
+
+# Set up logging
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("ann-benchmark")
+
+def make_catalog(size, dimension, topics, seed):
+    """Generate clustered unit vectors, like embeddings of documents about a limited set of topics"""
+    centers = np.random.default_rng(0).normal(size=(topics, dimension)).astype(np.float32)
+    rng = np.random.default_rng(seed)
+    vectors = centers[rng.integers(0, topics, size)] + rng.normal(size=(size, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def time_search(index, queries, top_k):
+    """Run every query through the index, returning results and mean latency in milliseconds"""
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append(index.search(query, top_k))
+    return results, (time.perf_counter() - start) / len(queries) * 1000
+
+def recall(approximate, exact):
+    """Fraction of the exact top-k ids that the approximate search also returned"""
+    found = sum(len({item for item, _ in a} & {item for item, _ in e}) for a, e in zip(approximate, exact))
+    return found / max(1, sum(len(e) for e in exact))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the IVF index against exact search")
+    parser.add_argument("--size", type=int, default=50000, help="Number of catalog vectors")
+    parser.add_argument("--dimension", type=int, default=256, help="Embedding dimension (1536 for OpenAI ada-002)")
+    parser.add_argument("--topics", type=int, default=500, help="Number of topic clusters in the catalog")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--top-k", type=int, default=10, help="Results per query")
+    parser.add_argument("--nlist", type=int, default=0, help="Inverted lists (0 = about sqrt(size))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32], help="nprobe values to try")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    vectors = make_catalog(args.size, args.dimension, args.topics, args.seed)
+    # Queries are fresh draws around the same topics, not catalog vectors
+    queries = make_catalog(args.queries, args.dimension, args.topics, args.seed + 1)
+    ids = [f"doc_{i}" for i in range(args.size)]
+
+    exact_index = SimilarityIndex()
+    # Train once the whole catalog is loaded, as a full reload would
+    ivf_index = IVFIndex(nlist=args.nlist, min_train_size=args.size)
+    start = time.perf_counter()
+    for item_id, vector in zip(ids, vectors):
+        exact_index.upsert(item_id, vector)
+    for item_id, vector in zip(ids, vectors):
+        ivf_index.upsert(item_id, vector)
+    build_seconds = time.perf_counter() - start
+
+    exact_results, exact_ms = time_search(exact_index, queries, args.top_k)
+
+    print(f"Catalog: {args.size} vectors x {args.dimension} dims, {ivf_index.list_count} IVF lists, built in {build_seconds:.1f}s")
+    print(f"Exact search: {exact_ms:.3f} ms/query")
+    print(f"{'nprobe':>8} {'recall@' + str(args.top_k):>10} {'ms/query':>10} {'speedup':>9}")
+    for nprobe in args.nprobe:
+        ivf_index.nprobe = nprobe
+        ivf_results, ivf_ms = time_search(ivf_index, queries, args.top_k)
+        print(f"{nprobe:>8} {recall(ivf_results, exact_results):>10.3f} {ivf_ms:>10.3f} {exact_ms / ivf_ms:>8.1f}x")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Import Time Benchmark
+
+This script measures how long importing the app (or another module) takes
+with `python -X importtime`, lists the heaviest packages, and fails when
+startup exceeds a time budget or pulls in a package that only some code
+paths need. Run it after changing imports to catch startup regressions:
+
+    python benchmark_imports.py --budget-ms 1500
+"""
+
+import os
+import sys
+import logging
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+# Set up logging
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("import-benchmark")
+
+# Packages that must stay out of startup: they are imported by the code paths that use them
+LAZY_PACKAGES = ["openai", "bs4", "PIL", "uvicorn", "chromadb", "numpy"]
+
+def measure(module: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Args:
+        module: Module to import
+
+    Returns:
+        Dictionary mapping every imported module to (self, cumulative) microseconds
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+def heaviest_packages(timings: Dict[str, Tuple[int, int]], count: int) -> List[Tuple[str, int]]:
+    """Top-level packages ordered by cumulative import time"""
+    packages = {}
+    for name, (_, cumulative_us) in timings.items():
+        package = name.split(".")[0]
+        packages[package] = max(packages.get(package, 0), cumulative_us)
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:count]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark module import time against a budget")
+    parser.add_argument("--module", default="src.app", help="Module to import")
+    parser.add_argument("--budget-ms", type=float, default=1500, help="Maximum cumulative import time in milliseconds")
+    parser.add_argument("--repeat", type=int, default=3, help="Measurements to take; the fastest one is reported")
+    parser.add_argument("--top", type=int, default=15, help="Number of heaviest packages to list")
+    parser.add_argument("--lazy", nargs="*", default=None,
+                        help=f"Packages that must not be imported (default: {' '.join(LAZY_PACKAGES)})")
+    args = parser.parse_args()
+
+    lazy_packages = LAZY_PACKAGES if args.lazy is None else args.lazy
+
+    # The first import may build the catalog snapshot and embed processes; only warm starts are measured
+    measure(args.module)
+    runs = [measure(args.module) for _ in range(max(1, args.repeat))]
+    timings = min(runs, key=lambda run: run[args.module][1])
+    total_ms = timings[args.module][1] / 1000
+
+    print(f"import {args.module}: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms, best of {len(runs)})")
+    print(f"{'package':<30} {'cumulative ms':>14}")
+    for package, cumulative_us in heaviest_packages(timings, args.top):
+        print(f"{package:<30} {cumulative_us / 1000:>14.1f}")
+
+    failed = False
+    imported_lazy = [package for package in lazy_packages if package in timings]
+    if imported_lazy:
+        print(f"FAIL: imported at startup but should be lazy: {', '.join(imported_lazy)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: import took {total_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
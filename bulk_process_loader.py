@@ -70,9 +70,10 @@ def add_processes_to_vector_store(processes: Dict[str, Dict[str, Any]]) -> int:
         Number of processes successfully added
     """
     try:
+        from config.config import embedding_provider
         from src.vector_store import VectorStore
         
-        vector_store = VectorStore()
+        vector_store = VectorStore(embedding_provider)
         
         if not vector_store.is_initialized:
             logger.error("Vector store initialization failed")
@@ -83,19 +84,15 @@ def add_processes_to_vector_store(processes: Dict[str, Dict[str, Any]]) -> int:
             logger.info("Clearing vector store before loading processes")
             vector_store.clear()
         
-        # Track successful additions
-        successful = 0
+        # Add processes to vector store in chunked upserts
+        results = vector_store.upsert_processes(processes)
+        
+        for process_id, success in results.items():
+            if not success:
+                logger.warning(f"Failed to add process '{process_id}' to vector store")
         
-        # Add processes to vector store
-        for process_id, process_data in processes.items():
-            try:
-                if vector_store.add_process(process_id, process_data):
-                    successful += 1
-                    logger.info(f"Added process '{process_id}' to vector store")
-                else:
-                    logger.warning(f"Failed to add process '{process_id}' to vector store")
-            except Exception as e:
-                logger.error(f"Error adding process '{process_id}' to vector store: {e}")
+        # Track successful additions
+        successful = sum(1 for success in results.values() if success)
         
         logger.info(f"Successfully added {successful}/{len(processes)} processes to vector store")
         return successful
@@ -1,9 +1,21 @@
 import os
+import re
 import json
 import glob
+import asyncio
+import hashlib
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from openai import OpenAI
+
+from src.blocking_executor import BlockingExecutor
+from src.openai_client import OpenAIClientPool
+from src.embedding_cache import QueryEmbeddingCache
+from src.embedding_providers import FallbackEmbeddingProvider, create_embedding_provider
+from src.lexical_index import BM25Index
+from src.process_renderer import RenderedResponseCache, format_process_steps, process_instructions
+from src.single_flight import SingleFlight, AsyncSingleFlight
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -19,8 +31,27 @@ BRANDWORKZ_PASSWORD = os.getenv("BRANDWORKZ_PASSWORD", "")
 
 # OpenAI API key
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-# Initialize OpenAI client
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+
+# OpenAI HTTP connection pool settings
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "10"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "False").lower() == "true"
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
+# Shared OpenAI clients; every component uses these instead of creating its own
+openai_pool = OpenAIClientPool(
+    OPENAI_API_KEY,
+    max_connections=OPENAI_MAX_CONNECTIONS,
+    max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+    timeout=OPENAI_TIMEOUT,
+    connect_timeout=OPENAI_CONNECT_TIMEOUT,
+    http2=OPENAI_HTTP2,
+    max_retries=OPENAI_MAX_RETRIES
+)
 
 # Vector store enabled flag
 USE_VECTOR_STORE = os.getenv("USE_VECTOR_STORE", "True").lower() == "true"
@@ -30,6 +61,88 @@ VECTOR_DB_PATH = os.getenv("VECTOR_DB_PATH", os.path.join(
     'vector_db'
 ))
 
+# Embedding settings
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")  # "openai" or "local"
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+LOCAL_EMBEDDING_DIMENSION = int(os.getenv("LOCAL_EMBEDDING_DIMENSION", "512"))
+# Minimum similarity for a vector match; local embeddings score lower than OpenAI ones
+VECTOR_MATCH_THRESHOLD = float(os.getenv("VECTOR_MATCH_THRESHOLD", "0.65"))
+# Seconds an OpenAI query embedding may take before local embeddings answer instead (0 disables the fallback)
+EMBEDDING_FALLBACK_TIMEOUT = float(os.getenv("EMBEDDING_FALLBACK_TIMEOUT", "0"))
+# Minimum similarity for a vector match found with the local fallback embeddings
+FALLBACK_VECTOR_MATCH_THRESHOLD = float(os.getenv("FALLBACK_VECTOR_MATCH_THRESHOLD", "0.3"))
+# Minimum BM25 score for a keyword match
+KEYWORD_MATCH_THRESHOLD = float(os.getenv("KEYWORD_MATCH_THRESHOLD", "3.0"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+
+# In-memory search storage: "memory" keeps float32 embeddings per worker, "int8" or "float16"
+# keep a quantized, memory-mapped embedding file shared by all workers through the page cache
+EMBEDDING_STORE_FORMAT = os.getenv("EMBEDDING_STORE_FORMAT", "memory").lower()
+EMBEDDING_STORE_PATH = os.getenv("EMBEDDING_STORE_PATH", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
+    'data', 
+    'embedding_store'
+))
+# Top candidates of a quantized search re-scored with float32 embeddings (0 disables re-ranking);
+# re-ranking keeps a float32 copy next to the quantized file, four times the size of int8 codes
+EMBEDDING_RERANK_CANDIDATES = int(os.getenv("EMBEDDING_RERANK_CANDIDATES", "0"))
+
+# Approximate nearest-neighbour (IVF) settings for the in-memory index
+ANN_NLIST = int(os.getenv("ANN_NLIST", "0"))  # 0 picks about sqrt(number of processes)
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "8"))
+ANN_MIN_TRAIN_SIZE = int(os.getenv("ANN_MIN_TRAIN_SIZE", "1024"))
+
+# Persistent embedding cache settings
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "True").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
+    'data', 
+    'embedding_cache.sqlite3'
+))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000"))
+
+# In-memory cache for embeddings of repeated user queries
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "1024"))
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "3600"))
+
+# Cache of process-matching decisions reused for near-paraphrases of earlier questions
+MATCH_CACHE_MAX_ENTRIES = int(os.getenv("MATCH_CACHE_MAX_ENTRIES", "2048"))  # 0 disables the cache
+# Maximum cosine distance between two questions for them to share a decision
+MATCH_CACHE_RADIUS = float(os.getenv("MATCH_CACHE_RADIUS", "0.03"))
+
+# Warm-start snapshot of the loaded catalog, keyword index and in-memory embeddings
+CATALOG_SNAPSHOT_ENABLED = os.getenv("CATALOG_SNAPSHOT_ENABLED", "True").lower() == "true"
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
+    'data', 
+    'catalog_snapshot'
+))
+
+# Load the catalog in the background at startup, so the app accepts requests
+# (answering 503 until the catalog is ready) instead of waiting for it
+CATALOG_BACKGROUND_INIT = os.getenv("CATALOG_BACKGROUND_INIT", "False").lower() == "true"
+
+# Related processes precomputed per process for recommendations
+RECOMMENDER_NEIGHBOURS = int(os.getenv("RECOMMENDER_NEIGHBOURS", "20"))
+
+# Request handling: blocking work of a chat request (vector store queries,
+# embedding cache lookups) runs on a bounded thread pool, and a request gives
+# up after CHAT_REQUEST_TIMEOUT seconds
+CHAT_WORKER_THREADS = int(os.getenv("CHAT_WORKER_THREADS", "0"))  # 0 picks min(32, CPUs + 4)
+CHAT_REQUEST_TIMEOUT = float(os.getenv("CHAT_REQUEST_TIMEOUT", "30"))
+
+# Seconds analytics updates are batched before being written to disk (0 writes on every request)
+ANALYTICS_FLUSH_INTERVAL = float(os.getenv("ANALYTICS_FLUSH_INTERVAL", "2"))
+
+# Conversation history kept per client session; idle sessions expire, and the
+# least recently used ones are evicted beyond the session count or memory ceiling
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "50"))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", "65536"))
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "10000"))
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "1800"))  # 0 never expires sessions
+SESSION_STORE_MAX_BYTES = int(os.getenv("SESSION_STORE_MAX_BYTES", str(64 * 1024 * 1024)))
+
 # App settings
 APP_HOST = os.getenv("APP_HOST", "0.0.0.0")
 APP_PORT = int(os.getenv("APP_PORT", "8000"))
@@ -41,16 +154,115 @@ PROCESS_INSTRUCTIONS = {}
 PROCESS_KEYWORDS = {}
 PROCESS_EMBEDDINGS = {}  # New dictionary to store embeddings
 
+# Normalized float32 matrix of PROCESS_EMBEDDINGS used for in-memory search;
+# searched exactly while small and through IVF lists once it has ANN_MIN_TRAIN_SIZE processes.
+# Created by initialize_catalog(), so importing this module does not import numpy
+PROCESS_INDEX = None
+
+# Local embeddings of every process, searched when a query falls back to local embeddings;
+# created by initialize_catalog() only if the fallback is enabled
+PROCESS_FALLBACK_INDEX = None
+
+# BM25 inverted index over process keywords, titles and descriptions
+PROCESS_LEXICAL_INDEX = BM25Index()
+
+# Chat answers and guides of every process, rendered when the process loads
+PROCESS_RESPONSES = RenderedResponseCache()
+
+# Parsed process files keyed by process name: {"path", "hash", "data"}
+_process_files = {}
+
+# Process names defined by more than one file, mapped to every path defining them
+_duplicate_processes = {}
+
 # Path to the processes directory
 PROCESSES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'processes')
 logger.info(f"Loading processes from: {PROCESSES_DIR}")
 
-# Initialize vector store if enabled
+# Select the embedding backend used for processes and queries
+embedding_provider = create_embedding_provider(
+    EMBEDDING_PROVIDER,
+    openai_model=EMBEDDING_MODEL,
+    local_dimension=LOCAL_EMBEDDING_DIMENSION,
+    openai_client_pool=openai_pool,
+    fallback_timeout=EMBEDDING_FALLBACK_TIMEOUT
+)
+
+# Persistent embedding cache and quantized embedding store, opened by initialize_catalog()
+embedding_cache = None
+PROCESS_EMBEDDING_STORE = None
+
+# Persisted IVF index, kept next to the vector database
+ANN_INDEX_PATH = os.path.join(
+    VECTOR_DB_PATH,
+    re.sub(r"[^A-Za-z0-9_.-]", "_", f"ann_index_{embedding_provider.model_name}.npz")
+)
+
+query_embedding_cache = QueryEmbeddingCache(
+    max_entries=QUERY_CACHE_MAX_ENTRIES,
+    ttl_seconds=QUERY_CACHE_TTL_SECONDS
+)
+
+# Concurrent identical requests share one in-flight call; the async group
+# coalesces coroutines on the event loop, the others coalesce threads
+embedding_flight = SingleFlight("embeddings")
+query_flight = SingleFlight("query_embeddings")
+async_query_flight = AsyncSingleFlight("async_query_embeddings")
+search_flight = SingleFlight("vector_store_queries")
+
+# Worker threads for the blocking steps of async requests
+chat_executor = BlockingExecutor(
+    max_workers=CHAT_WORKER_THREADS or min(32, (os.cpu_count() or 1) + 4),
+    name="chat"
+)
+
+# Vector store, opened by initialize_catalog()
 vector_store = None
-if USE_VECTOR_STORE:
+
+def _initialize_embedding_cache():
+    """Open the persistent embedding cache if enabled (local embeddings are cheaper to compute than to look up)"""
+    global embedding_cache
+    if not EMBEDDING_CACHE_ENABLED or not embedding_provider.cacheable or embedding_cache is not None:
+        return
+    try:
+        from src.embedding_cache import EmbeddingCache
+        embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH, max_entries=EMBEDDING_CACHE_MAX_ENTRIES)
+        logger.info(f"Embedding cache initialized with {embedding_cache.count()} entries")
+    except Exception as e:
+        logger.error(f"Error initializing embedding cache: {e}")
+        embedding_cache = None
+
+def _initialize_embedding_store():
+    """Open the quantized embedding store if enabled, falling back to in-memory embeddings if it fails"""
+    global PROCESS_EMBEDDING_STORE
+    if EMBEDDING_STORE_FORMAT == "memory" or PROCESS_EMBEDDING_STORE is not None:
+        return
+    try:
+        from src.quantized_store import QuantizedEmbeddingStore
+        PROCESS_EMBEDDING_STORE = QuantizedEmbeddingStore(
+            EMBEDDING_STORE_PATH,
+            embedding_provider.model_name,
+            storage_format=EMBEDDING_STORE_FORMAT,
+            rerank_candidates=EMBEDDING_RERANK_CANDIDATES
+        )
+        logger.info(f"Quantized embedding store opened with {len(PROCESS_EMBEDDING_STORE)} embeddings")
+    except Exception as e:
+        logger.error(f"Error initializing quantized embedding store: {e}")
+        logger.error("Falling back to in-memory embeddings")
+        PROCESS_EMBEDDING_STORE = None
+
+def _initialize_vector_store():
+    """Open the vector store, falling back to in-memory embeddings if it is unavailable"""
+    global vector_store, USE_VECTOR_STORE
+    if not USE_VECTOR_STORE or vector_store is not None:
+        return
     try:
         from src.vector_store import VectorStore
-        vector_store = VectorStore(persist_directory=VECTOR_DB_PATH)
+        vector_store = VectorStore(
+            embedding_provider,
+            persist_directory=VECTOR_DB_PATH,
+            embedding_cache=embedding_cache
+        )
         if not vector_store.is_initialized:
             logger.warning("Vector store initialization failed, falling back to in-memory embeddings")
             USE_VECTOR_STORE = False
@@ -65,112 +277,894 @@ if USE_VECTOR_STORE:
         logger.error("Falling back to in-memory embeddings")
         USE_VECTOR_STORE = False
 
-def generate_embedding(text):
-    """Generate embedding for text using OpenAI's embedding model"""
+def generate_embedding(text, use_cache=True):
+    """Generate embedding for text using the configured embedding provider, through the persistent cache unless `use_cache` is False"""
+    if embedding_cache and use_cache:
+        cached = embedding_cache.get(embedding_provider.model_name, text)
+        if cached:
+            return cached
+    
     try:
-        # For OpenAI 1.0.0+
-        response = openai_client.embeddings.create(
-            model="text-embedding-ada-002",
-            input=text
+        embedding = embedding_flight.do(
+            (embedding_provider.model_name, text),
+            lambda: embedding_provider.embed([text])[0]
         )
-        return response.data[0].embedding
+        if embedding_cache and use_cache:
+            embedding_cache.set(embedding_provider.model_name, text, embedding)
+        return embedding
     except Exception as e:
         logger.error(f"Error generating embedding: {e}")
         return None
 
-def load_processes_from_files():
+def flush_embedding_cache():
+    """Write the access times of embedding cache hits still held in memory"""
+    if embedding_cache:
+        embedding_cache.flush()
+
+def embed_query(query):
     """
-    Load process instructions from JSON files in the processes directory
+    Embed a search query, reusing the cached embedding of repeated questions
+    
+    Args:
+        query: Search query
+        
+    Returns:
+        Embedding of the normalized query, or None if embedding failed
+    """
+    return embed_queries([query])[0]
+
+def embed_queries(queries):
+    """
+    Embed several search queries with at most one batched embeddings request
+    
+    Queries are normalized and deduplicated, cached embeddings are reused, and
+    only the remaining distinct queries are sent to the API together.
+    
+    Args:
+        queries: List of search queries
+        
+    Returns:
+        List of embeddings aligned with `queries` (None where embedding failed)
+    """
+    normalized_queries = [QueryEmbeddingCache.normalize(query) for query in queries]
+    
+    embeddings_by_query = {}
+    missing = []
+    for normalized_query in dict.fromkeys(normalized_queries):
+        if not normalized_query:
+            continue
+        embedding = query_embedding_cache.get(normalized_query)
+        if embedding is None:
+            missing.append(normalized_query)
+        else:
+            embeddings_by_query[normalized_query] = embedding
+    
+    if missing:
+        # Queries already being embedded by another thread are waited on, not re-sent. Free-form
+        # questions stay out of the persistent cache, where they would evict process embeddings
+        embedded = query_flight.do_many(missing, lambda texts: generate_embeddings(texts, use_cache=False))
+        for normalized_query, embedding in zip(missing, embedded):
+            if embedding:
+                query_embedding_cache.set(normalized_query, embedding)
+                embeddings_by_query[normalized_query] = embedding
+    
+    return [embeddings_by_query.get(normalized_query) for normalized_query in normalized_queries]
+
+def generate_embeddings(texts, batch_size=EMBEDDING_BATCH_SIZE, max_concurrency=EMBEDDING_MAX_CONCURRENCY, use_cache=True):
     """
-    global PROCESS_INSTRUCTIONS, PROCESS_KEYWORDS, PROCESS_EMBEDDINGS
+    Generate embeddings for many texts using batched, concurrent requests.
     
-    # Clear existing process instructions and keywords
-    PROCESS_INSTRUCTIONS = {}
-    PROCESS_KEYWORDS = {}
-    PROCESS_EMBEDDINGS = {}
+    Texts already in the embedding cache are served from it. The rest are
+    sent in chunks of `batch_size` per API call, with at most
+    `max_concurrency` chunks in flight. If a chunk fails, its texts are
+    retried one by one so a single bad input does not lose the whole chunk.
     
-    # Clear vector store if enabled
-    if USE_VECTOR_STORE and vector_store:
+    Args:
+        texts: List of texts to embed
+        batch_size: Number of texts per embeddings request
+        max_concurrency: Maximum number of requests in flight at once
+        use_cache: Read and write the persistent embedding cache; user
+            queries pass False and rely on the in-memory query cache
+        
+    Returns:
+        List of embeddings in the same order as `texts` (None where embedding failed)
+    """
+    if not texts:
+        return []
+    
+    cache = embedding_cache if use_cache else None
+    embeddings = cache.get_many(embedding_provider.model_name, texts) if cache else [None] * len(texts)
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if not missing:
+        logger.info(f"All {len(texts)} embeddings served from cache")
+        return embeddings
+    
+    missing_texts = [texts[i] for i in missing]
+    generated = [None] * len(missing_texts)
+    
+    batch_size = max(1, batch_size)
+    chunks = [(start, missing_texts[start:start + batch_size]) for start in range(0, len(missing_texts), batch_size)]
+    
+    def embed_chunk(chunk):
+        start, chunk_texts = chunk
         try:
-            vector_store.clear()
-            logger.info("Cleared vector store")
+            chunk_embeddings = embedding_provider.embed(chunk_texts)
+            generated[start:start + len(chunk_texts)] = chunk_embeddings
+            if cache:
+                cache.set_many(embedding_provider.model_name, list(zip(chunk_texts, chunk_embeddings)))
         except Exception as e:
-            logger.error(f"Error clearing vector store: {e}")
+            logger.warning(f"Batch embedding of {len(chunk_texts)} texts failed, retrying individually: {e}")
+            for offset, text in enumerate(chunk_texts):
+                generated[start + offset] = generate_embedding(text, use_cache=use_cache)
+    
+    if len(chunks) == 1 or not embedding_provider.concurrent:
+        # Nothing to parallelise, skip the thread pool
+        for chunk in chunks:
+            embed_chunk(chunk)
+    else:
+        workers = max(1, min(max_concurrency, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(embed_chunk, chunks))
+    
+    for i, embedding in zip(missing, generated):
+        embeddings[i] = embedding
+    
+    failed = sum(1 for embedding in generated if embedding is None)
+    logger.debug(
+        f"Embedded {len(texts)} texts: {len(texts) - len(missing)} from cache, "
+        f"{len(missing) - failed} generated in {len(chunks)} batch(es), {failed} failed"
+    )
+    return embeddings
+
+async def generate_embeddings_async(texts, batch_size=EMBEDDING_BATCH_SIZE, max_concurrency=EMBEDDING_MAX_CONCURRENCY,
+                                    use_cache=True):
+    """
+    Generate embeddings for many texts without blocking the event loop
+    
+    Async counterpart of `generate_embeddings`: cache hits are served from
+    the embedding cache and the rest are sent in chunks on the pooled async
+    client, with at most `max_concurrency` requests in flight.
+    
+    Args:
+        texts: List of texts to embed
+        batch_size: Number of texts per embeddings request
+        max_concurrency: Maximum number of requests in flight at once
+        use_cache: Read and write the persistent embedding cache
+        
+    Returns:
+        List of embeddings in the same order as `texts` (None where embedding failed)
+    """
+    if not texts:
+        return []
     
-    # Find all JSON files in the processes directory and its subdirectories
-    process_files = glob.glob(os.path.join(PROCESSES_DIR, '**', '*.json'), recursive=True)
+    model_name = embedding_provider.model_name
+    cache = embedding_cache if use_cache else None
+    if cache:
+        embeddings = await chat_executor.run(cache.get_many, model_name, texts)
+    else:
+        embeddings = [None] * len(texts)
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if not missing:
+        return embeddings
+    
+    batch_size = max(1, batch_size)
+    chunks = [missing[start:start + batch_size] for start in range(0, len(missing), batch_size)]
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    
+    async def embed_chunk(indices):
+        chunk_texts = [texts[i] for i in indices]
+        async with semaphore:
+            try:
+                chunk_embeddings = await embedding_provider.aembed(chunk_texts)
+            except Exception as e:
+                logger.warning(f"Batch embedding of {len(chunk_texts)} texts failed, retrying individually: {e}")
+                chunk_embeddings = []
+                for text in chunk_texts:
+                    try:
+                        chunk_embeddings.append((await embedding_provider.aembed([text]))[0])
+                    except Exception as e:
+                        logger.error(f"Error generating embedding: {e}")
+                        chunk_embeddings.append(None)
+        for i, embedding in zip(indices, chunk_embeddings):
+            embeddings[i] = embedding
+        if cache:
+            await chat_executor.run(cache.set_many, model_name, list(zip(chunk_texts, chunk_embeddings)))
+    
+    await asyncio.gather(*(embed_chunk(indices) for indices in chunks))
+    return embeddings
+
+async def embed_queries_async(queries):
+    """
+    Embed several search queries without blocking the event loop
+    
+    Async counterpart of `embed_queries`, sharing its query embedding cache.
+    
+    Args:
+        queries: List of search queries
+        
+    Returns:
+        List of embeddings aligned with `queries` (None where embedding failed)
+    """
+    normalized_queries = [QueryEmbeddingCache.normalize(query) for query in queries]
+    
+    embeddings_by_query = {}
+    missing = []
+    for normalized_query in dict.fromkeys(normalized_queries):
+        if not normalized_query:
+            continue
+        embedding = query_embedding_cache.get(normalized_query)
+        if embedding is None:
+            missing.append(normalized_query)
+        else:
+            embeddings_by_query[normalized_query] = embedding
+    
+    if missing:
+        # Queries already being embedded by another request are awaited, not re-sent; like
+        # embed_queries, they bypass the persistent cache
+        embedded = await async_query_flight.do_many(missing, lambda texts: generate_embeddings_async(texts, use_cache=False))
+        for normalized_query, embedding in zip(missing, embedded):
+            if embedding:
+                query_embedding_cache.set(normalized_query, embedding)
+                embeddings_by_query[normalized_query] = embedding
+    
+    return [embeddings_by_query.get(normalized_query) for normalized_query in normalized_queries]
+
+def _queries_to_embed(queries):
+    """Get the queries that have text to embed; the others get no embedding"""
+    return [query for query in queries if QueryEmbeddingCache.normalize(query)]
+
+def embed_queries_with_fallback(queries):
+    """
+    Embed search queries, using local embeddings if the provider is too slow or failing
+    
+    Args:
+        queries: List of search queries
+        
+    Returns:
+        Tuple of (embeddings aligned with `queries`, whether they are local
+        fallback embeddings to be searched with PROCESS_FALLBACK_INDEX)
+    """
+    if PROCESS_FALLBACK_INDEX is None:
+        return embed_queries(queries), False
+    texts = _queries_to_embed(queries)
+    if not texts:
+        return [None] * len(queries), False
+    embeddings, fallback = embedding_provider.embed_with_fallback(texts, primary=embed_queries)
+    by_query = dict(zip(texts, embeddings))
+    return [by_query.get(query) for query in queries], fallback
+
+async def embed_queries_with_fallback_async(queries):
+    """
+    Embed search queries without blocking the event loop, using local embeddings if needed
+    
+    Async counterpart of `embed_queries_with_fallback`.
+    
+    Args:
+        queries: List of search queries
+        
+    Returns:
+        Tuple of (embeddings aligned with `queries`, whether they are local fallback embeddings)
+    """
+    if PROCESS_FALLBACK_INDEX is None:
+        return await embed_queries_async(queries), False
+    texts = _queries_to_embed(queries)
+    if not texts:
+        return [None] * len(queries), False
+    embeddings, fallback = await embedding_provider.aembed_with_fallback(texts, primary=embed_queries_async)
+    by_query = dict(zip(texts, embeddings))
+    return [by_query.get(query) for query in queries], fallback
+
+def _build_embedding_text(process_data):
+    """Build the text used for the in-memory embedding of a process"""
+    embedding_text = process_data.get('title', '')
+    if 'description' in process_data:
+        embedding_text += ' ' + process_data['description']
+    if 'keywords' in process_data:
+        # Add each keyword multiple times to increase its weight
+        embedding_text += ' ' + ' '.join(process_data['keywords'] * 3)
+    # Add first few steps to provide more context
+    if 'steps' in process_data and process_data['steps']:
+        embedding_text += ' ' + ' '.join(process_data['steps'][:3])
+    return embedding_text
+
+def _build_lexical_text(process_data):
+    """Build the text indexed for keyword matching of a process"""
+    lexical_text = process_data.get('title', '')
+    if 'description' in process_data:
+        lexical_text += ' ' + process_data['description']
+    if 'keywords' in process_data:
+        # Keywords were written for matching, so weigh them above the prose
+        lexical_text += ' ' + ' '.join(process_data['keywords'] * 3)
+    return lexical_text
+
+def _update_process_embeddings(upserts, removals=(), fingerprints=None):
+    """
+    Apply embedding changes to the in-memory index or the quantized embedding store
+    
+    Args:
+        upserts: Dictionary mapping process names to embeddings to add or replace
+        removals: Process names whose embeddings should be dropped
+        fingerprints: Hashes of the embedded texts, recorded by the quantized store
+    """
+    if PROCESS_EMBEDDING_STORE is not None:
+        # One new generation per batch of changes instead of one per process
+        PROCESS_EMBEDDING_STORE.apply(upserts, removals=removals, fingerprints=fingerprints)
+        return
+    
+    for process_name in removals:
+        PROCESS_EMBEDDINGS.pop(process_name, None)
+        PROCESS_INDEX.remove(process_name)
+    for process_name, embedding in upserts.items():
+        PROCESS_EMBEDDINGS[process_name] = embedding
+        PROCESS_INDEX.upsert(process_name, embedding)
+
+def _in_memory_process_names():
+    """Get the names of processes that have an embedding outside the vector store"""
+    if PROCESS_EMBEDDING_STORE is not None:
+        return PROCESS_EMBEDDING_STORE.ids
+    return list(PROCESS_EMBEDDINGS)
+
+def get_process_embedding(process_name):
+    """
+    Get the in-memory embedding of a process
+    
+    Args:
+        process_name: Name of the process
+        
+    Returns:
+        The embedding, or None if the process has no in-memory embedding
+    """
+    if PROCESS_EMBEDDING_STORE is not None:
+        return PROCESS_EMBEDDING_STORE.get(process_name)
+    return PROCESS_EMBEDDINGS.get(process_name)
+
+def _update_fallback_index(processes, removals=()):
+    """
+    Apply process changes to the local fallback index, if the fallback is enabled
+    
+    Args:
+        processes: Dictionary mapping process names to process data to add or replace
+        removals: Process names to drop
+    """
+    if PROCESS_FALLBACK_INDEX is None:
+        return
+    for process_name in removals:
+        PROCESS_FALLBACK_INDEX.remove(process_name)
+    names = [process_name for process_name, process_data in processes.items() if _build_embedding_text(process_data)]
+    texts = [_build_embedding_text(processes[process_name]) for process_name in names]
+    # Local embeddings are computed on the CPU, so the whole batch is cheap
+    for process_name, embedding in zip(names, embedding_provider.fallback.embed(texts)):
+        PROCESS_FALLBACK_INDEX.upsert(process_name, embedding)
+
+def _processes_without_embeddings():
+    """
+    Get loaded processes that should have an in-memory embedding but have none
+    
+    Covers processes whose embedding failed on an earlier load (e.g. the
+    embedding API was down), so they are retried even if their file is unchanged.
+    
+    Returns:
+        Dictionary mapping process names to process data
+    """
+    embedded = set(_in_memory_process_names())
+    return {
+        process_name: entry["data"]
+        for process_name, entry in _process_files.items()
+        if process_name not in embedded and _build_embedding_text(entry["data"])
+    }
+
+def _embed_in_memory(processes):
+    """
+    Generate in-memory embeddings for a dict of processes in batches
+    
+    Processes whose embedding text is unchanged in the quantized embedding
+    store (e.g. written by another worker) are not embedded again.
+    
+    Args:
+        processes: Dictionary mapping process names to process data
+    """
+    names = []
+    texts = []
+    fingerprints = {}
+    for process_name, process_data in processes.items():
+        embedding_text = _build_embedding_text(process_data)
+        if not embedding_text:
+            continue
+        fingerprint = hashlib.sha256(embedding_text.encode('utf-8')).hexdigest()
+        if PROCESS_EMBEDDING_STORE is not None and PROCESS_EMBEDDING_STORE.fingerprint(process_name) == fingerprint:
+            continue
+        names.append(process_name)
+        texts.append(embedding_text)
+        fingerprints[process_name] = fingerprint
+    
+    if not names:
+        return
+    
+    upserts = {
+        process_name: embedding
+        for process_name, embedding in zip(names, generate_embeddings(texts))
+        if embedding
+    }
+    _update_process_embeddings(upserts, fingerprints=fingerprints)
+
+def _scan_process_files():
+    """
+    Hash every process JSON file in the processes directory
+    
+    Returns:
+        Dictionary mapping process names to {"path", "hash", "content"}
+    """
+    scanned = {}
+    duplicates = {}
+    
+    # Find all JSON files in the processes directory and its subdirectories,
+    # sorted so the same file wins every time a process name is duplicated
+    process_files = sorted(glob.glob(os.path.join(PROCESSES_DIR, '**', '*.json'), recursive=True))
     
     for file_path in process_files:
+        # Get process name from filename (without extension)
+        process_name = os.path.splitext(os.path.basename(file_path))[0]
+        relative_path = os.path.relpath(file_path, PROCESSES_DIR)
+        if process_name in scanned:
+            duplicates.setdefault(process_name, [scanned[process_name]["path"]]).append(relative_path)
+            logger.warning(f"Duplicate process '{process_name}': ignoring {relative_path}, using {scanned[process_name]['path']}")
+            continue
+        
         try:
-            with open(file_path, 'r') as f:
-                process_data = json.load(f)
-                
-            # Get process name from filename (without extension)
-            process_name = os.path.splitext(os.path.basename(file_path))[0]
-            
-            # Store the process data
-            if 'steps' in process_data:
-                # Simple process with just steps
-                PROCESS_INSTRUCTIONS[process_name] = process_data['steps']
-            else:
-                # Complex process with structured data
-                PROCESS_INSTRUCTIONS[process_name] = process_data
-                
-            # Store the keywords for matching
-            if 'keywords' in process_data:
-                PROCESS_KEYWORDS[process_name] = process_data['keywords']
-            
-            # Add to vector store if enabled
-            if USE_VECTOR_STORE and vector_store and vector_store.is_initialized:
-                success = vector_store.add_process(process_name, process_data)
-                if not success:
-                    logger.warning(f"Failed to add process {process_name} to vector store, generating in-memory embedding instead")
-                    # Fall back to in-memory embedding
-                    embedding_text = process_data.get('title', '')
-                    if 'description' in process_data:
-                        embedding_text += ' ' + process_data['description']
-                    if 'keywords' in process_data:
-                        # Add each keyword multiple times to increase its weight
-                        embedding_text += ' ' + ' '.join(process_data['keywords'] * 3)
-                    # Add first few steps to provide more context
-                    if 'steps' in process_data and process_data['steps']:
-                        embedding_text += ' ' + ' '.join(process_data['steps'][:3])
-                    
-                    if embedding_text:
-                        embedding = generate_embedding(embedding_text)
-                        if embedding:
-                            PROCESS_EMBEDDINGS[process_name] = embedding
+            with open(file_path, 'rb') as f:
+                content = f.read()
+        except Exception as e:
+            logger.error(f"Error reading process file {file_path}: {e}")
+            continue
+        
+        scanned[process_name] = {
+            "path": relative_path,
+            "hash": hashlib.sha256(content).hexdigest(),
+            "content": content
+        }
+    
+    _duplicate_processes.clear()
+    _duplicate_processes.update(duplicates)
+    return scanned
+
+def _process_category(relative_path):
+    """Get the category of a process from its path relative to the processes directory"""
+    return os.path.basename(os.path.dirname(relative_path)) or "other"
+
+def _sync_vector_store(current_files, full_rebuild=False):
+    """
+    Bring the vector store in line with the processes directory
+    
+    Compares the content hashes of the current process files with the
+    manifest stored next to the Chroma collection, upserts only new or
+    changed processes and deletes only removed ones.
+    
+    Args:
+        current_files: Dictionary mapping process names to {"path", "hash"}
+        full_rebuild: Clear the collection and re-add every process
+        
+    Returns:
+        Dictionary of processes that could not be added to the vector store
+    """
+    manifest = vector_store.load_manifest()
+    
+    # The stored embeddings are unusable if the manifest is missing, was built with
+    # another model or no longer describes what is actually in the collection
+    if (full_rebuild or manifest is None
+            or manifest.get("embedding_model") != embedding_provider.model_name
+            or manifest.get("metadata_version") != vector_store.METADATA_VERSION
+            or len(manifest["processes"]) != vector_store.count()
+            or len(manifest["processes"]) != vector_store.process_store.count()):
+        logger.info("Rebuilding vector store from scratch")
+        vector_store.clear()
+        manifest = {
+            "embedding_model": embedding_provider.model_name,
+            "metadata_version": vector_store.METADATA_VERSION,
+            "processes": {}
+        }
+    
+    indexed = manifest["processes"]
+    changed = [
+        name for name, entry in current_files.items()
+        if name in _process_files and indexed.get(name, {}).get("hash") != entry["hash"]
+    ]
+    removed = [name for name in indexed if name not in current_files or name not in _process_files]
+    
+    if removed:
+        vector_store.delete_processes(removed)
+        for name in removed:
+            indexed.pop(name, None)
+    
+    failed_processes = {}
+    if changed:
+        # Embed the vector store documents in batches, then upsert them in chunks with precomputed embeddings
+        documents = [vector_store.get_document_text(_process_files[name]["data"]) for name in changed]
+        embeddings = generate_embeddings(documents)
+        results = vector_store.upsert_processes(
+            {name: _process_files[name]["data"] for name in changed},
+            embeddings=dict(zip(changed, embeddings)),
+            categories={name: _process_category(current_files[name]["path"]) for name in changed}
+        )
+        
+        for process_name in changed:
+            process_data = _process_files[process_name]["data"]
+            if results.get(process_name):
+                indexed[process_name] = {
+                    "path": current_files[process_name]["path"],
+                    "hash": current_files[process_name]["hash"]
+                }
             else:
-                # Generate and store embedding for in-memory approach
-                embedding_text = process_data.get('title', '')
-                if 'description' in process_data:
-                    embedding_text += ' ' + process_data['description']
-                if 'keywords' in process_data:
-                    # Add each keyword multiple times to increase its weight
-                    embedding_text += ' ' + ' '.join(process_data['keywords'] * 3)
-                # Add first few steps to provide more context
-                if 'steps' in process_data and process_data['steps']:
-                    embedding_text += ' ' + ' '.join(process_data['steps'][:3])
-                
-                if embedding_text:
-                    embedding = generate_embedding(embedding_text)
-                    if embedding:
-                        PROCESS_EMBEDDINGS[process_name] = embedding
-                
-            logger.info(f"Loaded process: {process_name}")
-                
+                logger.warning(f"Failed to add process {process_name} to vector store, generating in-memory embedding instead")
+                indexed.pop(process_name, None)
+                failed_processes[process_name] = process_data
+    
+    vector_store.save_manifest(manifest)
+    logger.info(f"Vector store sync: {len(changed)} upserted, {len(removed)} removed, {len(indexed)} indexed")
+    return failed_processes
+
+# Incremented whenever processes are added, changed or removed, so caches
+# built on top of the catalog can tell their contents are stale
+_catalog_version = 0
+
+# Serializes catalog loads, e.g. a background warm-start refresh and an admin edit
+_catalog_lock = threading.RLock()
+
+# Source fingerprint of the catalog snapshot last written or restored
+_snapshot_fingerprint = None
+
+# Number of processes without an embedding in the catalog snapshot last written or restored
+_snapshot_missing_embeddings = 0
+
+# Whether the vector store and persisted index have been opened
+_backends_initialized = False
+
+# Set once initialize_catalog() has a catalog to serve from
+_catalog_ready = threading.Event()
+
+# Warm-start snapshot of the catalog, opened by initialize_catalog() if enabled
+catalog_snapshot = None
+
+def get_catalog_version():
+    """Get the current version of the process catalog"""
+    return _catalog_version
+
+def get_process_catalog():
+    """
+    Get the loaded process catalog
+    
+    Returns:
+        Dictionary mapping process names to {"category", "data", "hash"}, where
+        "hash" is the content hash of the process file
+    """
+    with _catalog_lock:
+        return {
+            process_name: {"category": _process_category(entry["path"]), "data": entry["data"], "hash": entry["hash"]}
+            for process_name, entry in _process_files.items()
+        }
+
+def get_process_document(process_name):
+    """
+    Get a loaded process file without touching the filesystem
+    
+    Args:
+        process_name: Name of the process
+    
+    Returns:
+        Dictionary with the parsed "data", the source "path" relative to the
+        processes directory and the "category", or None if it is not loaded
+    """
+    # A single dictionary lookup: loads replace entries whole, so no lock is needed
+    entry = _process_files.get(process_name)
+    if entry is None:
+        return None
+    return {"path": entry["path"], "category": _process_category(entry["path"]), "data": entry["data"]}
+
+def get_duplicate_processes():
+    """
+    Get process names defined by more than one file
+    
+    Returns:
+        Dictionary mapping process names to the paths defining them; the
+        first path is the one that was loaded
+    """
+    return {process_name: list(paths) for process_name, paths in _duplicate_processes.items()}
+
+def _store_process(process_name, process_data, content_hash):
+    """Store the instructions, keywords and rendered responses of a parsed process"""
+    PROCESS_INSTRUCTIONS[process_name] = process_instructions(process_data)
+    PROCESS_RESPONSES.update(process_name, content_hash, process_data)
+        
+    # Store the keywords for matching
+    if 'keywords' in process_data:
+        PROCESS_KEYWORDS[process_name] = process_data['keywords']
+    else:
+        PROCESS_KEYWORDS.pop(process_name, None)
+
+def _prune_process_index():
+    """Drop rows of the persisted index for processes removed while the app was down, then save it if it changed"""
+    stale = [process_name for process_name in PROCESS_INDEX.ids if process_name not in PROCESS_EMBEDDINGS]
+    for process_name in stale:
+        PROCESS_INDEX.remove(process_name)
+    if PROCESS_INDEX.dirty:
+        PROCESS_INDEX.save(ANN_INDEX_PATH)
+
+def _snapshot_settings():
+    """Settings a catalog snapshot was built with; a snapshot built with others is not restored"""
+    return {
+        "embedding_model": embedding_provider.model_name,
+        "use_vector_store": bool(USE_VECTOR_STORE and vector_store and vector_store.is_initialized),
+        "embedding_store_format": EMBEDDING_STORE_FORMAT if PROCESS_EMBEDDING_STORE is not None else "memory"
+    }
+
+def _save_catalog_snapshot(fingerprint, missing_embeddings=0):
+    """Write the loaded catalog, keyword index and in-memory embeddings to the snapshot"""
+    global _snapshot_fingerprint, _snapshot_missing_embeddings
+    if catalog_snapshot is None:
+        return
+    
+    settings = _snapshot_settings()
+    if settings["use_vector_store"]:
+        # Lets a restore detect a collection that was cleared behind the manifest's back
+        settings["vector_count"] = vector_store.count()
+    # The quantized store persists its own embeddings
+    embedding_ids = list(PROCESS_EMBEDDINGS) if PROCESS_EMBEDDING_STORE is None else []
+    if catalog_snapshot.save(
+        fingerprint,
+        settings,
+        processes=_process_files,
+        lexical_terms=PROCESS_LEXICAL_INDEX.export_terms(),
+        embedding_ids=embedding_ids,
+        embeddings=[PROCESS_EMBEDDINGS[process_name] for process_name in embedding_ids],
+        missing_embeddings=missing_embeddings
+    ):
+        _snapshot_fingerprint = fingerprint
+        _snapshot_missing_embeddings = missing_embeddings
+
+def _restore_catalog_snapshot():
+    """
+    Load the catalog from the warm-start snapshot instead of the process files
+    
+    Returns:
+        Tuple of (source fingerprint the snapshot was built from, whether the
+        vector store still matches it and every process has an embedding),
+        or None if no usable snapshot exists
+    """
+    global _catalog_version, _snapshot_fingerprint, _snapshot_missing_embeddings
+    if catalog_snapshot is None:
+        return None
+    
+    snapshot = catalog_snapshot.load()
+    if snapshot is None:
+        return None
+    stored_settings = dict(snapshot["settings"])
+    vector_count = stored_settings.pop("vector_count", None)
+    if stored_settings != _snapshot_settings():
+        logger.info("Catalog snapshot was built with other settings, loading from files")
+        return None
+    
+    with _catalog_lock:
+        for process_name, entry in snapshot["processes"].items():
+            _process_files[process_name] = entry
+            _store_process(process_name, entry["data"], entry["hash"])
+        PROCESS_LEXICAL_INDEX.load_terms(snapshot["lexical_terms"])
+        _update_fallback_index({process_name: entry["data"] for process_name, entry in snapshot["processes"].items()})
+        if snapshot["embedding_ids"]:
+            # Rows of the loaded matrix; converting them to lists would cost more than the whole restore
+            _update_process_embeddings(dict(zip(snapshot["embedding_ids"], snapshot["embeddings"])))
+        if PROCESS_EMBEDDING_STORE is None:
+            _prune_process_index()
+        _catalog_version += 1
+        _snapshot_fingerprint = snapshot["fingerprint"]
+        _snapshot_missing_embeddings = snapshot["missing_embeddings"]
+    
+    vector_store_current = vector_count is None or vector_count == vector_store.count()
+    logger.info(f"Restored {len(_process_files)} processes from catalog snapshot {catalog_snapshot.path}")
+    if _snapshot_missing_embeddings:
+        logger.info(f"Catalog snapshot has {_snapshot_missing_embeddings} processes without an embedding")
+    return snapshot["fingerprint"], vector_store_current and not _snapshot_missing_embeddings
+
+def load_processes_from_files(full_rebuild=False):
+    """
+    Load process instructions from JSON files in the processes directory
+    
+    Loading is incremental: only files whose content hash changed since the
+    last load are parsed and re-indexed, and only removed files are deleted.
+    The warm-start snapshot is rewritten afterwards.
+    
+    Args:
+        full_rebuild: Re-parse and re-index every process from scratch
+    """
+    with _catalog_lock:
+        _initialize_backends()
+        _load_processes_from_files(full_rebuild)
+        _catalog_ready.set()
+
+def _load_processes_from_files(full_rebuild):
+    """Load the process files; the caller holds the catalog lock"""
+    global _catalog_version
+    # Taken before reading, so a file changed mid-scan makes the snapshot look stale rather than current
+    fingerprint = _source_fingerprint() if catalog_snapshot is not None else None
+    current_files = _scan_process_files()
+    
+    if full_rebuild:
+        _process_files.clear()
+        PROCESS_INSTRUCTIONS.clear()
+        PROCESS_KEYWORDS.clear()
+        PROCESS_EMBEDDINGS.clear()
+        PROCESS_INDEX.clear()
+        if PROCESS_EMBEDDING_STORE is not None:
+            PROCESS_EMBEDDING_STORE.clear()
+        PROCESS_LEXICAL_INDEX.clear()
+        PROCESS_RESPONSES.clear()
+        if PROCESS_FALLBACK_INDEX is not None:
+            PROCESS_FALLBACK_INDEX.clear()
+    
+    changed_processes = {}
+    removed = [name for name in _process_files if name not in current_files]
+    
+    for process_name, entry in current_files.items():
+        previous = _process_files.get(process_name)
+        if previous and previous["hash"] == entry["hash"] and previous["path"] == entry["path"]:
+            continue
+        
+        try:
+            process_data = json.loads(entry["content"])
         except Exception as e:
-            logger.error(f"Error loading process file {file_path}: {e}")
+            logger.error(f"Error loading process file {entry['path']}: {e}")
+            if previous:
+                removed.append(process_name)
+            continue
+        
+        _process_files[process_name] = {"path": entry["path"], "hash": entry["hash"], "data": process_data}
+        _store_process(process_name, process_data, entry["hash"])
+        PROCESS_LEXICAL_INDEX.add_document(process_name, _build_lexical_text(process_data))
+        changed_processes[process_name] = process_data
+        logger.info(f"Loaded process: {process_name}")
+    
+    for process_name in removed:
+        _process_files.pop(process_name, None)
+        PROCESS_INSTRUCTIONS.pop(process_name, None)
+        PROCESS_KEYWORDS.pop(process_name, None)
+        PROCESS_LEXICAL_INDEX.remove_document(process_name)
+        PROCESS_RESPONSES.remove(process_name)
+        logger.info(f"Removed process: {process_name}")
+    if removed:
+        _update_process_embeddings({}, removals=removed)
+    _update_fallback_index(changed_processes, removals=removed)
+    
+    if USE_VECTOR_STORE and vector_store and vector_store.is_initialized:
+        try:
+            failed_processes = _sync_vector_store(current_files, full_rebuild=full_rebuild)
+        except Exception as e:
+            logger.error(f"Error syncing vector store: {e}")
+            failed_processes = {name: entry["data"] for name, entry in _process_files.items()}
+        
+        # Fall back to in-memory embeddings for anything the vector store rejected
+        _update_process_embeddings({}, removals=[
+            process_name for process_name in _in_memory_process_names()
+            if process_name not in failed_processes
+        ])
+        if failed_processes:
+            _embed_in_memory(failed_processes)
+        embedded = set(_in_memory_process_names())
+        missing_embeddings = sum(
+            1 for process_name, process_data in failed_processes.items()
+            if process_name not in embedded and _build_embedding_text(process_data)
+        )
+    else:
+        # Generate and store embeddings for in-memory approach, retrying processes left without one
+        missing = {
+            process_name: process_data
+            for process_name, process_data in _processes_without_embeddings().items()
+            if process_name not in changed_processes
+        }
+        if missing:
+            logger.info(f"Retrying embeddings for {len(missing)} unchanged processes that have none")
+        _embed_in_memory({**changed_processes, **missing})
+        missing_embeddings = len(_processes_without_embeddings())
+        if PROCESS_EMBEDDING_STORE is not None:
+            # Drop embeddings another worker stored for processes that no longer exist
+            _update_process_embeddings({}, removals=[
+                process_name for process_name in PROCESS_EMBEDDING_STORE.ids
+                if process_name not in _process_files
+            ])
     
-    logger.info(f"Loaded {len(PROCESS_INSTRUCTIONS)} processes from files")
+    if PROCESS_EMBEDDING_STORE is None:
+        _prune_process_index()
+    
+    if full_rebuild or changed_processes or removed:
+        _catalog_version += 1
+    if missing_embeddings:
+        logger.warning(f"{missing_embeddings} processes have no embedding, they are retried on the next load")
+    if (full_rebuild or changed_processes or removed or fingerprint != _snapshot_fingerprint
+            or missing_embeddings != _snapshot_missing_embeddings):
+        _save_catalog_snapshot(fingerprint, missing_embeddings)
+    
+    logger.info(f"Loaded {len(PROCESS_INSTRUCTIONS)} processes from files ({len(changed_processes)} changed, {len(removed)} removed)")
     
     if USE_VECTOR_STORE and vector_store and vector_store.is_initialized:
-        logger.info(f"Added {vector_store.count()} processes to vector store")
+        logger.info(f"Vector store holds {vector_store.count()} processes")
     else:
-        logger.info(f"Generated embeddings for {len(PROCESS_EMBEDDINGS)} processes")
+        logger.info(f"Generated embeddings for {len(_in_memory_process_names())} processes")
 
-# Load processes when this module is imported
-load_processes_from_files()
+def warm_start():
+    """
+    Load the process catalog at startup
+    
+    A snapshot matching the process files is restored without touching them.
+    A stale snapshot, or one saved while some processes could not be
+    embedded, is restored as well so requests can be served straight away,
+    and the files are reloaded in a background thread. Without a snapshot
+    the files are loaded synchronously.
+    
+    Returns:
+        The background refresh thread, or None if none was started
+    """
+    restored = _restore_catalog_snapshot()
+    if restored is None:
+        load_processes_from_files()
+        return None
+    
+    snapshot_fingerprint, snapshot_complete = restored
+    if snapshot_fingerprint == _source_fingerprint() and snapshot_complete:
+        return None
+    
+    logger.info("Catalog snapshot is stale or incomplete, refreshing in the background")
+    thread = threading.Thread(target=load_processes_from_files, name="catalog-refresh", daemon=True)
+    thread.start()
+    return thread
+
+def _source_fingerprint():
+    """Fingerprint of the process files' paths, sizes and modification times"""
+    from src.catalog_snapshot import source_fingerprint
+    return source_fingerprint(PROCESSES_DIR)
+
+def _initialize_backends():
+    """Open the embedding cache and stores, in-memory index and catalog snapshot; the caller holds the catalog lock"""
+    global _backends_initialized, PROCESS_INDEX, PROCESS_FALLBACK_INDEX, catalog_snapshot
+    if _backends_initialized:
+        return
+    # numpy-backed modules are only imported once the catalog is actually loaded
+    from src.ann_index import IVFIndex
+    from src.catalog_snapshot import CatalogSnapshot
+    _initialize_embedding_cache()
+    _initialize_embedding_store()
+    _initialize_vector_store()
+    PROCESS_INDEX = IVFIndex(nlist=ANN_NLIST, nprobe=ANN_NPROBE, min_train_size=ANN_MIN_TRAIN_SIZE)
+    if PROCESS_EMBEDDING_STORE is None:
+        PROCESS_INDEX.load(ANN_INDEX_PATH)
+    if isinstance(embedding_provider, FallbackEmbeddingProvider):
+        from src.similarity_index import SimilarityIndex
+        PROCESS_FALLBACK_INDEX = SimilarityIndex()
+    if CATALOG_SNAPSHOT_ENABLED:
+        catalog_snapshot = CatalogSnapshot(os.path.join(
+            CATALOG_SNAPSHOT_PATH,
+            re.sub(r"[^A-Za-z0-9_.-]", "_", f"catalog_{embedding_provider.model_name}.npz")
+        ))
+    _backends_initialized = True
+
+def initialize_catalog():
+    """
+    Open the embedding cache, stores and indexes and load the process catalog
+    
+    Importing this module only reads settings; the application calls this
+    once at startup, and tools that only parse process files never do.
+    Calling it again is a no-op.
+    
+    Returns:
+        The warm-start background refresh thread, or None if none was started
+    """
+    with _catalog_lock:
+        if _catalog_ready.is_set():
+            return None
+        _initialize_backends()
+        refresh_thread = warm_start()
+        _catalog_ready.set()
+    return refresh_thread
+
+def is_catalog_ready():
+    """Check whether the process catalog has been loaded"""
+    return _catalog_ready.is_set()
 
 # New helper function to support enhanced process guides
 def get_formatted_process_guide(process_name):
@@ -183,76 +1177,46 @@ def get_formatted_process_guide(process_name):
     Returns:
         Formatted string with the process guide or None if not found
     """
-    process = PROCESS_INSTRUCTIONS.get(process_name)
+    return format_process_steps(PROCESS_INSTRUCTIONS.get(process_name))
+
+def get_rendered_process_answer(process_name):
+    """
+    Get the pre-rendered chat answer of a loaded process
     
-    if not process:
-        return None
-        
-    # Handle simple list-based process instructions
-    if isinstance(process, list):
-        formatted_steps = []
-        for i, step in enumerate(process):
-            # Format with the number followed by the step in a way that makes it clear these are exact instructions
-            formatted_steps.append(f"Step {i+1}: {step}")
-        
-        # Join with double newlines for better spacing between steps
-        return "\n\n".join(formatted_steps)
-        
-    # Handle complex structured process instructions
-    if isinstance(process, dict):
-        result = []
-        
-        # Add description if available
-        if 'description' in process:
-            result.append(f"{process['description']}")
-            result.append("")  # Add an empty line after description
-            
-        # Add prerequisites if any
-        if 'prerequisites' in process:
-            result.append("### Prerequisites")
-            result.append("")  # Add an empty line after header
-            for prereq in process['prerequisites']:
-                result.append(f"- {prereq}")
-            result.append("")  # Add an empty line for spacing
-                
-        # Add sections
-        if 'sections' in process:
-            for i, section in enumerate(process['sections']):
-                section_name = section.get('name', f'Section {i+1}')
-                result.append(f"### {section_name}")
-                result.append("")  # Add empty line after section header
-                
-                # Add steps as a properly formatted numbered list
-                if 'steps' in section:
-                    for j, step in enumerate(section['steps']):
-                        # Use standard markdown numbered list format
-                        result.append(f"{j+1}. {step}")
-                    result.append("")  # Add spacing between steps and notes
-                
-                # Add notes if any
-                if 'notes' in section:
-                    result.append(f"**Note:** {section['notes']}")
-                    result.append("")  # Add spacing after notes
-                    
-                # Add tips if any
-                if 'tips' in section:
-                    result.append(f"**Tip:** {section['tips']}")
-                    result.append("")  # Add spacing after tips
-                    
-                # Add troubleshooting if any
-                if 'troubleshooting' in section:
-                    result.append("**Troubleshooting:**")
-                    result.append("")  # Add empty line after troubleshooting header
-                    for issue in section['troubleshooting']:
-                        result.append(f"- {issue}")
-                    result.append("")  # Add spacing after troubleshooting
-                
-                result.append("")  # Add extra spacing between sections
+    Args:
+        process_name: Name of the process
         
-        # Join with single newline since we've already added empty lines
-        return "\n".join(result)
+    Returns:
+        RenderedResponse with the markdown and encoded API body, or None if
+        the process is not loaded
+    """
+    entry = _process_files.get(process_name)
+    if entry is None:
+        return None
+    _ensure_rendered(process_name, entry)
+    return PROCESS_RESPONSES.answer(process_name, entry["hash"])
+
+def get_rendered_process_guide(process_name):
+    """
+    Get the pre-rendered step-by-step guide of a loaded process
+    
+    Args:
+        process_name: Name of the process
         
-    return None
+    Returns:
+        RenderedResponse with the markdown and encoded API body, or None if
+        the process is not loaded or has no instructions
+    """
+    entry = _process_files.get(process_name)
+    if entry is None:
+        return None
+    _ensure_rendered(process_name, entry)
+    return PROCESS_RESPONSES.guide(process_name, entry["hash"])
+
+def _ensure_rendered(process_name, entry):
+    """Render a loaded process that is not cached yet, e.g. when read while a reload is in progress"""
+    if not PROCESS_RESPONSES.has(process_name, entry["hash"]):
+        PROCESS_RESPONSES.update(process_name, entry["hash"], entry["data"])
 
 def get_process_keywords():
     """
@@ -278,12 +1242,75 @@ def search_processes_vector(query, top_k=3):
     Returns:
         List of process names and scores
     """
+    return search_processes_vectors([query], top_k=top_k)[0]
+
+def search_processes_vectors(queries, top_k=3):
+    """
+    Search for processes using vector similarity for several queries at once
+    
+    All queries are embedded with one batched request and searched in a
+    single pass over the index.
+    
+    Args:
+        queries: List of search queries
+        top_k: Number of results to return per query
+        
+    Returns:
+        One list of process names and scores per query
+    """
     try:
-        if USE_VECTOR_STORE and vector_store and vector_store.is_initialized:
-            # Use vector store for search
-            results = vector_store.query(query, n_results=top_k)
-            
-            # Transform the results to match the expected format
+        # Repeated questions are served from the query embedding cache
+        query_embeddings, fallback = embed_queries_with_fallback(queries)
+        if fallback:
+            return _search_fallback_index(query_embeddings, top_k)
+        return _search_by_embeddings(queries, query_embeddings, top_k)
+    except Exception as e:
+        logger.error(f"Error in search_processes_vectors: {e}")
+        return [[] for _ in queries]
+
+async def search_processes_vectors_async(queries, top_k=3):
+    """
+    Search for processes using vector similarity without blocking the event loop
+    
+    The queries are embedded on the pooled async client; the index lookup
+    itself runs on the chat worker pool.
+    
+    Args:
+        queries: List of search queries
+        top_k: Number of results to return per query
+        
+    Returns:
+        One list of process names and scores per query
+    """
+    try:
+        query_embeddings, fallback = await embed_queries_with_fallback_async(queries)
+        if fallback:
+            return _search_fallback_index(query_embeddings, top_k)
+        return await chat_executor.run(_search_by_embeddings, queries, query_embeddings, top_k)
+    except Exception as e:
+        logger.error(f"Error in search_processes_vectors_async: {e}")
+        return [[] for _ in queries]
+
+def _search_fallback_index(query_embeddings, top_k):
+    """Search the local fallback index with local query embeddings; results are marked as fallback matches"""
+    return [
+        [{'process_id': process_name, 'similarity': similarity, 'fallback': True} for process_name, similarity in results]
+        for results in PROCESS_FALLBACK_INDEX.search_many(query_embeddings, top_k)
+    ]
+
+def _search_by_embeddings(queries, query_embeddings, top_k):
+    """Search the vector store or in-memory index with already embedded queries"""
+    if USE_VECTOR_STORE and vector_store and vector_store.is_initialized:
+        # Use vector store for search
+        # Identical concurrent searches share one Chroma query
+        results_per_query = search_flight.do(
+            (tuple(queries), top_k),
+            lambda: vector_store.query_many(queries, n_results=top_k, query_embeddings=query_embeddings)
+        )
+        
+        # Transform the results to match the expected format
+        all_transformed_results = []
+        for results in results_per_query:
             transformed_results = []
             for result in results:
                 # Convert distance to similarity (1.0 - distance)
@@ -292,29 +1319,72 @@ def search_processes_vector(query, top_k=3):
                 transformed_results.append({
                     'process_id': result.get('id'),
                     'similarity': similarity,
-                    'metadata': result  # Include the original metadata for potential use
+                    'metadata': dict(result)  # Lean metadata: title, category and content hash
                 })
-                
-            return transformed_results
-        else:
-            # Use in-memory embeddings
-            query_embedding = generate_embedding(query)
-            if not query_embedding:
-                return []
+            all_transformed_results.append(transformed_results)
             
-            results = []
-            for process_name, embedding in PROCESS_EMBEDDINGS.items():
-                from src.ai_engine import AIEngine
-                # Reuse the cosine similarity function from AIEngine
-                similarity = AIEngine._cosine_similarity(AIEngine, query_embedding, embedding)
-                results.append({
-                    'process_id': process_name,
-                    'similarity': similarity
-                })
-            
-            # Sort by similarity and get top_k
-            results.sort(key=lambda x: x['similarity'], reverse=True)
-            return results[:top_k]
-    except Exception as e:
-        logger.error(f"Error in search_processes_vector: {e}")
-        return []
+        return all_transformed_results
+    elif PROCESS_EMBEDDING_STORE is not None:
+        # Scan the shared quantized matrix, re-ranking the best candidates in float32
+        return [
+            [{'process_id': process_name, 'similarity': similarity} for process_name, similarity in results]
+            for results in PROCESS_EMBEDDING_STORE.search_many(query_embeddings, top_k)
+        ]
+    elif PROCESS_INDEX is None:
+        # The catalog has not been loaded
+        return [[] for _ in queries]
+    else:
+        # Use in-memory embeddings: one matrix product over the pre-normalized index
+        return [
+            [{'process_id': process_name, 'similarity': similarity} for process_name, similarity in results]
+            for results in PROCESS_INDEX.search_many(query_embeddings, top_k)
+        ]
+
+def get_embedding_metrics():
+    """
+    Get query embedding cache, request coalescing and worker pool statistics
+    
+    Returns:
+        Dictionary with the query cache stats, one entry per single-flight
+        group, the chat worker pool stats and, if the local fallback is
+        enabled, how many query batches used it
+    """
+    metrics = {
+        'query_cache': query_embedding_cache.stats(),
+        'chat_executor': chat_executor.stats(),
+        'single_flight': {
+            flight.name: flight.stats()
+            for flight in (embedding_flight, query_flight, async_query_flight, search_flight)
+        }
+    }
+    if isinstance(embedding_provider, FallbackEmbeddingProvider):
+        metrics['embedding_fallbacks'] = embedding_provider.fallbacks
+    return metrics
+
+def get_query_key_terms(query):
+    """
+    Get the terms of a query that occur in the process catalog
+    
+    Args:
+        query: Search query
+        
+    Returns:
+        Frozen set of stemmed query terms found in the keyword index
+    """
+    return PROCESS_LEXICAL_INDEX.key_terms(query)
+
+def search_processes_lexical(query, top_k=3):
+    """
+    Search for processes using the BM25 keyword index
+    
+    Args:
+        query: Search query
+        top_k: Number of results to return
+        
+    Returns:
+        List of process names and BM25 scores
+    """
+    return [
+        {'process_id': process_name, 'score': score}
+        for process_name, score in PROCESS_LEXICAL_INDEX.search(query, top_k)
+    ]
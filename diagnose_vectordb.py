@@ -90,6 +90,7 @@ def test_vector_store():
     logger.info("Testing vector store functionality...")
     
     try:
+        from config.config import embedding_provider
         from src.vector_store import VectorStore
         
         # Create test directory
@@ -97,7 +98,7 @@ def test_vector_store():
         os.makedirs(test_dir, exist_ok=True)
         
         # Initialize vector store
-        vector_store = VectorStore(persist_directory=test_dir)
+        vector_store = VectorStore(embedding_provider, persist_directory=test_dir)
         
         if not vector_store.is_initialized:
             logger.error("❌ Vector store initialization failed")
@@ -212,8 +213,9 @@ def test_search():
     logger.info("Testing process search...")
     
     try:
-        # Import config
-        from config.config import search_processes_vector
+        # Import config and load the catalog
+        from config.config import initialize_catalog, search_processes_vector
+        initialize_catalog()
         
         # Test queries
         test_queries = [
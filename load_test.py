@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Chat Load Test
+
+This script sends concurrent requests to a running Brandworkz AI Agent and
+reports throughput and latency at each concurrency level. When requests are
+handled off the event loop, throughput grows with concurrency until the
+worker pool or upstream API is saturated; if it stays flat, something is
+serializing requests.
+
+    python load_test.py --url http://localhost:8000 --concurrency 1 4 16 64 --unique
+"""
+
+import sys
+import time
+import asyncio
+import logging
+import argparse
+from typing import Any, Dict, List
+
+import httpx
+
+# Set up logging
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("load-test")
+
+QUESTIONS = [
+    "How do I upload an asset?",
+    "How can I download several assets at once?",
+    "How do I edit the tags of an asset?",
+    "How do I export metadata?",
+    "How do I create a new folder?",
+    "How do I share assets with my team?",
+    "Where do I change my account settings?",
+    "How do I copy assets into another folder?"
+]
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Value below which the given fraction of the sorted values fall"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def run_level(client: httpx.AsyncClient, path: str, concurrency: int, requests: int, unique: bool,
+                    offset: int) -> Dict[str, Any]:
+    """Send `requests` requests with at most `concurrency` in flight, returning throughput and latencies"""
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            question = QUESTIONS[i % len(QUESTIONS)]
+            if unique:
+                # Distinct questions defeat the query caches and request coalescing
+                question = f"{question} (request {offset + i})"
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json={"message": question})
+                if response.status_code != 200 or not response.json().get("success"):
+                    errors += 1
+            except Exception as e:
+                logger.warning(f"Request failed: {e}")
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "throughput": requests / elapsed,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000
+    }
+
+async def run(args) -> List[Dict[str, Any]]:
+    """Run every concurrency level against the server"""
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        # Warm up connections and caches that every level shares
+        await run_level(client, args.path, min(args.concurrency), min(args.concurrency), False, 0)
+        results = []
+        offset = 0
+        for concurrency in args.concurrency:
+            requests = max(args.requests, concurrency)
+            results.append(await run_level(client, args.path, concurrency, requests, args.unique, offset))
+            offset += requests
+        return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure chat throughput at increasing concurrency")
+    parser.add_argument("--url", default="http://localhost:8000", help="Base URL of the running app")
+    parser.add_argument("--path", default="/api/chat", help="Endpoint to post questions to")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64], help="Concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per level (at least the concurrency)")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request client timeout in seconds")
+    parser.add_argument("--unique", action="store_true", help="Make every question distinct")
+    parser.add_argument("--min-speedup", type=float, default=0.0,
+                        help="Fail unless throughput at the highest level is at least this many times the lowest")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    print(f"{'concurrency':>11} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for result in results:
+        print(f"{result['concurrency']:>11} {result['requests']:>9} {result['errors']:>7} "
+              f"{result['throughput']:>9.1f} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f}")
+
+    speedup = results[-1]["throughput"] / results[0]["throughput"] if results[0]["throughput"] else 0.0
+    print(f"Throughput at concurrency {results[-1]['concurrency']} is {speedup:.1f}x concurrency {results[0]['concurrency']}")
+    if args.min_speedup and speedup < args.min_speedup:
+        print(f"FAIL: expected at least {args.min_speedup:.1f}x")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
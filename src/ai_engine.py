@@ -1,63 +1,119 @@
-import os
 import logging
-from typing import List, Dict, Any, Optional, Union
-import base64
-try:
-    from openai import OpenAI
-except ImportError:
-    raise ImportError("The 'openai' package is not installed. Please run 'pip install openai==1.14.0' to install it.")
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 import json
 import re
-import numpy as np
-import chromadb
-from src.analytics import analytics
+import threading
+from src.analytics import get_process_analytics
+from src.hybrid_retriever import HybridRetriever
+from src.conversation_store import ConversationStore
+from src.process_renderer import RenderedResponse, encode_sse_event, render_process_answer
+from src.openai_client import OpenAIClientPool
 
 from config.config import (
     OPENAI_API_KEY, 
+    openai_pool,
     PROCESS_INSTRUCTIONS, 
-    PROCESS_EMBEDDINGS, 
-    get_formatted_process_guide, 
+    get_rendered_process_answer,
+    get_rendered_process_guide,
     get_process_keywords, 
-    generate_embedding,
-    search_processes_vector,
-    USE_VECTOR_STORE
+    embed_queries_with_fallback,
+    embed_queries_with_fallback_async,
+    get_catalog_version,
+    get_query_key_terms,
+    VECTOR_MATCH_THRESHOLD,
+    FALLBACK_VECTOR_MATCH_THRESHOLD,
+    KEYWORD_MATCH_THRESHOLD,
+    MATCH_CACHE_MAX_ENTRIES,
+    MATCH_CACHE_RADIUS,
+    SESSION_MAX_MESSAGES,
+    SESSION_MAX_BYTES,
+    SESSION_MAX_COUNT,
+    SESSION_TTL_SECONDS,
+    SESSION_STORE_MAX_BYTES
 )
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Asked for whenever a question matches no process
+NO_MATCH_RESPONSE = RenderedResponse("""I apologize, but I can only provide accurate information based on the documented processes in Brandworkz. 
+            
+Could you please rephrase your question? For example:
+- "How do I [specific task]?"
+- "What are the steps to [specific action]?"
+- "Can you show me how to [specific process]?"
+
+This helps me find the exact process documentation you need.""")
+
+# Last event of every streamed response
+SSE_DONE_EVENT = encode_sse_event("done", {})
+
 class AIEngine:
     """Engine for handling AI capabilities using OpenAI."""
     
     def __init__(self, api_key: str = OPENAI_API_KEY):
         """Initialize the AI engine with API key."""
-        self.client = OpenAI(api_key=api_key)
-        self.conversation_history = []
+        # Share the pooled connections of the configured clients unless another key is given
+        self.openai = openai_pool if api_key == OPENAI_API_KEY else OpenAIClientPool(api_key)
+        
+        # Conversation history of each client session, bounded in size and lifetime
+        self.conversations = ConversationStore(
+            max_messages=SESSION_MAX_MESSAGES,
+            max_session_bytes=SESSION_MAX_BYTES,
+            max_sessions=SESSION_MAX_COUNT,
+            ttl_seconds=SESSION_TTL_SECONDS,
+            max_total_bytes=SESSION_STORE_MAX_BYTES
+        )
         
         # Get process keywords mapping from config
         self.process_keywords = get_process_keywords()
         
-        # Initialize chromaDB client
-        self.chroma_client = chromadb.PersistentClient(path="./chroma_db")
-        
-    def add_message(self, role: str, content: str):
-        """Add a message to the conversation history."""
-        self.conversation_history.append({"role": role, "content": content})
-        
-    def reset_conversation(self):
-        """Reset the conversation history."""
-        self.conversation_history = []
-        
-    def _match_process(self, query: str) -> Optional[str]:
+        # Shared entry point for matching queries to processes
+        self.retriever = HybridRetriever()
+        
+        # Decisions for earlier questions, reused for near-paraphrases; created on first use
+        self._match_cache = None
+        self._match_cache_lock = threading.Lock()
+        
+    @property
+    def match_cache(self):
+        """Semantic match cache, or None if disabled; created on first use so numpy is not imported at startup."""
+        if MATCH_CACHE_MAX_ENTRIES <= 0:
+            return None
+        if self._match_cache is None:
+            with self._match_cache_lock:
+                if self._match_cache is None:
+                    from src.match_cache import SemanticMatchCache
+                    self._match_cache = SemanticMatchCache(
+                        max_entries=MATCH_CACHE_MAX_ENTRIES,
+                        radius=MATCH_CACHE_RADIUS,
+                        version_fn=get_catalog_version
+                    )
+        return self._match_cache
+        
+    def add_message(self, role: str, content: str, session_id: Optional[str] = None):
+        """Add a message to the conversation history of a session; without a session nothing is kept."""
+        if session_id:
+            self.conversations.add_message(session_id, role, content)
+        
+    def get_conversation_history(self, session_id: str) -> List[Dict[str, str]]:
+        """Get the conversation history of a session."""
+        return self.conversations.get_history(session_id)
+        
+    def reset_conversation(self, session_id: Optional[str] = None):
+        """Reset the conversation history of a session, or of every session if none is given."""
+        self.conversations.reset(session_id)
+        
+    def _match_queries(self, query: str) -> List[str]:
         """
-        Match a user query to a predefined process.
+        Build the query variants searched when matching a query to a process.
         
         Args:
             query: User query
             
         Returns:
-            Process name if matched, None otherwise
+            The original query and, if it differs, the query without filler words
         """
         query_lower = query.lower()
         
@@ -68,74 +124,143 @@ class AIEngine:
         ]
         clean_query = " ".join([word for word in query_lower.split() if word not in filler_words])
         
-        # Try vector similarity search first with adjusted thresholds
-        try:
-            # Use both original and cleaned query for better matching
-            vector_results_original = search_processes_vector(query, top_k=3)
-            vector_results_clean = search_processes_vector(clean_query, top_k=3)
+        # Both the original and cleaned query are searched on the vector side
+        # (the cleaned one is skipped when it is empty or the same as the original)
+        queries = [query]
+        if clean_query and clean_query != " ".join(query_lower.split()):
+            queries.append(clean_query)
+        return queries
+    
+    def _select_match(self, query: str, candidates: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Pick the matched process from fused retrieval candidates.
+        
+        Args:
+            query: User query
+            candidates: Candidates from the hybrid retriever
             
-            # Combine and deduplicate results
-            vector_results = []
-            seen_processes = set()
+        Returns:
+            The matched candidate, or None if no candidate is good enough
+        """
+        # Take the best fused candidate that either signal is confident about
+        for candidate in candidates:
+            best_match = candidate['process_id']
+            similarity = candidate['similarity']
+            lexical_score = candidate['lexical_score']
+            # Local fallback embeddings score lower than the configured provider's
+            vector_threshold = FALLBACK_VECTOR_MATCH_THRESHOLD if candidate.get('fallback') else VECTOR_MATCH_THRESHOLD
             
-            for results in [vector_results_original, vector_results_clean]:
-                if results and len(results) > 0:
-                    for result in results:
-                        process_id = result['process_id']
-                        if process_id not in seen_processes:
-                            seen_processes.add(process_id)
-                            vector_results.append(result)
+            if (similarity is not None and similarity > vector_threshold) or lexical_score > KEYWORD_MATCH_THRESHOLD:
+                logger.info(f"Hybrid match found: {best_match} with similarity {similarity} and keyword score {lexical_score}")
+                # Track successful match in analytics
+                get_process_analytics().track_process_request(query, best_match)
+                return candidate
             
-            if vector_results:
-                best_match = vector_results[0]['process_id']
-                similarity = vector_results[0]['similarity']
-                
-                # Lower threshold for better semantic matching
-                threshold = 0.65
-                
-                if similarity > threshold:
-                    logger.info(f"Vector similarity match found: {best_match} with similarity {similarity}")
-                    # Track successful match in analytics
-                    analytics.track_process_request(query, best_match)
-                    return best_match
-        except Exception as e:
-            logger.error(f"Error in vector similarity search: {e}")
-        
-        # Try keyword matching with both original and cleaned query
-        best_match = None
-        highest_score = 0
+        # Track unmatched query in analytics
+        get_process_analytics().track_process_request(query, None)
+        return None
+    
+    def _cached_match(self, query: str, query_embedding: Optional[List[float]]) -> Optional[Tuple[Optional[str], Optional[float]]]:
+        """
+        Look up the decision made for a near-paraphrase of the query.
         
-        for process_name, keywords in self.process_keywords.items():
-            score = 0
+        Args:
+            query: User query
+            query_embedding: Embedding of the query, or None if embedding failed
             
-            # Check both original and cleaned query
-            for test_query in [query_lower, clean_query]:
-                for keyword in keywords:
-                    keyword_lower = keyword.lower()
-                    if keyword_lower in test_query:
-                        # Higher score for exact matches
-                        if keyword_lower == test_query:
-                            score += 10
-                        # Higher score for multi-word matches
-                        else:
-                            score += len(keyword.split())
-                    # Also check if query terms appear in keyword
-                    elif any(term in keyword_lower for term in test_query.split()):
-                        score += 0.5  # Partial match score
+        Returns:
+            (process name or None for "no match", score) on a cache hit, None on a miss
+        """
+        if self.match_cache is None or query_embedding is None:
+            return None
+        
+        # Close embeddings of short questions can still ask about opposite things ("upload" vs "download")
+        cached = self.match_cache.get(query_embedding, key_terms=get_query_key_terms(query))
+        if cached is None:
+            return None
+        
+        process_id, score = cached
+        logger.info(f"Cached match reused: {process_id} (score {score})")
+        get_process_analytics().track_process_request(query, process_id)
+        return cached
+    
+    def _remember_match(self, query: str, query_embedding: Optional[List[float]], match: Optional[Dict[str, Any]],
+                        catalog_version: int):
+        """Store the decision made for a query so near-paraphrases can reuse it."""
+        if self.match_cache is None or query_embedding is None:
+            return
+        key_terms = get_query_key_terms(query)
+        if match is None:
+            self.match_cache.put(query_embedding, None, None, version=catalog_version, key_terms=key_terms)
+        else:
+            self.match_cache.put(query_embedding, match['process_id'], match['score'], version=catalog_version,
+                                 key_terms=key_terms)
+    
+    def _match_process(self, query: str) -> Optional[str]:
+        """
+        Match a user query to a predefined process.
+        
+        Near-paraphrases of earlier questions reuse the cached decision;
+        other queries go through hybrid retrieval.
+        
+        Args:
+            query: User query
             
-            if score > highest_score:
-                highest_score = score
-                best_match = process_name
-        
-        if highest_score > 2:  # Keep threshold for keyword matches
-            logger.info(f"Keyword match found: {best_match} with score {highest_score}")
-            # Track successful match in analytics
-            analytics.track_process_request(query, best_match)
-            return best_match
+        Returns:
+            Process name if matched, None otherwise
+        """
+        catalog_version = get_catalog_version()
+        # The query embedding is cached, so the vector search below reuses it
+        query_embedding = None
+        if self.match_cache is not None:
+            embeddings, fallback = embed_queries_with_fallback([query])
+            # Local fallback embeddings are in another space, so they never key the match cache
+            query_embedding = None if fallback else embeddings[0]
+        cached = self._cached_match(query, query_embedding)
+        if cached is not None:
+            return cached[0]
+        
+        # Run vector and keyword retrieval concurrently and fuse the rankings
+        try:
+            candidates = self.retriever.retrieve(self._match_queries(query), top_k=3)
+        except Exception as e:
+            logger.error(f"Error in hybrid retrieval: {e}")
+            candidates = None
+        
+        match = self._select_match(query, candidates or [])
+        if candidates is not None:
+            self._remember_match(query, query_embedding, match, catalog_version)
+        return match['process_id'] if match else None
+    
+    async def amatch_process(self, query: str) -> Optional[str]:
+        """
+        Match a user query to a predefined process without blocking the event loop.
+        
+        Args:
+            query: User query
             
-        # Track unmatched query in analytics
-        analytics.track_process_request(query, None)
-        return None
+        Returns:
+            Process name if matched, None otherwise
+        """
+        catalog_version = get_catalog_version()
+        query_embedding = None
+        if self.match_cache is not None:
+            embeddings, fallback = await embed_queries_with_fallback_async([query])
+            query_embedding = None if fallback else embeddings[0]
+        cached = self._cached_match(query, query_embedding)
+        if cached is not None:
+            return cached[0]
+        
+        try:
+            candidates = await self.retriever.aretrieve(self._match_queries(query), top_k=3)
+        except Exception as e:
+            logger.error(f"Error in hybrid retrieval: {e}")
+            candidates = None
+        
+        match = self._select_match(query, candidates or [])
+        if candidates is not None:
+            self._remember_match(query, query_embedding, match, catalog_version)
+        return match['process_id'] if match else None
     
     def _cosine_similarity(self, vec1, vec2):
         """Calculate cosine similarity between two vectors"""
@@ -144,66 +269,110 @@ class AIEngine:
         norm_b = sum(b * b for b in vec2) ** 0.5
         return dot_product / (norm_a * norm_b)
         
-    def generate_response(self, query: str, context: Optional[List[Dict[str, Any]]] = None) -> str:
+    def generate_response(self, query: str, context: Optional[List[Dict[str, Any]]] = None,
+                          session_id: Optional[str] = None) -> str:
         """
         Generate a response using the OpenAI API.
         
         Args:
             query: User query
             context: Optional context information (e.g., search results)
+            session_id: ID of the client session whose history records the exchange
             
         Returns:
             Generated response
         """
         try:
             # Add user query to conversation history
-            self.add_message("user", query)
+            self.add_message("user", query, session_id)
             
             # Check if query matches any process
             matched_process = self._match_process(query)
+            response = self._respond_to_match(matched_process)
+            self.add_message("assistant", response, session_id)
+            return response
             
-            # If we have a direct match to any process, use direct response method to ensure exact steps
-            if matched_process:
-                logger.info(f"Using direct response for {matched_process} process")
-                
-                try:
-                    # Get the processes directory
-                    processes_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'processes')
-                    process_data = None
-
-                    # Search for the process file in all subdirectories
-                    for root, dirs, files in os.walk(processes_dir):
-                        process_file_path = os.path.join(root, f"{matched_process}.json")
-                        if os.path.exists(process_file_path):
-                            try:
-                                with open(process_file_path, 'r') as f:
-                                    process_data = json.load(f)
-                                logger.info(f"Found process file at {process_file_path}")
-                                break
-                            except Exception as e:
-                                logger.error(f"Error reading process file {process_file_path}: {e}")
-                                continue
-                    
-                    # If we found and loaded the process file, use it
-                    if process_data:
-                        return self._format_direct_process_response(matched_process, process_data)
-                    
-                except Exception as e:
-                    logger.error(f"Error creating direct response for {matched_process}: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error generating response: {str(e)}")
+            return f"I encountered an error while generating a response: {str(e)}"
+    
+    async def agenerate_rendered_response(self, query: str, context: Optional[List[Dict[str, Any]]] = None,
+                                          session_id: Optional[str] = None) -> RenderedResponse:
+        """
+        Generate a response without blocking the event loop, with its API body pre-encoded.
+        
+        Args:
+            query: User query
+            context: Optional context information (e.g., search results)
+            session_id: ID of the client session whose history records the exchange
             
-            # If we get here, we either didn't match a process or couldn't load the process file
-            return """I apologize, but I can only provide accurate information based on the documented processes in Brandworkz. 
+        Returns:
+            The rendered response; process answers come from the rendered response cache
+        """
+        try:
+            # Add user query to conversation history
+            self.add_message("user", query, session_id)
             
-Could you please rephrase your question? For example:
-- "How do I [specific task]?"
-- "What are the steps to [specific action]?"
-- "Can you show me how to [specific process]?"
-
-This helps me find the exact process documentation you need."""
+            # Check if query matches any process
+            matched_process = await self.amatch_process(query)
+            rendered = self._rendered_match_response(matched_process)
+            self.add_message("assistant", rendered.text, session_id)
+            return rendered
             
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
-            return f"I encountered an error while generating a response: {str(e)}"
+            return RenderedResponse(f"I encountered an error while generating a response: {str(e)}")
+    
+    async def astream_response(self, query: str, session_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        Generate a response as server-sent events.
+        
+        Args:
+            query: User query
+            session_id: ID of the client session whose history records the exchange
+            
+        Yields:
+            An "answer" event with the same body /api/chat returns (for a matched
+            process, the pre-rendered answer), then a "done" event
+        """
+        rendered = await self.agenerate_rendered_response(query, session_id=session_id)
+        yield rendered.sse_event
+        yield SSE_DONE_EVENT
+    
+    def _respond_to_match(self, matched_process: Optional[str]) -> str:
+        """
+        Build the response for the outcome of process matching.
+        
+        Args:
+            matched_process: The matched process, or None if nothing matched
+            
+        Returns:
+            The process guide, or a request to rephrase the question
+        """
+        return self._rendered_match_response(matched_process).text
+    
+    def _rendered_match_response(self, matched_process: Optional[str]) -> RenderedResponse:
+        """
+        Get the rendered response for the outcome of process matching.
+        
+        Args:
+            matched_process: The matched process, or None if nothing matched
+            
+        Returns:
+            The pre-rendered process answer, or a request to rephrase the question
+        """
+        # If we have a direct match to any process, use direct response method to ensure exact steps
+        if matched_process:
+            logger.info(f"Using direct response for {matched_process} process")
+            
+            # Rendered when the catalog loaded, so answering does no formatting or filesystem I/O
+            rendered = get_rendered_process_answer(matched_process)
+            if rendered:
+                return rendered
+            logger.error(f"Matched process {matched_process} is not in the loaded catalog")
+        
+        # If we get here, we either didn't match a process or couldn't load the process file
+        return NO_MATCH_RESPONSE
     
     def _detect_uncertainty(self, query: str) -> bool:
         """
@@ -315,35 +484,7 @@ This helps me find the exact process documentation you need."""
         Returns:
             Formatted response string
         """
-        # Start with the title and description
-        response_parts = []
-        
-        if "title" in process_data:
-            response_parts.append(f"# {process_data['title']}\n")
-        
-        if "description" in process_data:
-            response_parts.append(f"{process_data['description']}\n")
-        
-        # Add steps section
-        if "steps" in process_data and process_data["steps"]:
-            response_parts.append("\n## Steps\n")
-            for i, step in enumerate(process_data["steps"], 1):
-                response_parts.append(f"{i}. {step}")
-        
-        # Add troubleshooting section if present
-        if "troubleshooting" in process_data and process_data["troubleshooting"]:
-            response_parts.append("\n## Troubleshooting\n")
-            for issue in process_data["troubleshooting"]:
-                response_parts.append(f"- {issue}")
-        
-        # Add tips section if present
-        if "tips" in process_data and process_data["tips"]:
-            response_parts.append("\n## Tips\n")
-            for tip in process_data["tips"]:
-                response_parts.append(f"- {tip}")
-        
-        # Join all parts with newlines
-        return "\n".join(response_parts)
+        return render_process_answer(process_data)
     
     def get_process_instructions(self, process_name: str) -> Optional[List[str]]:
         """
@@ -357,6 +498,37 @@ This helps me find the exact process documentation you need."""
         """
         return PROCESS_INSTRUCTIONS.get(process_name)
     
+    def _search_answer_messages(self, query: str, search_results: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Build the chat messages asking for an answer based on search results."""
+        # Format search results for context
+        context = []
+        
+        for result in search_results[:5]:  # Limit to first 5 results for context
+            result_info = {
+                "id": result.get("id", "Unknown"),
+                "title": result.get("title", "Unknown"),
+                "fileType": result.get("fileType", "Unknown"),
+                "description": result.get("description", ""),
+                "url": result.get("url", "")
+            }
+            context.append(result_info)
+        
+        prompt = f"""
+Based on the user's query: "{query}"
+And these search results from Brandworkz:
+{json.dumps(context, indent=2)}
+
+Please provide a helpful response that:
+1. Summarizes the most relevant results
+2. Explains how these results relate to the user's query
+3. Suggests next steps (e.g., viewing specific documents)
+            """
+        
+        return [
+            {"role": "system", "content": "You are an AI assistant for the Brandworkz platform. You help users search for documents and provide guidance on using the system."},
+            {"role": "user", "content": prompt}
+        ]
+    
     def search_answer(self, query: str, search_results: List[Dict[str, Any]]) -> str:
         """
         Generate an answer based on search results.
@@ -369,37 +541,10 @@ This helps me find the exact process documentation you need."""
             Generated answer
         """
         try:
-            # Format search results for context
-            context = []
-            
-            for result in search_results[:5]:  # Limit to first 5 results for context
-                result_info = {
-                    "id": result.get("id", "Unknown"),
-                    "title": result.get("title", "Unknown"),
-                    "fileType": result.get("fileType", "Unknown"),
-                    "description": result.get("description", ""),
-                    "url": result.get("url", "")
-                }
-                context.append(result_info)
-            
-            prompt = f"""
-Based on the user's query: "{query}"
-And these search results from Brandworkz:
-{json.dumps(context, indent=2)}
-
-Please provide a helpful response that:
-1. Summarizes the most relevant results
-2. Explains how these results relate to the user's query
-3. Suggests next steps (e.g., viewing specific documents)
-            """
-            
             # Call OpenAI API without updating conversation history
-            response = self.client.chat.completions.create(
+            response = self.openai.client.chat.completions.create(
                 model="gpt-4o-mini",  # using a widely available model
-                messages=[
-                    {"role": "system", "content": "You are an AI assistant for the Brandworkz platform. You help users search for documents and provide guidance on using the system."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=self._search_answer_messages(query, search_results),
                 max_tokens=2000,
                 temperature=0.7
             )
@@ -423,108 +568,20 @@ Please provide a helpful response that:
         Returns:
             Step-by-step instructions
         """
-        # Get formatted process guide using the new helper function
-        formatted_guide = get_formatted_process_guide(process_name)
-        
-        if not formatted_guide:
-            return f"I'm sorry, but I don't have specific information about the '{process_name}' process in my knowledge base. Would you like to try a different process? Or perhaps I can help you with general questions about Brandworkz instead."
-        
-        friendly_process_name = process_name.replace('_', ' ')
-        
-        # Format the guide with proper markdown for a numbered list
-        return f"""## How to {friendly_process_name.title()}
-
-I'd be happy to guide you through the process of {friendly_process_name}! Follow these steps:
-
-{formatted_guide}
-
-**Need more help?** If you have questions about any of these steps, please ask and I'll provide more detailed guidance. I'm here to help make your experience with Brandworkz as smooth as possible!"""
-
-    def _suggest_next_steps(self, query: str, matched_process: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.rendered_guide(process_name).text
+    
+    def rendered_guide(self, process_name: str) -> RenderedResponse:
         """
-        Suggest next steps for the user based on their query and matched process.
+        Get the guide for a specific process, with its API body pre-encoded.
         
         Args:
-            query: The user's query
-            matched_process: The process that was matched (if any)
+            process_name: Name of the process
             
         Returns:
-            List of suggested next steps
+            The guide rendered when the catalog loaded, or an apology if the
+            process is unknown
         """
-        suggestions = []
-        
-        # If we have a matched process, use process_relationships
-        if matched_process:
-            try:
-                from config.process_relationships import get_related_processes
-                return get_related_processes(matched_process)
-            except Exception as e:
-                logger.error(f"Error getting related processes: {e}")
-        
-        # If no matched process or error with relationships, use vector search to find related processes
-        try:
-            # Use a modified query that asks "what's next after X"
-            next_step_query = f"what to do after {query}"
-            vector_results = search_processes_vector(next_step_query, top_k=2)
-            
-            if vector_results:
-                for result in vector_results:
-                    process_id = result.get('process_id')
-                    if process_id and process_id != matched_process:
-                        # Get process title for better suggestion text
-                        process_title = process_id.replace('_', ' ').title()
-                        
-                        # Create a simple transition text based on the process
-                        if "upload" in process_id:
-                            transition = f"You might want to upload content to the platform."
-                        elif "search" in process_id:
-                            transition = f"You could search for content in the system."
-                        elif "metadata" in process_id:
-                            transition = f"You could manage metadata for better organization."
-                        elif "collection" in process_id:
-                            transition = f"Creating collections could help organize your content."
-                        elif "share" in process_id:
-                            transition = f"You might want to share content with others."
-                        elif "workflow" in process_id:
-                            transition = f"Setting up workflows could streamline your processes."
-                        else:
-                            transition = f"You might be interested in learning about {process_title}."
-                        
-                        suggestions.append({
-                            "process_id": process_id,
-                            "transition": transition,
-                            "reason": f"Related to your query about {query}"
-                        })
-        except Exception as e:
-            logger.error(f"Error in vector-based next step suggestions: {e}")
-        
-        # If we still don't have suggestions, add default ones
-        if not suggestions:
-            suggestions = [
-                {
-                    "process_id": "search_asset",
-                    "transition": "You might want to learn how to search for assets in the system.",
-                    "reason": "Searching is a fundamental operation in Brandworkz."
-                },
-                {
-                    "process_id": "upload_asset",
-                    "transition": "You could learn how to upload new content to the platform.",
-                    "reason": "Uploading is a fundamental operation in Brandworkz."
-                }
-            ]
-            
-            # If the matched process is one of our defaults, replace it
-            if matched_process == "search_asset":
-                suggestions[0] = {
-                    "process_id": "metadata_management",
-                    "transition": "You might want to learn how to manage metadata for your assets.",
-                    "reason": "Metadata helps with organization and searching."
-                }
-            elif matched_process == "upload_asset":
-                suggestions[1] = {
-                    "process_id": "share_assets",
-                    "transition": "You could learn how to share assets with your team.",
-                    "reason": "Sharing is a common operation after uploading."
-                }
-                
-        return suggestions[:2]  # Return up to 2 suggestions
+        rendered = get_rendered_process_guide(process_name)
+        if rendered:
+            return rendered
+        return RenderedResponse(f"I'm sorry, but I don't have specific information about the '{process_name}' process in my knowledge base. Would you like to try a different process? Or perhaps I can help you with general questions about Brandworkz instead.")
@@ -8,10 +8,13 @@ with the AI agent, particularly which processes users are searching for.
 import os
 import json
 import logging
+import threading
 from datetime import datetime
 from collections import Counter, defaultdict
 from typing import Dict, List, Any, Optional
 
+from config.config import ANALYTICS_FLUSH_INTERVAL
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -19,12 +22,14 @@ logger = logging.getLogger(__name__)
 class ProcessAnalytics:
     """Class for tracking and analyzing process usage metrics."""
     
-    def __init__(self, analytics_file: str = None):
+    def __init__(self, analytics_file: str = None, flush_interval: float = 0.0):
         """
         Initialize the analytics tracker.
         
         Args:
             analytics_file: Path to the JSON file for storing analytics data
+            flush_interval: Seconds to collect updates before writing the file;
+                0 writes it on every update
         """
         self.analytics_file = analytics_file or os.path.join(
             os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
@@ -37,6 +42,11 @@ class ProcessAnalytics:
         
         # Load existing analytics data or initialize new data
         self.analytics_data = self._load_analytics()
+        
+        # Requests are tracked from the event loop and worker threads at once
+        self._lock = threading.RLock()
+        self.flush_interval = flush_interval
+        self._flush_timer = None
     
     def _load_analytics(self) -> Dict[str, Any]:
         """
@@ -66,14 +76,47 @@ class ProcessAnalytics:
         Returns:
             True if successful, False otherwise
         """
+        with self._lock:
+            self._flush_timer = None
+            # Serialized under the lock so the file never mixes two updates
+            content = json.dumps(self.analytics_data, indent=2)
+        
         try:
-            with open(self.analytics_file, 'w') as f:
-                json.dump(self.analytics_data, f, indent=2)
+            temp_file = f"{self.analytics_file}.tmp"
+            with open(temp_file, 'w') as f:
+                f.write(content)
+            os.replace(temp_file, self.analytics_file)
             return True
         except Exception as e:
             logger.error(f"Error saving analytics data: {e}")
             return False
     
+    def _schedule_save(self) -> None:
+        """Write the file now, or once the flush interval has passed if no write is pending yet."""
+        if self.flush_interval <= 0:
+            self._save_analytics()
+            return
+        
+        with self._lock:
+            if self._flush_timer is not None:
+                return
+            self._flush_timer = threading.Timer(self.flush_interval, self._save_analytics)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def flush(self) -> bool:
+        """
+        Write pending updates to the JSON file now.
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        with self._lock:
+            timer = self._flush_timer
+        if timer is not None:
+            timer.cancel()
+        return self._save_analytics()
+    
     def track_process_request(self, query: str, matched_process: Optional[str] = None) -> None:
         """
         Track a process request from a user.
@@ -82,6 +125,14 @@ class ProcessAnalytics:
             query: The user's original query
             matched_process: The process that was matched, or None if no match
         """
+        with self._lock:
+            self._track_process_request(query, matched_process)
+        
+        # Save updated analytics
+        self._schedule_save()
+    
+    def _track_process_request(self, query: str, matched_process: Optional[str]) -> None:
+        """Record a process request; the caller holds the lock."""
         # Get today's date as string
         today = datetime.now().strftime("%Y-%m-%d")
         
@@ -132,9 +183,6 @@ class ProcessAnalytics:
             
             # Increment unmatched count
             self.analytics_data["daily_stats"][today]["unmatched_requests"] += 1
-        
-        # Save updated analytics
-        self._save_analytics()
     
     def get_popular_processes(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -148,11 +196,12 @@ class ProcessAnalytics:
         """
         processes = []
         
-        for process_name, data in self.analytics_data["process_requests"].items():
-            processes.append({
-                "process": process_name,
-                "count": data["count"]
-            })
+        with self._lock:
+            for process_name, data in self.analytics_data["process_requests"].items():
+                processes.append({
+                    "process": process_name,
+                    "count": data["count"]
+                })
         
         # Sort by count in descending order
         return sorted(processes, key=lambda x: x["count"], reverse=True)[:limit]
@@ -167,13 +216,15 @@ class ProcessAnalytics:
         Returns:
             Dictionary with daily statistics
         """
-        # Sort dates in descending order
-        sorted_dates = sorted(self.analytics_data["daily_stats"].keys(), reverse=True)
-        
-        # Get stats for the specified number of days
-        recent_stats = {}
-        for date in sorted_dates[:days]:
-            recent_stats[date] = self.analytics_data["daily_stats"][date]
+        with self._lock:
+            # Sort dates in descending order
+            sorted_dates = sorted(self.analytics_data["daily_stats"].keys(), reverse=True)
+            
+            # Get stats for the specified number of days
+            recent_stats = {}
+            for date in sorted_dates[:days]:
+                day_stats = self.analytics_data["daily_stats"][date]
+                recent_stats[date] = {**day_stats, "processes": dict(day_stats["processes"])}
         
         return recent_stats
     
@@ -187,7 +238,8 @@ class ProcessAnalytics:
         Returns:
             List of unmatched queries with timestamps
         """
-        return self.analytics_data["unmatched_queries"][-limit:]
+        with self._lock:
+            return self.analytics_data["unmatched_queries"][-limit:]
     
     def generate_report(self) -> Dict[str, Any]:
         """
@@ -196,6 +248,11 @@ class ProcessAnalytics:
         Returns:
             Dictionary with report data
         """
+        with self._lock:
+            return self._generate_report()
+    
+    def _generate_report(self) -> Dict[str, Any]:
+        """Build the report; the caller holds the lock."""
         # Get total request count
         total_requests = sum(
             day_stats["total_requests"] 
@@ -226,5 +283,21 @@ class ProcessAnalytics:
             "recent_unmatched": self.get_unmatched_queries()
         }
 
-# Singleton instance for use throughout the application
-analytics = ProcessAnalytics()
+# Singleton instance for use throughout the application, created on first use
+# so importing this module does not read the analytics file
+_analytics = None
+_analytics_lock = threading.Lock()
+
+def get_process_analytics() -> ProcessAnalytics:
+    """
+    Get the shared analytics tracker.
+    
+    Returns:
+        The ProcessAnalytics instance, loading the analytics file on the first call
+    """
+    global _analytics
+    if _analytics is None:
+        with _analytics_lock:
+            if _analytics is None:
+                _analytics = ProcessAnalytics(flush_interval=ANALYTICS_FLUSH_INTERVAL)
+    return _analytics
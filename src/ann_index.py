@@ -0,0 +1,332 @@
+"""
+Approximate Nearest-Neighbour Index for Brandworkz AI Agent
+
+This module provides an inverted-file (IVF) index in pure NumPy for large
+process catalogs. Vectors are grouped around k-means centroids and a search
+only scores the vectors in the `nprobe` lists closest to the query, instead
+of scanning every process. Small catalogs are searched exactly.
+"""
+
+import os
+import math
+import logging
+from typing import List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from src.similarity_index import SimilarityIndex
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class IVFIndex(SimilarityIndex):
+    """Cosine similarity index that switches to IVF search once it is large enough."""
+
+    # Rows assigned to centroids per block, bounding temporary memory
+    BLOCK_ROWS = 8192
+
+    def __init__(self, nlist: int = 0, nprobe: int = 8, min_train_size: int = 1024,
+                 retrain_growth: float = 4.0, kmeans_iterations: int = 10, seed: int = 0):
+        """
+        Initialize an empty index.
+
+        Args:
+            nlist: Number of inverted lists; 0 picks about sqrt(n) at training time
+            nprobe: Number of lists searched per query; higher values trade
+                latency for recall
+            min_train_size: Vectors needed before the index is trained; smaller
+                indexes are searched exactly
+            retrain_growth: Retrain once the index has grown by this factor
+                since it was last trained
+            kmeans_iterations: Number of k-means iterations when training
+            seed: Seed for centroid initialization
+        """
+        self.nlist = nlist
+        self.nprobe = max(1, nprobe)
+        self.min_train_size = max(1, min_train_size)
+        self.retrain_growth = max(1.0, retrain_growth)
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        super().__init__()
+        # A new, empty index has nothing worth saving
+        self.dirty = False
+
+    def clear(self) -> None:
+        """Remove every vector and the trained centroids from the index."""
+        with self._lock:
+            super().clear()
+            self._centroids: Optional[np.ndarray] = None
+            self._lists: List[Set[int]] = []
+            self._row_lists: List[int] = []
+            self._trained_size = 0
+            self.dirty = True
+
+    @property
+    def is_trained(self) -> bool:
+        """Whether searches go through the inverted lists rather than a full scan."""
+        return self._centroids is not None
+
+    @property
+    def list_count(self) -> int:
+        """Number of inverted lists, 0 while the index is untrained."""
+        return len(self._lists)
+
+    @property
+    def ids(self) -> List[str]:
+        """IDs of the indexed vectors."""
+        with self._lock:
+            return list(self._ids)
+
+    def _nearest_lists(self, vectors: np.ndarray) -> np.ndarray:
+        """Assign unit vectors to their most similar centroid, in blocks."""
+        assignments = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], self.BLOCK_ROWS):
+            block = vectors[start:start + self.BLOCK_ROWS]
+            assignments[start:start + len(block)] = np.argmax(block @ self._centroids.T, axis=1)
+        return assignments
+
+    def train(self) -> None:
+        """Cluster the indexed vectors with spherical k-means and rebuild the inverted lists."""
+        with self._lock:
+            count = len(self._ids)
+            if count == 0:
+                return
+
+            nlist = self.nlist or int(round(math.sqrt(count)))
+            nlist = max(1, min(nlist, count))
+            vectors = self._matrix[:count]
+
+            # k-means on a sample keeps training time bounded for large catalogs
+            rng = np.random.default_rng(self.seed)
+            sample_size = min(count, max(nlist * 64, 4096))
+            sample = vectors[rng.choice(count, sample_size, replace=False)] if sample_size < count else vectors
+            centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+
+            for _ in range(self.kmeans_iterations):
+                self._centroids = centroids
+                assignments = self._nearest_lists(sample)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assignments, sample)
+                norms = np.linalg.norm(sums, axis=1)
+                empty = norms == 0
+                if empty.any():
+                    # Re-seed empty lists with random sample vectors
+                    sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+                    norms[empty] = 1.0
+                centroids = (sums / norms[:, None]).astype(np.float32)
+
+            self._centroids = centroids
+            self._row_lists = self._nearest_lists(vectors).tolist()
+            self._lists = [set() for _ in range(nlist)]
+            for row, list_id in enumerate(self._row_lists):
+                self._lists[list_id].add(row)
+            self._trained_size = count
+            self.dirty = True
+            logger.info(f"Trained IVF index with {nlist} lists over {count} vectors")
+
+    def _maybe_train(self) -> None:
+        """Train when the index first becomes large enough, and retrain as it keeps growing."""
+        count = len(self._ids)
+        if count < self.min_train_size:
+            return
+        if self._centroids is None or count >= self._trained_size * self.retrain_growth:
+            self.train()
+
+    def upsert(self, item_id: str, embedding: Sequence[float]) -> bool:
+        """
+        Add a vector or replace the vector stored for an existing id.
+
+        Args:
+            item_id: ID of the item
+            embedding: Embedding vector
+
+        Returns:
+            True if the vector was stored, False if it was rejected
+        """
+        with self._lock:
+            row = self._rows.get(item_id)
+            if row is not None:
+                vector = self._normalize(embedding)
+                if vector is not None and vector.shape[0] == self._matrix.shape[1] and np.array_equal(self._matrix[row], vector):
+                    # Unchanged vector, e.g. re-added on startup
+                    return True
+                if self._centroids is not None:
+                    self._lists[self._row_lists[row]].discard(row)
+
+            if not super().upsert(item_id, embedding):
+                if row is not None and self._centroids is not None:
+                    self._lists[self._row_lists[row]].add(row)
+                return False
+
+            self.dirty = True
+            if self._centroids is not None:
+                new_row = self._rows[item_id]
+                list_id = int(self._nearest_lists(self._matrix[new_row:new_row + 1])[0])
+                if row is None:
+                    self._row_lists.append(list_id)
+                else:
+                    self._row_lists[new_row] = list_id
+                self._lists[list_id].add(new_row)
+
+            self._maybe_train()
+            return True
+
+    def remove(self, item_id: str) -> bool:
+        """
+        Remove a vector by moving the last row into its slot.
+
+        Args:
+            item_id: ID of the item to remove
+
+        Returns:
+            True if the item was in the index, False otherwise
+        """
+        with self._lock:
+            row = self._rows.get(item_id)
+            if row is None:
+                return False
+
+            if self._centroids is not None:
+                last = len(self._ids) - 1
+                self._lists[self._row_lists[row]].discard(row)
+                if row != last:
+                    moved_list = self._row_lists[last]
+                    self._lists[moved_list].discard(last)
+                    self._lists[moved_list].add(row)
+                    self._row_lists[row] = moved_list
+                self._row_lists.pop()
+
+            super().remove(item_id)
+            self.dirty = True
+            if not self._ids:
+                self.clear()
+            return True
+
+    def search_many(self, query_embeddings: Sequence[Optional[Sequence[float]]], top_k: int = 3) -> List[List[Tuple[str, float]]]:
+        """
+        Find the most similar vectors to several queries.
+
+        Untrained indexes are searched exactly; trained ones only score the
+        vectors in the `nprobe` lists whose centroids are closest to each query.
+
+        Args:
+            query_embeddings: Query embedding vectors; None entries get no results
+            top_k: Number of results to return per query
+
+        Returns:
+            One list of (id, cosine similarity) tuples per query, most similar first
+        """
+        with self._lock:
+            if self._centroids is None:
+                return super().search_many(query_embeddings, top_k)
+
+            results: List[List[Tuple[str, float]]] = [[] for _ in query_embeddings]
+            if top_k <= 0:
+                return results
+
+            dimension = self._matrix.shape[1]
+            nprobe = min(self.nprobe, len(self._lists))
+            for position, embedding in enumerate(query_embeddings):
+                query = None if embedding is None else self._normalize(embedding)
+                if query is None:
+                    continue
+                if query.shape[0] != dimension:
+                    logger.error(f"Query has dimension {query.shape[0]}, index expects {dimension}")
+                    continue
+
+                centroid_scores = self._centroids @ query
+                if nprobe < len(centroid_scores):
+                    probed = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+                else:
+                    probed = np.arange(len(centroid_scores))
+
+                rows = np.fromiter(
+                    (row for list_id in probed for row in self._lists[list_id]),
+                    dtype=np.int64
+                )
+                if rows.size == 0:
+                    continue
+
+                scores = self._matrix[rows] @ query
+                if top_k < rows.size:
+                    best = np.argpartition(-scores, top_k - 1)[:top_k]
+                else:
+                    best = np.arange(rows.size)
+                best = best[np.argsort(-scores[best])]
+                results[position] = [(self._ids[rows[i]], float(scores[i])) for i in best]
+            return results
+
+    def save(self, path: str) -> bool:
+        """
+        Persist the index atomically.
+
+        Args:
+            path: Path of the .npz file to write
+
+        Returns:
+            True if the index was written, False otherwise
+        """
+        with self._lock:
+            count = len(self._ids)
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                temp_path = f"{path}.tmp"
+                with open(temp_path, 'wb') as f:
+                    np.savez(
+                        f,
+                        vectors=self._matrix[:count] if count else np.zeros((0, 0), dtype=np.float32),
+                        ids=np.array(self._ids, dtype=str),
+                        centroids=self._centroids if self._centroids is not None else np.zeros((0, 0), dtype=np.float32),
+                        row_lists=np.array(self._row_lists, dtype=np.int32),
+                        trained_size=np.array(self._trained_size)
+                    )
+                os.replace(temp_path, path)
+                self.dirty = False
+                return True
+            except Exception as e:
+                logger.error(f"Error saving ANN index to {path}: {e}")
+                return False
+
+    def load(self, path: str) -> bool:
+        """
+        Load an index written by `save`, replacing the current contents.
+
+        Args:
+            path: Path of the .npz file
+
+        Returns:
+            True if the index was loaded, False if it does not exist or is unreadable
+        """
+        if not os.path.exists(path):
+            return False
+
+        try:
+            with np.load(path) as data:
+                vectors = data["vectors"].astype(np.float32)
+                ids = data["ids"].tolist()
+                centroids = data["centroids"].astype(np.float32)
+                row_lists = data["row_lists"].tolist()
+                trained_size = int(data["trained_size"])
+        except Exception as e:
+            logger.error(f"Error loading ANN index from {path}: {e}")
+            return False
+
+        with self._lock:
+            self.clear()
+            if ids:
+                capacity = max(self._initial_capacity, len(ids))
+                self._matrix = np.zeros((capacity, vectors.shape[1]), dtype=np.float32)
+                self._matrix[:len(ids)] = vectors
+                self._ids = ids
+                self._rows = {item_id: row for row, item_id in enumerate(ids)}
+                if centroids.size:
+                    self._centroids = centroids
+                    self._row_lists = row_lists
+                    self._lists = [set() for _ in range(len(centroids))]
+                    for row, list_id in enumerate(row_lists):
+                        self._lists[list_id].add(row)
+                    self._trained_size = trained_size
+            self.dirty = False
+            logger.info(f"Loaded ANN index with {len(ids)} vectors ({len(self._lists)} lists) from {path}")
+            return True
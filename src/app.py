@@ -1,29 +1,59 @@
 import os
+import asyncio
 import logging
 import json
-from typing import Dict, List, Optional, Any
+import threading
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Any
 from fastapi import FastAPI, Request, Form, UploadFile, File, HTTPException, Depends
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import glob
 import shutil
 
-from src.brandworkz import BrandworkzClient
 from src.ai_engine import AIEngine
-from src.analytics import analytics
-from src.process_recommender import recommender
-from config.config import APP_HOST, APP_PORT, DEBUG
+from src.process_renderer import RenderedResponse, encode_sse_event
+from src.analytics import get_process_analytics
+from src.process_recommender import get_recommender
+from config.config import (
+    APP_HOST, APP_PORT, DEBUG, CATALOG_BACKGROUND_INIT, CHAT_REQUEST_TIMEOUT,
+    PROCESS_RESPONSES, chat_executor, openai_pool, flush_embedding_cache, get_embedding_metrics, get_process_document,
+    get_rendered_process_guide, initialize_catalog, is_catalog_ready
+)
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def prepare_catalog():
+    """Load the process catalog and build the recommender's neighbour table."""
+    initialize_catalog()
+    get_recommender()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the catalog on startup; on shutdown write pending analytics and cache access times, and release the worker pool and OpenAI connections."""
+    if CATALOG_BACKGROUND_INIT:
+        # Requests are answered with 503 until the catalog is ready
+        threading.Thread(target=prepare_catalog, name="catalog-init", daemon=True).start()
+    else:
+        await asyncio.to_thread(prepare_catalog)
+    yield
+    get_process_analytics().flush()
+    chat_executor.shutdown()
+    flush_embedding_cache()
+    await openai_pool.aclose()
+
 # Create FastAPI app
-app = FastAPI(title="Brandworkz AI Agent", description="An AI assistant for the Brandworkz platform")
+app = FastAPI(
+    title="Brandworkz AI Agent",
+    description="An AI assistant for the Brandworkz platform",
+    lifespan=lifespan
+)
 
 # Add CORS middleware
 app.add_middleware(
@@ -32,6 +62,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Session-ID"],
 )
 
 # Create directory for templates and static files
@@ -47,12 +78,87 @@ app.mount("/static", StaticFiles(directory="src/static"), name="static")
 app.mount("/assets", StaticFiles(directory="src/static/react/assets"), name="assets")
 
 # Initialize clients
-brandworkz_client = BrandworkzClient()
 ai_engine = AIEngine()
 
+# Only the document endpoints talk to Brandworkz, so its client is created on first use
+_brandworkz_client = None
+
+def get_brandworkz_client():
+    """Get the shared Brandworkz client, importing and creating it on first use."""
+    global _brandworkz_client
+    if _brandworkz_client is None:
+        from src.brandworkz import BrandworkzClient
+        _brandworkz_client = BrandworkzClient()
+    return _brandworkz_client
+
+def catalog_loading_response() -> Optional[JSONResponse]:
+    """Get a 503 response while the process catalog is still loading, or None once it is ready."""
+    if is_catalog_ready():
+        return None
+    return JSONResponse(status_code=503, content={
+        "response": "The process catalog is still loading, please try again in a moment.",
+        "success": False
+    })
+
+def rendered_json_response(rendered: RenderedResponse, request: Request) -> Response:
+    """Serve a pre-encoded response body, gzip-compressed if the client accepts it."""
+    headers = {"Vary": "Accept-Encoding"}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        gzip_body = rendered.gzip_body
+        if gzip_body is not None:
+            headers["Content-Encoding"] = "gzip"
+            return Response(content=gzip_body, media_type="application/json", headers=headers)
+    return Response(content=rendered.body, media_type="application/json", headers=headers)
+
+def request_timeout_response() -> JSONResponse:
+    """Get the 504 response for a request that did not finish within CHAT_REQUEST_TIMEOUT."""
+    logger.error(f"Request did not finish within {CHAT_REQUEST_TIMEOUT}s")
+    return JSONResponse(status_code=504, content={
+        "response": "Sorry, answering took too long. Please try again.",
+        "success": False
+    })
+
+async def stream_events(events: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Forward server-sent events, ending with an "error" event if the stream fails or runs past CHAT_REQUEST_TIMEOUT."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + CHAT_REQUEST_TIMEOUT
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(events.__anext__(), max(0.0, deadline - loop.time()))
+            except StopAsyncIteration:
+                return
+            yield event
+    except asyncio.TimeoutError:
+        logger.error(f"Stream did not finish within {CHAT_REQUEST_TIMEOUT}s")
+        yield encode_sse_event("error", {
+            "response": "Sorry, answering took too long. Please try again.",
+            "success": False
+        })
+    except Exception as e:
+        logger.error(f"Error in event stream: {str(e)}")
+        yield encode_sse_event("error", {
+            "response": f"Sorry, I encountered an error: {str(e)}",
+            "success": False
+        })
+    finally:
+        await events.aclose()
+
+def event_stream_response(events: AsyncIterator[bytes], headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    """Serve server-sent events; headers go out before the first event so clients see a response at once."""
+    return StreamingResponse(stream_events(events), media_type="text/event-stream", headers={
+        # Keep proxies from caching or buffering the stream
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+        **(headers or {})
+    })
+
 # Models for API
 class ChatRequest(BaseModel):
     message: str
+    # Conversation history is kept per session; a new one is started (and returned
+    # in the X-Session-ID header) when the client does not send one
+    session_id: Optional[str] = Field(None, min_length=1, max_length=128)
 
 # class SearchRequest(BaseModel):
 #     query: str
@@ -92,28 +198,51 @@ class ProcessUpdateRequest(BaseModel):
         orm_mode = True
 
 @app.post("/api/chat")
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
     """Handle chat messages."""
+    loading = catalog_loading_response()
+    if loading:
+        return loading
+    
+    session_id = request.session_id or uuid.uuid4().hex
     try:
-        # Generate response
-        response = ai_engine.generate_response(request.message)
-        
-        return JSONResponse({
-            "response": response,
-            "success": True
-        })
+        # Generate response; embedding requests go through the pooled async client
+        # and blocking lookups through the chat worker pool
+        rendered = await asyncio.wait_for(
+            ai_engine.agenerate_rendered_response(request.message, session_id=session_id),
+            CHAT_REQUEST_TIMEOUT
+        )
+        response = rendered_json_response(rendered, http_request)
+    except asyncio.TimeoutError:
+        response = request_timeout_response()
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}")
-        return JSONResponse({
+        response = JSONResponse({
             "response": f"Sorry, I encountered an error: {str(e)}",
             "success": False
         })
+    response.headers["X-Session-ID"] = session_id
+    return response
+
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Handle chat messages, answering with server-sent events."""
+    loading = catalog_loading_response()
+    if loading:
+        return loading
+    
+    session_id = request.session_id or uuid.uuid4().hex
+    return event_stream_response(
+        ai_engine.astream_response(request.message, session_id=session_id),
+        headers={"X-Session-ID": session_id}
+    )
 
 # @app.post("/api/search")
 # async def search(request: SearchRequest):
 #     """Search for documents."""
 #     try:
 #         # Ensure authenticated
+#         brandworkz_client = get_brandworkz_client()
 #         if not brandworkz_client.ensure_authenticated():
 #             return JSONResponse({
 #                 "response": "Failed to authenticate with Brandworkz.",
@@ -145,23 +274,31 @@ async def chat(request: ChatRequest):
 #         })
 
 @app.post("/api/process")
-async def process(request: ProcessRequest):
+async def process(request: ProcessRequest, http_request: Request):
     """Get process instructions."""
+    loading = catalog_loading_response()
+    if loading:
+        return loading
+    
     try:
-        # Generate process instructions
-        instructions = ai_engine.guide_process(request.process_name)
+        # Guides are rendered when the catalog loads
+        rendered = get_rendered_process_guide(request.process_name)
         
         # Check if there's a direct match for the requested process
-        if not instructions or "I'm sorry, but I don't have specific information" in instructions:
+        if rendered is None:
             # Try to find a match using our keyword matching
-            matched_process = ai_engine._match_process(request.process_name)
+            matched_process = await asyncio.wait_for(
+                ai_engine.amatch_process(request.process_name),
+                CHAT_REQUEST_TIMEOUT
+            )
             if matched_process:
-                instructions = ai_engine.guide_process(matched_process)
+                rendered = get_rendered_process_guide(matched_process)
         
-        return JSONResponse({
-            "response": instructions,
-            "success": True
-        })
+        if rendered is None:
+            rendered = ai_engine.rendered_guide(request.process_name)
+        return rendered_json_response(rendered, http_request)
+    except asyncio.TimeoutError:
+        return request_timeout_response()
     except Exception as e:
         logger.error(f"Error in process endpoint: {str(e)}")
         return JSONResponse({
@@ -174,6 +311,7 @@ async def process(request: ProcessRequest):
 #     """Download a document."""
 #     try:
 #         # Ensure authenticated
+#         brandworkz_client = get_brandworkz_client()
 #         if not brandworkz_client.ensure_authenticated():
 #             return JSONResponse({
 #                 "response": "Failed to authenticate with Brandworkz.",
@@ -206,8 +344,10 @@ async def process(request: ProcessRequest):
 #         })
 
 # Process Admin API Routes
+# These read and write files and reload the catalog, so they are plain functions
+# that FastAPI runs in its threadpool instead of on the event loop
 @app.get("/api/admin/processes", response_class=JSONResponse)
-async def get_all_processes():
+def get_all_processes():
     """Get all available processes organized by category"""
     processes_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "processes")
     result = {}
@@ -243,7 +383,7 @@ async def get_all_processes():
     return result
 
 @app.post("/api/admin/processes", response_class=JSONResponse)
-async def create_process(request: ProcessCreateRequest):
+def create_process(request: ProcessCreateRequest):
     """Create a new process file"""
     logger.info(f"Creating process: {request.filename} in category {request.category}")
     
@@ -267,6 +407,15 @@ async def create_process(request: ProcessCreateRequest):
             content={"error": f"Process '{request.filename}' already exists in category '{request.category}'"}
         )
     
+    # Process names are unique across categories: chat answers look processes up by name alone
+    existing = get_process_document(request.filename)
+    if existing:
+        logger.error(f"Process name already used by {existing['path']}")
+        return JSONResponse(
+            status_code=400,
+            content={"error": f"Process '{request.filename}' already exists in category '{existing['category']}'"}
+        )
+    
     # Save the process file
     try:
         # Convert to dictionary
@@ -292,7 +441,7 @@ async def create_process(request: ProcessCreateRequest):
         )
 
 @app.put("/api/admin/processes/{category}/{filename}", response_class=JSONResponse)
-async def update_process(category: str, filename: str, process_data: ProcessData):
+def update_process(category: str, filename: str, process_data: ProcessData):
     """Update an existing process file"""
     logger.info(f"Updating process: {filename} in category {category}")
     
@@ -332,7 +481,7 @@ async def update_process(category: str, filename: str, process_data: ProcessData
         )
 
 @app.delete("/api/admin/processes/{category}/{filename}", response_class=JSONResponse)
-async def delete_process(category: str, filename: str):
+def delete_process(category: str, filename: str):
     """Delete a process file"""
     processes_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "processes")
     file_path = os.path.join(processes_dir, category, f"{filename}.json")
@@ -347,6 +496,12 @@ async def delete_process(category: str, filename: str):
     # Delete the process file
     try:
         os.remove(file_path)
+        
+        # Reload processes to drop the deleted process from the vector store
+        from config.config import load_processes_from_files
+        load_processes_from_files()
+        logger.info("Reloaded processes and updated vector store")
+        
         return {"message": f"Process '{filename}' deleted successfully"}
     except Exception as e:
         logger.error(f"Error deleting process file {file_path}: {str(e)}")
@@ -356,7 +511,7 @@ async def delete_process(category: str, filename: str):
         )
 
 @app.get("/api/admin/categories", response_class=JSONResponse)
-async def get_categories():
+def get_categories():
     """Get all available process categories"""
     processes_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "processes")
     categories = []
@@ -372,10 +527,10 @@ async def get_categories():
     return categories
 
 @app.get("/api/analytics", response_class=JSONResponse)
-async def get_analytics():
+def get_analytics():
     """Get process analytics data."""
     try:
-        report = analytics.generate_report()
+        report = get_process_analytics().generate_report()
         return JSONResponse({
             "success": True,
             "data": report
@@ -387,11 +542,31 @@ async def get_analytics():
             "error": f"Failed to generate analytics report: {str(e)}"
         })
 
+@app.get("/api/metrics/embeddings", response_class=JSONResponse)
+async def get_embedding_metrics_endpoint():
+    """Get query embedding cache, match cache, rendered response cache and request coalescing metrics."""
+    metrics = get_embedding_metrics()
+    if ai_engine.match_cache is not None:
+        metrics["match_cache"] = ai_engine.match_cache.stats()
+    metrics["rendered_responses"] = PROCESS_RESPONSES.stats()
+    return JSONResponse({
+        "success": True,
+        "data": metrics
+    })
+
+@app.get("/api/metrics/sessions", response_class=JSONResponse)
+async def get_session_metrics_endpoint():
+    """Get conversation store metrics: sessions, messages, memory held and evictions."""
+    return JSONResponse({
+        "success": True,
+        "data": ai_engine.conversations.stats()
+    })
+
 @app.get("/api/process/{process_id}/recommendations", response_class=JSONResponse)
 async def get_process_recommendations(process_id: str, limit: int = 3):
     """Get recommended related processes."""
     try:
-        recommendations = recommender.get_related_processes(process_id, limit=limit)
+        recommendations = await get_recommender().aget_related_processes(process_id, limit=limit)
         return JSONResponse({
             "success": True,
             "process_id": process_id,
@@ -404,6 +579,15 @@ async def get_process_recommendations(process_id: str, limit: int = 3):
             "error": f"Failed to get recommendations: {str(e)}"
         })
 
+@app.get("/api/health", response_class=JSONResponse)
+async def health():
+    """Report whether the process catalog is loaded and requests can be served."""
+    ready = is_catalog_ready()
+    return JSONResponse(status_code=200 if ready else 503, content={
+        "status": "ready" if ready else "loading",
+        "ready": ready
+    })
+
 # Only after all API routes, define the index and catch-all routes
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
@@ -419,6 +603,7 @@ async def serve_react_routes(rest_of_path: str):
 
 def run_app():
     """Run the FastAPI application."""
+    import uvicorn
     uvicorn.run("src.app:app", host=APP_HOST, port=APP_PORT, reload=DEBUG)
 
 if __name__ == "__main__":
@@ -0,0 +1,116 @@
+"""
+Bounded Blocking-Call Executor for Brandworkz AI Agent
+
+This module runs the blocking parts of the async request pipeline (vector
+store queries, embedding cache lookups) on a bounded pool of
+worker threads, so they never stall the event loop and a burst of requests
+queues for a worker instead of spawning unbounded threads. Calls can be given
+a timeout after which the waiting request gives up.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class BlockingExecutor:
+    """Bounded thread pool that runs blocking calls for coroutines."""
+
+    def __init__(self, max_workers: int = 16, name: str = "blocking"):
+        """
+        Initialize the executor.
+
+        Args:
+            max_workers: Maximum number of worker threads
+            name: Name reported in the statistics and used as the thread name prefix
+        """
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.active = 0
+
+    def _call(self, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+        """Run one call on a worker thread, keeping the counters."""
+        with self._lock:
+            self.active += 1
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            with self._lock:
+                self.active -= 1
+                self.failed += 1
+            raise
+        with self._lock:
+            self.active -= 1
+            self.completed += 1
+        return result
+
+    async def run(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        """
+        Run a blocking function on the pool without blocking the event loop.
+
+        Args:
+            fn: Function to call
+            *args: Positional arguments for `fn`
+            timeout: Seconds to wait for the result; None waits indefinitely
+            **kwargs: Keyword arguments for `fn`
+
+        Returns:
+            The result of `fn`
+
+        Raises:
+            asyncio.TimeoutError: If the call did not finish within `timeout`;
+                the worker still finishes it, but nobody waits for the result
+        """
+        with self._lock:
+            self.submitted += 1
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self._call, fn, args, kwargs)
+        if timeout is None:
+            return await future
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            logger.warning(f"{self.name}: {getattr(fn, '__name__', fn)} did not finish within {timeout}s")
+            raise
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Stop accepting calls.
+
+        Args:
+            wait: Wait for running calls to finish
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get executor statistics.
+
+        Returns:
+            Dictionary with the pool size, calls submitted, completed and
+            failed, waits that timed out, calls running and calls queued for
+            a worker
+        """
+        with self._lock:
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timeouts": self.timeouts,
+                "active": self.active,
+                "queued": max(0, self.submitted - self.completed - self.failed - self.active)
+            }
@@ -1,12 +1,6 @@
 import requests
 import logging
-from bs4 import BeautifulSoup
-import json
-import os
-from typing import Dict, List, Optional, Any, Union
-import base64
-from io import BytesIO
-from PIL import Image
+from typing import Dict, List, Optional, Any
 
 from config.config import BRANDWORKZ_URL, BRANDWORKZ_USERNAME, BRANDWORKZ_PASSWORD
 
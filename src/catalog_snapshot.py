@@ -0,0 +1,131 @@
+"""
+Catalog Snapshot for Brandworkz AI Agent
+
+This module provides a warm-start snapshot of the loaded process catalog:
+the parsed process files, the keyword index terms and the in-memory
+embedding matrix, stored together in one `.npz` file. A cheap fingerprint of
+the processes directory (file paths, sizes and modification times) tells
+whether the snapshot still describes the files on disk, so startup can skip
+reading, parsing and embedding every process.
+"""
+
+import os
+import json
+import glob
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Bump when the snapshot layout changes so old snapshots are ignored
+SNAPSHOT_VERSION = 2
+
+def source_fingerprint(processes_dir: str) -> str:
+    """
+    Fingerprint the process files without reading them.
+
+    Args:
+        processes_dir: Path to the processes directory
+
+    Returns:
+        SHA-256 hex digest over every JSON file's relative path, size and
+        modification time
+    """
+    digest = hashlib.sha256()
+    for file_path in sorted(glob.glob(os.path.join(processes_dir, '**', '*.json'), recursive=True)):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            continue
+        digest.update(f"{os.path.relpath(file_path, processes_dir)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+class CatalogSnapshot:
+    """Single-file snapshot of the parsed catalog, keyword index and embeddings."""
+
+    def __init__(self, path: str):
+        """
+        Initialize the snapshot.
+
+        Args:
+            path: Path of the `.npz` snapshot file
+        """
+        self.path = path
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+        Read the snapshot.
+
+        Returns:
+            Dictionary with fingerprint, settings, processes, lexical_terms,
+            embedding_ids, embeddings (a float32 matrix) and missing_embeddings,
+            or None if there is no usable snapshot
+        """
+        if not os.path.exists(self.path):
+            return None
+
+        try:
+            with np.load(self.path) as data:
+                snapshot = json.loads(data["meta"].tobytes().decode('utf-8'))
+                snapshot["embeddings"] = data["embeddings"]
+        except Exception as e:
+            logger.error(f"Error reading catalog snapshot {self.path}: {e}")
+            return None
+
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            logger.info(f"Ignoring catalog snapshot with version {snapshot.get('version')}")
+            return None
+        return snapshot
+
+    def save(self, fingerprint: str, settings: Dict[str, Any], processes: Dict[str, Dict[str, Any]],
+             lexical_terms: Dict[str, Dict[str, int]], embedding_ids: List[str],
+             embeddings: Sequence[Sequence[float]], missing_embeddings: int = 0) -> bool:
+        """
+        Write the snapshot atomically.
+
+        Args:
+            fingerprint: Source fingerprint of the files the catalog was loaded from
+            settings: Settings the snapshot is only valid for (e.g. embedding model)
+            processes: Parsed process files keyed by process name
+            lexical_terms: Keyword index terms as returned by `BM25Index.export_terms`
+            embedding_ids: Process names of the embedding rows
+            embeddings: In-memory embeddings, aligned with `embedding_ids`
+            missing_embeddings: Number of processes that could not be embedded; a
+                snapshot with missing embeddings is incomplete even if its
+                fingerprint matches the files
+
+        Returns:
+            True if the snapshot was written, False otherwise
+        """
+        meta = {
+            "version": SNAPSHOT_VERSION,
+            "fingerprint": fingerprint,
+            "settings": settings,
+            "processes": processes,
+            "lexical_terms": lexical_terms,
+            "embedding_ids": embedding_ids,
+            "missing_embeddings": missing_embeddings
+        }
+        matrix = np.asarray(embeddings, dtype=np.float32) if len(embedding_ids) else np.zeros((0, 0), dtype=np.float32)
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Unique per process, so workers writing at the same time do not clobber each other's temp file
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    meta=np.frombuffer(json.dumps(meta, separators=(",", ":")).encode('utf-8'), dtype=np.uint8),
+                    embeddings=matrix
+                )
+            os.replace(temp_path, self.path)
+            logger.info(f"Saved catalog snapshot with {len(processes)} processes to {self.path}")
+            return True
+        except Exception as e:
+            logger.error(f"Error writing catalog snapshot {self.path}: {e}")
+            return False
@@ -0,0 +1,200 @@
+"""
+Conversation Store for Brandworkz AI Agent
+
+This module provides a bounded, session-scoped store of conversation
+history. Each client session keeps its own messages, capped by count and
+size; sessions idle for longer than a TTL expire, and the least recently
+used sessions are evicted when there are too many or their combined size
+exceeds a global memory ceiling.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Approximate memory taken by a stored message besides its text (dict, tuple and string headers)
+MESSAGE_OVERHEAD_BYTES = 200
+
+class _Session:
+    """Messages of one session with their accounted size."""
+
+    __slots__ = ("messages", "bytes", "last_access")
+
+    def __init__(self, now: float):
+        # (role, content, accounted bytes), oldest first
+        self.messages: Deque[Tuple[str, str, int]] = deque()
+        self.bytes = 0
+        self.last_access = now
+
+class ConversationStore:
+    """Per-session conversation history with message, size, TTL and memory limits."""
+
+    def __init__(self, max_messages: int = 50, max_session_bytes: int = 65536, max_sessions: int = 10000,
+                 ttl_seconds: float = 1800, max_total_bytes: int = 64 * 1024 * 1024,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the conversation store.
+
+        Args:
+            max_messages: Messages kept per session; older ones are dropped first
+            max_session_bytes: Approximate bytes kept per session; older messages are dropped first
+            max_sessions: Sessions kept; the least recently used one is evicted beyond this
+            ttl_seconds: Seconds a session may stay idle before it expires (0 never expires sessions)
+            max_total_bytes: Approximate bytes kept across all sessions; least recently
+                used sessions are evicted beyond this
+            clock: Returns the current time in seconds
+        """
+        self.max_messages = max(1, max_messages)
+        self.max_session_bytes = max(1, max_session_bytes)
+        self.max_sessions = max(1, max_sessions)
+        self.ttl_seconds = ttl_seconds
+        self.max_total_bytes = max(1, max_total_bytes)
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Session ID -> session, least recently used first
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self.total_bytes = 0
+        self.trimmed_messages = 0
+        self.expired = 0
+        self.evicted_lru = 0
+        self.evicted_memory = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _expired(self, session: _Session, now: float) -> bool:
+        """Check whether a session has been idle for longer than the TTL."""
+        return self.ttl_seconds > 0 and now - session.last_access > self.ttl_seconds
+
+    def _drop(self, session_id: str) -> None:
+        """Remove a session; the caller holds the lock."""
+        session = self._sessions.pop(session_id)
+        self.total_bytes -= session.bytes
+
+    def _evict(self, now: float) -> None:
+        """Expire idle sessions, then evict the least recently used ones over the limits; the caller holds the lock."""
+        # Sessions are ordered by last access, so expired ones are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if not self._expired(session, now):
+                break
+            self._drop(session_id)
+            self.expired += 1
+
+        # Never evict the session that was just used
+        while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions or
+                                           self.total_bytes > self.max_total_bytes):
+            if len(self._sessions) > self.max_sessions:
+                self.evicted_lru += 1
+            else:
+                self.evicted_memory += 1
+            self._drop(next(iter(self._sessions)))
+
+    def add_message(self, session_id: str, role: str, content: str) -> None:
+        """
+        Append a message to a session, creating the session if needed.
+
+        Args:
+            session_id: ID of the client session
+            role: Role of the message author ("user" or "assistant")
+            content: Message text
+        """
+        size = len(content.encode("utf-8")) + len(role) + MESSAGE_OVERHEAD_BYTES
+        with self._lock:
+            now = self._clock()
+            session = self._sessions.get(session_id)
+            if session is None or self._expired(session, now):
+                if session is not None:
+                    self._drop(session_id)
+                    self.expired += 1
+                session = _Session(now)
+                self._sessions[session_id] = session
+            else:
+                self._sessions.move_to_end(session_id)
+                session.last_access = now
+
+            session.messages.append((role, content, size))
+            session.bytes += size
+            self.total_bytes += size
+
+            # Drop the oldest messages over the session caps (a message larger than the cap is not kept)
+            while session.messages and (len(session.messages) > self.max_messages or
+                                        session.bytes > self.max_session_bytes):
+                _, _, dropped = session.messages.popleft()
+                session.bytes -= dropped
+                self.total_bytes -= dropped
+                self.trimmed_messages += 1
+
+            self._evict(now)
+
+    def get_history(self, session_id: str) -> List[Dict[str, str]]:
+        """
+        Get the messages of a session.
+
+        Args:
+            session_id: ID of the client session
+
+        Returns:
+            List of {"role", "content"} messages, oldest first; empty if the
+            session does not exist or has expired
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            now = self._clock()
+            if self._expired(session, now):
+                self._drop(session_id)
+                self.expired += 1
+                return []
+            self._sessions.move_to_end(session_id)
+            session.last_access = now
+            return [{"role": role, "content": content} for role, content, _ in session.messages]
+
+    def reset(self, session_id: Optional[str] = None) -> None:
+        """
+        Forget the history of a session.
+
+        Args:
+            session_id: ID of the client session; None forgets every session
+        """
+        with self._lock:
+            if session_id is None:
+                self._sessions.clear()
+                self.total_bytes = 0
+            elif session_id in self._sessions:
+                self._drop(session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get store statistics.
+
+        Returns:
+            Dictionary with the number of sessions and messages, the approximate
+            bytes held against the memory ceiling, the configured limits and
+            counts of trimmed messages and evicted sessions
+        """
+        with self._lock:
+            self._evict(self._clock())
+            return {
+                "sessions": len(self._sessions),
+                "messages": sum(len(session.messages) for session in self._sessions.values()),
+                "bytes": self.total_bytes,
+                "max_total_bytes": self.max_total_bytes,
+                "max_sessions": self.max_sessions,
+                "max_messages": self.max_messages,
+                "max_session_bytes": self.max_session_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "trimmed_messages": self.trimmed_messages,
+                "evictions": {
+                    "expired": self.expired,
+                    "lru": self.evicted_lru,
+                    "memory": self.evicted_memory
+                }
+            }
@@ -0,0 +1,311 @@
+"""
+Embedding Cache for Brandworkz AI Agent
+
+This module provides a persistent, content-addressed cache of embeddings
+so that unchanged process text never has to be sent to the embedding API twice,
+and an in-memory LRU/TTL cache for the embeddings of repeated user queries.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from cachetools import TTLCache
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """On-disk embedding cache keyed by (embedding model, SHA-256 of the input text)."""
+
+    def __init__(self, cache_file: str = None, max_entries: int = 50000, access_flush_size: int = 256,
+                 access_flush_seconds: float = 60):
+        """
+        Initialize the embedding cache.
+
+        Args:
+            cache_file: Path to the SQLite file used for storage
+            max_entries: Maximum number of cached embeddings before the least
+                recently used ones are evicted
+            access_flush_size: Cache hits whose access times are kept in memory
+                before they are written in one transaction
+            access_flush_seconds: Seconds after which pending access times are
+                written even if fewer hits accumulated
+        """
+        self.cache_file = cache_file or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            'data',
+            'embedding_cache.sqlite3'
+        )
+        self.max_entries = max_entries
+        self.access_flush_size = max(1, access_flush_size)
+        self.access_flush_seconds = access_flush_seconds
+        self._lock = threading.Lock()
+        # (model, text hash) -> last access time not yet written; reads never wait on a commit
+        self._pending_access: Dict[Tuple[str, str], float] = {}
+        self._last_access_flush = time.monotonic()
+
+        # Create data directory if it doesn't exist
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+
+        self._conn = sqlite3.connect(self.cache_file, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+        # Eviction picks the least recently used rows by this index
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)")
+        self._conn.commit()
+        # Running row count, so writes don't have to count the table
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """Return the SHA-256 hex digest of the exact input text."""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """
+        Get a cached embedding.
+
+        Args:
+            model: Embedding model name
+            text: Exact text that was embedded
+
+        Returns:
+            The cached embedding, or None on a miss
+        """
+        return self.get_many(model, [text])[0]
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Get cached embeddings for several texts at once.
+
+        Args:
+            model: Embedding model name
+            texts: Exact texts that were embedded
+
+        Returns:
+            List aligned with `texts` holding embeddings or None for misses
+        """
+        if not texts:
+            return []
+
+        hashes = [self.text_hash(text) for text in texts]
+        found = {}
+
+        try:
+            with self._lock:
+                # Stay well below SQLite's bound-parameter limit
+                unique_hashes = list(dict.fromkeys(hashes))
+                for start in range(0, len(unique_hashes), 500):
+                    chunk = unique_hashes[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._conn.execute(
+                        f"SELECT text_hash, embedding FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                        [model, *chunk]
+                    ).fetchall()
+                    for text_hash, blob in rows:
+                        found[text_hash] = array('d', blob).tolist()
+
+                if found:
+                    now = time.time()
+                    for text_hash in found:
+                        self._pending_access[(model, text_hash)] = now
+                    if (len(self._pending_access) >= self.access_flush_size or
+                            time.monotonic() - self._last_access_flush >= self.access_flush_seconds):
+                        self._flush_access_times()
+                        self._conn.commit()
+        except Exception as e:
+            logger.error(f"Error reading embedding cache: {e}")
+
+        return [found.get(text_hash) for text_hash in hashes]
+
+    def set(self, model: str, text: str, embedding: List[float]) -> None:
+        """
+        Store an embedding in the cache.
+
+        Args:
+            model: Embedding model name
+            text: Exact text that was embedded
+            embedding: The embedding vector
+        """
+        self.set_many(model, [(text, embedding)])
+
+    def set_many(self, model: str, items: Sequence[Tuple[str, List[float]]]) -> None:
+        """
+        Store several embeddings in the cache.
+
+        Args:
+            model: Embedding model name
+            items: Sequence of (text, embedding) pairs; pairs without an embedding are skipped
+        """
+        now = time.time()
+        # Keyed by hash so a text repeated in the batch is counted once
+        rows = {
+            text_hash: (model, text_hash, array('d', embedding).tobytes(), now)
+            for text_hash, embedding in ((self.text_hash(text), embedding) for text, embedding in items)
+            if embedding
+        }
+        if not rows:
+            return
+
+        try:
+            with self._lock:
+                hashes = list(rows)
+                existing = set()
+                for start in range(0, len(hashes), 500):
+                    chunk = hashes[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    existing.update(text_hash for (text_hash,) in self._conn.execute(
+                        f"SELECT text_hash FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                        [model, *chunk]
+                    ))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, text_hash, embedding, last_access) VALUES (?, ?, ?, ?)",
+                    rows.values()
+                )
+                self._count += len(rows) - len(existing)
+                self._flush_access_times()
+                self._evict()
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"Error writing embedding cache: {e}")
+
+    def _flush_access_times(self) -> None:
+        """Write the pending access times of cache hits (caller holds the lock and commits)."""
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_access = MAX(last_access, ?) WHERE model = ? AND text_hash = ?",
+                [(accessed, model, text_hash) for (model, text_hash), accessed in self._pending_access.items()]
+            )
+            self._pending_access.clear()
+        self._last_access_flush = time.monotonic()
+
+    def _evict(self) -> None:
+        """Drop the least recently used entries beyond `max_entries` (caller holds the lock)."""
+        if self._count <= self.max_entries:
+            return
+        # Other workers write to the same file, so recount before deleting anything
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = self._count - self.max_entries
+        if excess > 0:
+            deleted = self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                (excess,)
+            ).rowcount
+            self._count -= deleted
+            logger.info(f"Evicted {deleted} embeddings from cache")
+
+    def flush(self) -> None:
+        """Write the pending access times of cache hits."""
+        try:
+            with self._lock:
+                self._flush_access_times()
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"Error writing embedding cache: {e}")
+
+    def count(self) -> int:
+        """Get the number of cached embeddings (as last counted by this process)."""
+        return self._count
+
+    def clear(self) -> None:
+        """Remove all cached embeddings."""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._pending_access.clear()
+            self._count = 0
+
+
+class QueryEmbeddingCache:
+    """Bounded in-memory LRU cache with TTL for query embeddings."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        """
+        Initialize the query embedding cache.
+
+        Args:
+            max_entries: Maximum number of queries kept; the least recently
+                used one is evicted when the cache is full
+            ttl_seconds: Seconds after which a cached embedding expires
+        """
+        self._cache = TTLCache(maxsize=max_entries, ttl=ttl_seconds)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """
+        Normalize a query so trivially different phrasings share a cache entry.
+
+        Lowercases, collapses whitespace and drops trailing punctuation, so
+        "How do I tag assets?" and "how do i tag assets" map to the same key.
+        """
+        return " ".join(query.lower().split()).rstrip("?!. ")
+
+    def get(self, normalized_query: str) -> Optional[List[float]]:
+        """
+        Get the cached embedding of a normalized query.
+
+        Args:
+            normalized_query: Query as returned by `normalize`
+
+        Returns:
+            The cached embedding, or None on a miss
+        """
+        with self._lock:
+            embedding = self._cache.get(normalized_query)
+            if embedding is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return embedding
+
+    def set(self, normalized_query: str, embedding: List[float]) -> None:
+        """
+        Store the embedding of a normalized query.
+
+        Args:
+            normalized_query: Query as returned by `normalize`
+            embedding: The embedding vector
+        """
+        with self._lock:
+            self._cache[normalized_query] = embedding
+
+    def clear(self) -> None:
+        """Remove all cached query embeddings (counters are kept)."""
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with size, capacity, hits, misses and hit rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "max_entries": self._cache.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
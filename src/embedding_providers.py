@@ -0,0 +1,346 @@
+"""
+Embedding Providers for Brandworkz AI Agent
+
+This module defines the embedding backends used for process and query
+embeddings. The backend is selected through configuration so matching can
+run against the OpenAI API or fully offline on the local CPU, optionally
+falling back to the local backend when the API is slow or failing.
+"""
+
+import re
+import math
+import time
+import asyncio
+import zlib
+import logging
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class EmbeddingProvider(ABC):
+    """Base class for embedding backends."""
+
+    # Short backend name used in configuration
+    name = "base"
+
+    # Whether embeddings are worth persisting in the embedding cache
+    cacheable = True
+
+    # Whether embedding batches benefit from being sent concurrently
+    concurrent = True
+
+    def __init__(self, model_name: str):
+        """
+        Initialize the provider.
+
+        Args:
+            model_name: Identifier of the embedding space; embeddings from
+                providers with different model names are not comparable
+        """
+        self.model_name = model_name
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed a batch of texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One embedding per text, in the same order
+        """
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed a batch of texts without blocking the event loop.
+
+        Backends without an async API run `embed` in a worker thread.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One embedding per text, in the same order
+        """
+        return await asyncio.to_thread(self.embed, texts)
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """Embeddings from the OpenAI embeddings API."""
+
+    name = "openai"
+
+    def __init__(self, client=None, model_name: str = "text-embedding-ada-002", client_pool=None):
+        """
+        Initialize the provider.
+
+        Args:
+            client: OpenAI client used for requests; defaults to the pool's client
+            model_name: OpenAI embedding model
+            client_pool: OpenAIClientPool serving requests when no client is
+                given, and `aembed` (optional)
+        """
+        super().__init__(model_name)
+        self._client = client
+        self.client_pool = client_pool
+
+    @property
+    def client(self):
+        """OpenAI client for synchronous requests, created on first use when it comes from the pool."""
+        if self._client is None:
+            self._client = self.client_pool.client
+        return self._client
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts with a single embeddings request."""
+        response = self.client.embeddings.create(
+            model=self.model_name,
+            input=texts
+        )
+        embeddings = [None] * len(texts)
+        # Each result carries the index of its input within the batch
+        for item in response.data:
+            embeddings[item.index] = item.embedding
+        return embeddings
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts with a single request on the pooled async client."""
+        if self.client_pool is None:
+            return await super().aembed(texts)
+        return await self.client_pool.aembed(texts, self.model_name)
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Local CPU embeddings from hashed word and character n-grams.
+
+    Word unigrams, word bigrams and character trigrams are hashed into a
+    fixed number of signed buckets (the "hashing trick"), weighted by
+    sublinear term frequency and L2-normalized. Common English filler words
+    are dropped, which plays the role of an IDF prior without needing a
+    fitted corpus, so embeddings stay stable as the catalog changes.
+    """
+
+    name = "local"
+    cacheable = False
+    concurrent = False
+
+    STOP_WORDS = frozenset([
+        "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from",
+        "how", "i", "in", "is", "it", "me", "my", "of", "on", "or", "please", "the", "to",
+        "we", "what", "where", "which", "with", "you", "your"
+    ])
+
+    _TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+    def __init__(self, dimension: int = 512, char_ngram_weight: float = 0.5, bigram_weight: float = 0.7):
+        """
+        Initialize the provider.
+
+        Args:
+            dimension: Number of hash buckets, i.e. the embedding dimension
+            char_ngram_weight: Weight of character trigram features
+            bigram_weight: Weight of word bigram features
+        """
+        super().__init__(f"local-hashing-{dimension}")
+        self.dimension = dimension
+        # Feature weights keyed by the feature prefix
+        self._weights = {"w": 1.0, "b": bigram_weight, "c": char_ngram_weight}
+
+    def _features(self, text: str) -> Counter:
+        """Count the n-gram features of a text."""
+        words = [word for word in self._TOKEN_PATTERN.findall(text.lower()) if word not in self.STOP_WORDS]
+        features = Counter()
+
+        for word in words:
+            features["w:" + word] += 1
+            padded = f"#{word}#"
+            for start in range(len(padded) - 2):
+                features["c:" + padded[start:start + 3]] += 1
+
+        for first, second in zip(words, words[1:]):
+            features[f"b:{first} {second}"] += 1
+
+        return features
+
+    def embed_one(self, text: str) -> List[float]:
+        """
+        Embed a single text.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Unit-length embedding (all zeros if the text has no features)
+        """
+        vector = [0.0] * self.dimension
+        for feature, count in self._features(text).items():
+            # crc32 is stable across processes, unlike the built-in hash()
+            hashed = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if hashed & 0x80000000 else -1.0
+            vector[hashed % self.dimension] += sign * self._weights[feature[0]] * (1.0 + math.log(count))
+
+        norm = math.sqrt(sum(value * value for value in vector))
+        if norm:
+            vector = [value / norm for value in vector]
+        return vector
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts locally."""
+        return [self.embed_one(text) for text in texts]
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts locally; hashing is fast enough to run inline."""
+        return self.embed(texts)
+
+class FallbackEmbeddingProvider(EmbeddingProvider):
+    """
+    A remote backend with a local fallback for latency-sensitive queries.
+
+    `embed` and `aembed` always use the primary backend, so stored and cached
+    embeddings stay in its space. `embed_with_fallback` and
+    `aembed_with_fallback` give the primary `timeout` seconds and answer from
+    the local backend if it fails or is slower; after a fallback the primary
+    is skipped for `cooldown` seconds. Fallback embeddings live in the local
+    backend's space and must be searched against an index built with
+    `fallback.embed`.
+    """
+
+    def __init__(self, primary: EmbeddingProvider, fallback: EmbeddingProvider,
+                 timeout: float = 1.0, cooldown: float = 30.0):
+        """
+        Initialize the provider.
+
+        Args:
+            primary: Backend used for stored embeddings and, when it answers in time, for queries
+            fallback: Local backend used for queries when the primary fails or times out
+            timeout: Seconds a query embedding may take on the primary backend
+            cooldown: Seconds queries go straight to the fallback after the primary failed
+        """
+        super().__init__(primary.model_name)
+        self.primary = primary
+        self.fallback = fallback
+        self.timeout = timeout
+        self.cooldown = cooldown
+        self.name = primary.name
+        self.cacheable = primary.cacheable
+        self.concurrent = primary.concurrent
+        self.fallbacks = 0
+        self._primary_skipped_until = 0.0
+        # Runs synchronous primary calls so they can be abandoned after the timeout
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="embedding-primary")
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts with the primary backend."""
+        return self.primary.embed(texts)
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts with the primary backend without blocking the event loop."""
+        return await self.primary.aembed(texts)
+
+    def _fall_back(self, texts: List[str], reason: str) -> Tuple[List[List[float]], bool]:
+        """Embed texts with the fallback backend and skip the primary for the cooldown."""
+        logger.warning(f"Primary embeddings {reason}, using {self.fallback.model_name} for {len(texts)} queries")
+        self.fallbacks += 1
+        self._primary_skipped_until = time.monotonic() + self.cooldown
+        return self.fallback.embed(texts), True
+
+    def embed_with_fallback(self, texts: List[str],
+                            primary: Optional[Callable[[List[str]], List[Optional[List[float]]]]] = None
+                            ) -> Tuple[List[List[float]], bool]:
+        """
+        Embed query texts, falling back to the local backend if the primary is slow or failing.
+
+        A primary call that times out keeps running in the background, so
+        anything it caches is there for the next query.
+
+        Args:
+            texts: Texts to embed
+            primary: Embeds texts in the primary space, e.g. through a query
+                cache (defaults to the primary backend's `embed`); None entries
+                count as failures
+
+        Returns:
+            Tuple of (one embedding per text, whether they came from the fallback backend)
+        """
+        if time.monotonic() < self._primary_skipped_until:
+            return self.fallback.embed(texts), True
+
+        future = self._executor.submit(primary or self.primary.embed, texts)
+        try:
+            embeddings = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            return self._fall_back(texts, f"took longer than {self.timeout}s")
+        except Exception as e:
+            return self._fall_back(texts, f"failed ({e})")
+        if any(embedding is None for embedding in embeddings):
+            return self._fall_back(texts, "failed")
+        return embeddings, False
+
+    async def aembed_with_fallback(self, texts: List[str],
+                                   primary: Optional[Callable[[List[str]], Awaitable[List[Optional[List[float]]]]]] = None
+                                   ) -> Tuple[List[List[float]], bool]:
+        """
+        Embed query texts without blocking the event loop, falling back to the local backend if needed.
+
+        Args:
+            texts: Texts to embed
+            primary: Coroutine function embedding texts in the primary space
+                (defaults to the primary backend's `aembed`); None entries
+                count as failures
+
+        Returns:
+            Tuple of (one embedding per text, whether they came from the fallback backend)
+        """
+        if time.monotonic() < self._primary_skipped_until:
+            return await self.fallback.aembed(texts), True
+
+        # Shielded so a call that times out still finishes and fills any cache behind it
+        task = asyncio.ensure_future((primary or self.primary.aembed)(texts))
+        try:
+            embeddings = await asyncio.wait_for(asyncio.shield(task), self.timeout)
+        except asyncio.TimeoutError:
+            return self._fall_back(texts, f"took longer than {self.timeout}s")
+        except Exception as e:
+            return self._fall_back(texts, f"failed ({e})")
+        if any(embedding is None for embedding in embeddings):
+            return self._fall_back(texts, "failed")
+        return embeddings, False
+
+def create_embedding_provider(provider_name: str, openai_client=None, openai_model: str = "text-embedding-ada-002",
+                              local_dimension: int = 512, openai_client_pool=None,
+                              fallback_timeout: float = 0) -> EmbeddingProvider:
+    """
+    Create the embedding provider selected by configuration.
+
+    Args:
+        provider_name: "openai" or "local"
+        openai_client: OpenAI client for the "openai" provider; either this or
+            `openai_client_pool` is required
+        openai_model: OpenAI embedding model
+        local_dimension: Embedding dimension of the "local" provider
+        openai_client_pool: OpenAIClientPool used for requests of the "openai" provider
+        fallback_timeout: Seconds an "openai" query embedding may take before
+            local embeddings are used instead (0 disables the fallback)
+
+    Returns:
+        The embedding provider
+    """
+    provider_name = (provider_name or "openai").lower()
+
+    if provider_name == HashingEmbeddingProvider.name:
+        logger.info(f"Using local hashing embeddings with dimension {local_dimension}")
+        return HashingEmbeddingProvider(dimension=local_dimension)
+
+    if provider_name != OpenAIEmbeddingProvider.name:
+        logger.warning(f"Unknown embedding provider '{provider_name}', falling back to OpenAI")
+    provider = OpenAIEmbeddingProvider(openai_client, model_name=openai_model, client_pool=openai_client_pool)
+    if fallback_timeout > 0:
+        logger.info(f"Falling back to local hashing embeddings for queries slower than {fallback_timeout}s")
+        return FallbackEmbeddingProvider(provider, HashingEmbeddingProvider(dimension=local_dimension),
+                                         timeout=fallback_timeout)
+    return provider
@@ -4,6 +4,42 @@ import axios from 'axios';
 // Create the context
 const ChatContext = createContext();
 
+// Read the server-sent events of a fetch response, calling onEvent(event, data) for each one
+const readServerSentEvents = async (response, onEvent) => {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  
+  const dispatch = (frame) => {
+    let event = 'message';
+    const dataLines = [];
+    frame.split('\n').forEach(line => {
+      if (line.startsWith('event:')) {
+        event = line.slice(6).trim();
+      } else if (line.startsWith('data:')) {
+        dataLines.push(line.slice(5).trim());
+      }
+    });
+    if (dataLines.length > 0) {
+      onEvent(event, JSON.parse(dataLines.join('\n')));
+    }
+  };
+  
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    
+    // Events are separated by a blank line; the last part may be incomplete
+    const frames = buffer.split('\n\n');
+    buffer = frames.pop();
+    frames.forEach(dispatch);
+  }
+  if (buffer.trim()) {
+    dispatch(buffer);
+  }
+};
+
 export const ChatProvider = ({ children }) => {
   // Initialize with saved messages or default welcome message
   const [messages, setMessages] = useState(() => {
@@ -51,6 +87,16 @@ export const ChatProvider = ({ children }) => {
     };
   });
 
+  // Random ID of this browser; with the chat ID it names the server-side conversation session
+  const [browserId] = useState(() => {
+    let savedBrowserId = localStorage.getItem('brandworkz-browser-id');
+    if (!savedBrowserId) {
+      savedBrowserId = `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+      localStorage.setItem('brandworkz-browser-id', savedBrowserId);
+    }
+    return savedBrowserId;
+  });
+
   const [isLoading, setIsLoading] = useState(false);
   
   // Persist messages to localStorage whenever they change
@@ -98,13 +144,35 @@ export const ChatProvider = ({ children }) => {
     setIsLoading(true);
     
     try {
-      // Send message to API
-      const response = await axios.post('/api/chat', { message });
+      // Send message to API; the answer arrives as server-sent events
+      const response = await fetch('/api/chat/stream', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          message,
+          session_id: `${browserId}:${currentChatId}`
+        })
+      });
       
-      if (response.data.success) {
-        addMessage('assistant', response.data.response);
-      } else {
-        addMessage('assistant', 'Sorry, I encountered an error. Please try again.');
+      // Errors such as a catalog that is still loading come back as plain JSON
+      if (!response.ok || !(response.headers.get('content-type') || '').startsWith('text/event-stream')) {
+        throw new Error(`Chat request failed with status ${response.status}`);
+      }
+      
+      // The answer arrives as one "answer" event, or an "error" event if it failed
+      let answered = false;
+      await readServerSentEvents(response, (event, data) => {
+        if (event === 'answer') {
+          answered = true;
+          addMessage('assistant', data.success ? data.response : 'Sorry, I encountered an error. Please try again.');
+        } else if (event === 'error') {
+          answered = true;
+          addMessage('assistant', data.response || 'Sorry, I encountered an error. Please try again.');
+        }
+      });
+      
+      if (!answered) {
+        throw new Error('Chat stream ended without an answer');
       }
     } catch (error) {
       console.error('Error sending message:', error);
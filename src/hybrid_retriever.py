@@ -0,0 +1,155 @@
+"""
+Hybrid Retriever for Brandworkz AI Agent
+
+This module runs the lexical (BM25) and vector lookups for a query
+concurrently and fuses the two ranked lists with reciprocal-rank fusion
+into a single ranked candidate list.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Union
+
+from config.config import search_processes_vectors, search_processes_vectors_async, search_processes_lexical
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Shared pool for the vector side of retrievals; the lexical side runs on the caller's thread
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hybrid-retriever")
+
+class HybridRetriever:
+    """Fuses vector and BM25 rankings of processes with reciprocal-rank fusion."""
+
+    def __init__(self, rrf_k: int = 60, candidate_pool: int = 10):
+        """
+        Initialize the retriever.
+
+        Args:
+            rrf_k: Reciprocal-rank fusion constant; larger values flatten the
+                advantage of top ranks
+            candidate_pool: Number of results requested from each signal before fusion
+        """
+        self.rrf_k = rrf_k
+        self.candidate_pool = candidate_pool
+
+    def retrieve(self, queries: Union[str, List[str]], top_k: int = 3) -> List[Dict[str, Any]]:
+        """
+        Retrieve candidate processes for a query.
+
+        Args:
+            queries: The query, or a list of variants of it (e.g. raw and
+                filler-stripped). All variants are searched on the vector side
+                in one batch; the first one is used for the lexical side.
+            top_k: Number of candidates to return
+
+        Returns:
+            Candidates ordered by fused score, each with per-signal scores:
+            process_id, score, similarity, vector_rank, lexical_score, lexical_rank,
+            and fallback (whether the similarity comes from local fallback embeddings)
+        """
+        if isinstance(queries, str):
+            queries = [queries]
+        queries = [query for query in queries if query]
+        if not queries:
+            return []
+
+        vector_future = _executor.submit(search_processes_vectors, queries, self.candidate_pool)
+        try:
+            lexical_results = search_processes_lexical(queries[0], top_k=self.candidate_pool)
+        except Exception as e:
+            logger.error(f"Error in lexical retrieval: {e}")
+            lexical_results = []
+
+        try:
+            vector_results_per_query = vector_future.result()
+        except Exception as e:
+            logger.error(f"Error in vector retrieval: {e}")
+            vector_results_per_query = []
+
+        return self._fuse(vector_results_per_query, lexical_results, top_k)
+
+    async def aretrieve(self, queries: Union[str, List[str]], top_k: int = 3) -> List[Dict[str, Any]]:
+        """
+        Retrieve candidate processes for a query without blocking the event loop.
+
+        Async counterpart of `retrieve`: the query embeddings are requested on
+        the pooled async client while the lexical lookup runs.
+
+        Args:
+            queries: The query, or a list of variants of it
+            top_k: Number of candidates to return
+
+        Returns:
+            Candidates ordered by fused score, as returned by `retrieve`
+        """
+        if isinstance(queries, str):
+            queries = [queries]
+        queries = [query for query in queries if query]
+        if not queries:
+            return []
+
+        vector_task = asyncio.ensure_future(search_processes_vectors_async(queries, self.candidate_pool))
+        try:
+            lexical_results = search_processes_lexical(queries[0], top_k=self.candidate_pool)
+        except Exception as e:
+            logger.error(f"Error in lexical retrieval: {e}")
+            lexical_results = []
+
+        try:
+            vector_results_per_query = await vector_task
+        except Exception as e:
+            logger.error(f"Error in vector retrieval: {e}")
+            vector_results_per_query = []
+
+        return self._fuse(vector_results_per_query, lexical_results, top_k)
+
+    def _fuse(self, vector_results_per_query: List[List[Dict[str, Any]]], lexical_results: List[Dict[str, Any]],
+              top_k: int) -> List[Dict[str, Any]]:
+        """Fuse the vector results of every query variant with the lexical results using RRF."""
+        # Merge the query variants, keeping each process's best similarity
+        best_similarity = {}
+        # Processes found with local fallback embeddings, whose similarities are on another scale
+        fallback_ids = set()
+        for results in vector_results_per_query:
+            for result in results:
+                process_id = result['process_id']
+                similarity = result['similarity']
+                if process_id not in best_similarity or similarity > best_similarity[process_id]:
+                    best_similarity[process_id] = similarity
+                if result.get('fallback'):
+                    fallback_ids.add(process_id)
+        vector_ranking = sorted(best_similarity, key=best_similarity.get, reverse=True)
+
+        candidates: Dict[str, Dict[str, Any]] = {}
+
+        def candidate(process_id: str) -> Dict[str, Any]:
+            if process_id not in candidates:
+                candidates[process_id] = {
+                    'process_id': process_id,
+                    'score': 0.0,
+                    'similarity': None,
+                    'vector_rank': None,
+                    'lexical_score': 0.0,
+                    'lexical_rank': None,
+                    'fallback': False
+                }
+            return candidates[process_id]
+
+        for rank, process_id in enumerate(vector_ranking, 1):
+            entry = candidate(process_id)
+            entry['similarity'] = best_similarity[process_id]
+            entry['vector_rank'] = rank
+            entry['fallback'] = process_id in fallback_ids
+            entry['score'] += 1.0 / (self.rrf_k + rank)
+
+        for rank, result in enumerate(lexical_results, 1):
+            entry = candidate(result['process_id'])
+            entry['lexical_score'] = result['score']
+            entry['lexical_rank'] = rank
+            entry['score'] += 1.0 / (self.rrf_k + rank)
+
+        ranked = sorted(candidates.values(), key=lambda entry: entry['score'], reverse=True)
+        return ranked[:top_k]
@@ -0,0 +1,217 @@
+"""
+Lexical Index for Brandworkz AI Agent
+
+This module provides an incrementally updatable BM25 inverted index over
+process keywords, titles and descriptions. A lookup only touches the
+postings of the query's terms instead of scanning every process.
+"""
+
+import re
+import math
+import heapq
+import logging
+import threading
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Words that carry no meaning for matching a query to a process
+STOP_WORDS = frozenset([
+    "a", "about", "an", "and", "any", "are", "as", "at", "be", "by", "can", "do", "does", "for",
+    "from", "help", "how", "i", "idea", "in", "is", "it", "me", "my", "of", "on", "or", "please",
+    "process", "steps", "tell", "thank", "thanks", "the", "to", "way", "we", "what", "where",
+    "which", "with", "you", "your"
+])
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def _stem(token: str) -> str:
+    """Strip common English inflections so "tagging", "tagged" and "tags" match "tag"."""
+    for suffix in ("ing", "ed"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            stem = token[:-len(suffix)]
+            # Undo consonant doubling: "tagg" -> "tag"
+            if len(stem) > 3 and stem[-1] == stem[-2] and stem[-1] not in "aeiouls":
+                stem = stem[:-1]
+            return stem
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith("s") and not token.endswith("ss") and len(token) > 3:
+        return token[:-1]
+    return token
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into normalized terms.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        Lowercased, stemmed terms with stop words removed
+    """
+    return [_stem(token) for token in _TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+class BM25Index:
+    """Inverted index scored with Okapi BM25."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize an empty index.
+
+        Args:
+            k1: Term frequency saturation parameter
+            b: Document length normalization parameter
+        """
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self) -> None:
+        """Remove every document from the index."""
+        with self._lock:
+            self._postings: Dict[str, Dict[str, int]] = {}
+            self._doc_terms: Dict[str, Counter] = {}
+            self._doc_lengths: Dict[str, int] = {}
+            self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_terms
+
+    def add_document(self, doc_id: str, text: str) -> None:
+        """
+        Add a document, replacing any previous version with the same id.
+
+        Args:
+            doc_id: ID of the document
+            text: Text to index
+        """
+        terms = Counter(tokenize(text))
+        with self._lock:
+            self.remove_document(doc_id)
+            for term, frequency in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = frequency
+            self._doc_terms[doc_id] = terms
+            length = sum(terms.values())
+            self._doc_lengths[doc_id] = length
+            self._total_length += length
+
+    def export_terms(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get the term frequencies of every document, for persisting the index.
+
+        Returns:
+            Dictionary mapping document IDs to {term: frequency}
+        """
+        with self._lock:
+            return {doc_id: dict(terms) for doc_id, terms in self._doc_terms.items()}
+
+    def load_terms(self, doc_terms: Dict[str, Dict[str, int]]) -> None:
+        """
+        Replace the index contents with term frequencies from `export_terms`.
+
+        Restoring skips tokenizing the documents again.
+
+        Args:
+            doc_terms: Dictionary mapping document IDs to {term: frequency}
+        """
+        with self._lock:
+            self.clear()
+            for doc_id, terms in doc_terms.items():
+                terms = Counter(terms)
+                for term, frequency in terms.items():
+                    self._postings.setdefault(term, {})[doc_id] = frequency
+                self._doc_terms[doc_id] = terms
+                length = sum(terms.values())
+                self._doc_lengths[doc_id] = length
+                self._total_length += length
+
+    def remove_document(self, doc_id: str) -> bool:
+        """
+        Remove a document and its postings.
+
+        Args:
+            doc_id: ID of the document
+
+        Returns:
+            True if the document was in the index, False otherwise
+        """
+        with self._lock:
+            terms = self._doc_terms.pop(doc_id, None)
+            if terms is None:
+                return False
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self._postings[term]
+            self._total_length -= self._doc_lengths.pop(doc_id, 0)
+            return True
+
+    def key_terms(self, query: str) -> FrozenSet[str]:
+        """
+        Get the query terms that occur in the index.
+
+        Two queries with different key terms ask about different things even
+        if their embeddings are close (e.g. "upload asset" and "download asset").
+
+        Args:
+            query: Query text
+
+        Returns:
+            Set of stemmed query terms found in at least one document
+        """
+        with self._lock:
+            return frozenset(term for term in tokenize(query) if term in self._postings)
+
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[str, float]]:
+        """
+        Score documents against a query.
+
+        Args:
+            query: Query text
+            top_k: Number of results to return
+
+        Returns:
+            List of (document id, BM25 score) tuples, best first
+        """
+        return self.search_terms(tokenize(query), top_k)
+
+    def search_terms(self, terms: Iterable[str], top_k: int = 3) -> List[Tuple[str, float]]:
+        """
+        Score documents against already tokenized query terms.
+
+        Args:
+            terms: Query terms as produced by `tokenize`
+            top_k: Number of results to return
+
+        Returns:
+            List of (document id, BM25 score) tuples, best first
+        """
+        scores: Dict[str, float] = {}
+        with self._lock:
+            doc_count = len(self._doc_terms)
+            if doc_count == 0:
+                return []
+            average_length = self._total_length / doc_count
+
+            for term in set(terms):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                document_frequency = len(postings)
+                idf = math.log(1 + (doc_count - document_frequency + 0.5) / (document_frequency + 0.5))
+                for doc_id, frequency in postings.items():
+                    length_norm = 1 - self.b + self.b * self._doc_lengths[doc_id] / average_length
+                    term_score = idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + term_score
+
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
@@ -0,0 +1,183 @@
+"""
+Semantic Match Cache for Brandworkz AI Agent
+
+This module provides a bounded cache of process-matching decisions keyed by
+query embedding. A new question whose embedding lies within a cosine radius
+of one already matched reuses that decision, so paraphrases of common
+questions skip the vector and keyword retrieval stages entirely. Embeddings
+of short questions can be close even when they ask about opposite things,
+so a decision is only reused if both questions also share the same key terms.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class SemanticMatchCache:
+    """LRU cache of (query embedding -> matched process, score) looked up by cosine radius."""
+
+    def __init__(self, max_entries: int = 2048, radius: float = 0.03,
+                 version_fn: Optional[Callable[[], Hashable]] = None):
+        """
+        Initialize the match cache.
+
+        Args:
+            max_entries: Maximum number of decisions kept; the least recently
+                used one is evicted when the cache is full
+            radius: Maximum cosine distance (1 - cosine similarity) between a
+                query and a cached query for the cached decision to be reused
+            version_fn: Returns the current process catalog version; the cache
+                empties itself whenever the version changes
+        """
+        self.max_entries = max(1, max_entries)
+        self.radius = radius
+        self._version_fn = version_fn
+        self._lock = threading.Lock()
+        self._version = version_fn() if version_fn else None
+        # Pre-normalized query embeddings, one row per slot, allocated on first use
+        self._matrix: Optional[np.ndarray] = None
+        self._occupied = np.zeros(self.max_entries, dtype=bool)
+        # Slot -> (process ID, score), least recently used first
+        self._entries: "OrderedDict[int, Tuple[Optional[str], Optional[float]]]" = OrderedDict()
+        # Slot -> key terms of the cached query
+        self._key_terms: Dict[int, Hashable] = {}
+        self.hits = 0
+        self.misses = 0
+        self.term_mismatches = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> Optional[np.ndarray]:
+        """Convert an embedding to a unit float32 vector, or None if it has no direction."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if vector.ndim != 1 or norm == 0:
+            return None
+        return vector / norm
+
+    def _check_version(self) -> None:
+        """Drop every cached decision if the process catalog changed since they were made."""
+        if self._version_fn is None:
+            return
+        version = self._version_fn()
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+                logger.info(f"Process catalog changed, dropping {len(self._entries)} cached matches")
+            self._clear()
+            self._version = version
+
+    def _clear(self) -> None:
+        """Empty every slot; the caller holds the lock."""
+        self._entries.clear()
+        self._key_terms.clear()
+        self._occupied[:] = False
+
+    def get(self, embedding: Sequence[float],
+            key_terms: Hashable = None) -> Optional[Tuple[Optional[str], Optional[float]]]:
+        """
+        Look up the decision made for the closest cached query with the same key terms.
+
+        Args:
+            embedding: Embedding of the new query
+            key_terms: Key terms of the new query (e.g. its catalog terms); only
+                cached queries with equal key terms are reused
+
+        Returns:
+            (process ID or None for "no match", score) if such a cached query
+            lies within the radius, None on a miss
+        """
+        vector = self._normalize(embedding)
+        with self._lock:
+            self._check_version()
+            if vector is None or not self._entries or self._matrix.shape[1] != vector.shape[0]:
+                self.misses += 1
+                return None
+
+            scores = self._matrix @ vector
+            scores[~self._occupied] = -np.inf
+            within = np.flatnonzero(scores >= 1.0 - self.radius)
+            # Closest first; a near-identical embedding with other key terms is not a paraphrase
+            for slot in within[np.argsort(-scores[within])]:
+                slot = int(slot)
+                if self._key_terms.get(slot) == key_terms:
+                    break
+            else:
+                if len(within):
+                    self.term_mismatches += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(slot)
+            self.hits += 1
+            return self._entries[slot]
+
+    def put(self, embedding: Sequence[float], process_id: Optional[str], score: Optional[float] = None,
+            version: Optional[Hashable] = None, key_terms: Hashable = None) -> None:
+        """
+        Store the decision made for a query.
+
+        Args:
+            embedding: Embedding of the query
+            process_id: Matched process ID, or None if nothing matched
+            score: Score of the match
+            version: Catalog version the decision was made against; it is not
+                stored if the catalog has changed since
+            key_terms: Key terms of the query, compared by `get`
+        """
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+
+        with self._lock:
+            self._check_version()
+            if version is not None and version != self._version:
+                return
+
+            if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+                self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+                self._clear()
+
+            if len(self._entries) < self.max_entries:
+                slot = int(np.argmin(self._occupied))
+            else:
+                slot, _ = self._entries.popitem(last=False)
+
+            self._matrix[slot] = vector
+            self._occupied[slot] = True
+            self._entries[slot] = (process_id, score)
+            self._key_terms[slot] = key_terms
+
+    def clear(self) -> None:
+        """Remove all cached decisions (counters are kept)."""
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with size, capacity, radius, hits, misses, hit rate,
+            misses caused by differing key terms and the number of catalog
+            invalidations
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "radius": self.radius,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "term_mismatches": self.term_mismatches,
+                "invalidations": self.invalidations
+            }
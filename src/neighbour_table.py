@@ -0,0 +1,256 @@
+"""
+Neighbour Table for Brandworkz AI Agent
+
+This module provides a precomputed table of each process's most related
+processes. Pair scores combine embedding similarity with same-category and
+shared-keyword bonuses; they are computed once when the catalog loads and
+updated incrementally when a single process changes, so a recommendation is
+a dictionary lookup instead of a scan over every process.
+"""
+
+import logging
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class NeighbourTable:
+    """Top-N related processes per process, with every score component kept."""
+
+    # Rows whose similarities are computed per matrix product while building
+    BLOCK_ROWS = 1024
+
+    def __init__(self, size: int = 20, category_bonus: float = 0.2, keyword_bonus: float = 0.1,
+                 max_keyword_bonus: float = 0.3):
+        """
+        Initialize an empty table.
+
+        Args:
+            size: Neighbours kept per process
+            category_bonus: Score added for processes in the same category
+            keyword_bonus: Score added per shared keyword
+            max_keyword_bonus: Cap on the shared-keyword bonus
+        """
+        self.size = max(1, size)
+        self.category_bonus = category_bonus
+        self.keyword_bonus = keyword_bonus
+        self.max_keyword_bonus = max_keyword_bonus
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self) -> None:
+        """Remove every process from the table."""
+        with self._lock:
+            self._ids: List[str] = []
+            self._rows: Dict[str, int] = {}
+            self._vectors = np.zeros((0, 0), dtype=np.float32)
+            self._category_codes = np.zeros(0, dtype=np.int32)
+            self._category_lookup: Dict[str, int] = {}
+            self._keywords: Dict[str, frozenset] = {}
+            self._postings: Dict[str, set] = defaultdict(set)
+            self._neighbours: Dict[str, List[Dict[str, Any]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, process_id: str) -> bool:
+        return process_id in self._rows
+
+    def neighbours(self, process_id: str) -> List[Dict[str, Any]]:
+        """
+        Get the precomputed neighbours of a process.
+
+        Args:
+            process_id: ID of the process
+
+        Returns:
+            Neighbours ordered by score, each with process_id, score, similarity,
+            same_category and keyword_overlap (empty for unknown processes)
+        """
+        return self._neighbours.get(process_id, [])
+
+    def _vector(self, embedding: Optional[Sequence[float]], dimension: int) -> np.ndarray:
+        """Unit float32 vector for an embedding; processes without a usable one get zeros."""
+        if embedding is None or dimension == 0:
+            return np.zeros(dimension, dtype=np.float32)
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if vector.shape != (dimension,) or norm == 0:
+            return np.zeros(dimension, dtype=np.float32)
+        return vector / norm
+
+    def _category_code(self, category: str) -> int:
+        """Small integer standing for a category, so category matches are one vector comparison."""
+        return self._category_lookup.setdefault(category, len(self._category_lookup))
+
+    def _pair_scores(self, row: int, similarities: np.ndarray) -> Tuple[np.ndarray, np.ndarray, Dict[int, int]]:
+        """Scores of one process against every process, with the category mask and keyword overlaps."""
+        same_category = self._category_codes == self._category_codes[row]
+        scores = similarities + self.category_bonus * same_category
+
+        overlap = Counter()
+        for keyword in self._keywords[self._ids[row]]:
+            for other in self._postings[keyword]:
+                overlap[self._rows[other]] += 1
+        overlap.pop(row, None)
+        for other_row, count in overlap.items():
+            scores[other_row] += min(count * self.keyword_bonus, self.max_keyword_bonus)
+        return scores, same_category, overlap
+
+    def _top_neighbours(self, row: int, similarities: np.ndarray) -> List[Dict[str, Any]]:
+        """Select the best-scoring neighbours of one process."""
+        scores, same_category, overlap = self._pair_scores(row, similarities)
+        scores[row] = -np.inf
+
+        count = len(self._ids) - 1
+        if count <= 0:
+            return []
+        if self.size < count:
+            best = np.argpartition(-scores, self.size - 1)[:self.size]
+        else:
+            best = np.flatnonzero(np.isfinite(scores))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [self._entry(int(other), scores, similarities, same_category, overlap) for other in best]
+
+    def _entry(self, other: int, scores: np.ndarray, similarities: np.ndarray, same_category: np.ndarray,
+               overlap: Dict[int, int]) -> Dict[str, Any]:
+        """Neighbour entry for row `other` from the score components of one process."""
+        return {
+            "process_id": self._ids[other],
+            "score": float(scores[other]),
+            "similarity": float(similarities[other]),
+            "same_category": bool(same_category[other]),
+            "keyword_overlap": overlap.get(other, 0)
+        }
+
+    def build(self, processes: Dict[str, Tuple[Optional[Sequence[float]], str, Iterable[str]]]) -> None:
+        """
+        Rebuild the whole table.
+
+        Args:
+            processes: Dictionary mapping process IDs to (embedding or None,
+                category, keywords)
+        """
+        with self._lock:
+            self.clear()
+            dimension = next(
+                (len(embedding) for embedding, _, _ in processes.values() if embedding is not None), 0
+            )
+
+            self._ids = list(processes)
+            self._rows = {process_id: row for row, process_id in enumerate(self._ids)}
+            self._vectors = np.zeros((len(self._ids), dimension), dtype=np.float32)
+            self._category_codes = np.zeros(len(self._ids), dtype=np.int32)
+            for row, (process_id, (embedding, category, keywords)) in enumerate(processes.items()):
+                self._vectors[row] = self._vector(embedding, dimension)
+                self._category_codes[row] = self._category_code(category)
+                self._keywords[process_id] = frozenset(keywords)
+                for keyword in self._keywords[process_id]:
+                    self._postings[keyword].add(process_id)
+
+            for start in range(0, len(self._ids), self.BLOCK_ROWS):
+                block = self._vectors[start:start + self.BLOCK_ROWS] @ self._vectors.T
+                for offset, similarities in enumerate(block):
+                    row = start + offset
+                    self._neighbours[self._ids[row]] = self._top_neighbours(row, similarities)
+
+            logger.info(f"Built neighbour table for {len(self._ids)} processes")
+
+    def upsert(self, process_id: str, embedding: Optional[Sequence[float]], category: str,
+               keywords: Iterable[str]) -> None:
+        """
+        Add or update one process, refreshing only the neighbour lists it affects.
+
+        Args:
+            process_id: ID of the process
+            embedding: Embedding of the process, or None if it has none
+            category: Category of the process
+            keywords: Keywords of the process
+        """
+        with self._lock:
+            if self._vectors.shape[1] == 0 and embedding is not None:
+                # First embedding seen: size the matrix to its dimension
+                self._vectors = np.zeros((len(self._ids), len(embedding)), dtype=np.float32)
+
+            for keyword in self._keywords.get(process_id, ()):
+                self._postings[keyword].discard(process_id)
+            self._keywords[process_id] = frozenset(keywords)
+            for keyword in self._keywords[process_id]:
+                self._postings[keyword].add(process_id)
+
+            vector = self._vector(embedding, self._vectors.shape[1])
+            code = self._category_code(category)
+            row = self._rows.get(process_id)
+            if row is None:
+                row = len(self._ids)
+                self._ids.append(process_id)
+                self._rows[process_id] = row
+                self._vectors = np.vstack([self._vectors, vector[None, :]])
+                self._category_codes = np.append(self._category_codes, np.int32(code))
+            else:
+                self._vectors[row] = vector
+                self._category_codes[row] = code
+
+            similarities = self._vectors @ self._vectors[row]
+            self._neighbours[process_id] = self._top_neighbours(row, similarities)
+
+            # Pair scores are symmetric, so the same row updates everyone else's view of this process
+            scores, same_category, overlap = self._pair_scores(row, similarities)
+            for other, other_id in enumerate(self._ids):
+                if other == row:
+                    continue
+                current = self._neighbours.get(other_id, [])
+                rest = [entry for entry in current if entry["process_id"] != process_id]
+                score = float(scores[other])
+                if len(rest) < len(current) and len(current) >= self.size and (not rest or score < rest[-1]["score"]):
+                    # It dropped out of a full list: the process that takes its place is unknown
+                    self._refresh_row(other)
+                    continue
+                if len(rest) < self.size or score > rest[-1]["score"]:
+                    rest.append({
+                        "process_id": process_id,
+                        "score": score,
+                        "similarity": float(similarities[other]),
+                        "same_category": bool(same_category[other]),
+                        "keyword_overlap": overlap.get(other, 0)
+                    })
+                    rest.sort(key=lambda entry: entry["score"], reverse=True)
+                    rest = rest[:self.size]
+                self._neighbours[other_id] = rest
+
+    def remove(self, process_id: str) -> bool:
+        """
+        Remove one process, refreshing the neighbour lists that contained it.
+
+        Args:
+            process_id: ID of the process
+
+        Returns:
+            True if the process was in the table, False otherwise
+        """
+        with self._lock:
+            row = self._rows.pop(process_id, None)
+            if row is None:
+                return False
+
+            for keyword in self._keywords.pop(process_id, ()):
+                self._postings[keyword].discard(process_id)
+            self._neighbours.pop(process_id, None)
+            del self._ids[row]
+            self._vectors = np.delete(self._vectors, row, axis=0)
+            self._category_codes = np.delete(self._category_codes, row)
+            self._rows = {item_id: index for index, item_id in enumerate(self._ids)}
+
+            for other, other_id in enumerate(self._ids):
+                if any(entry["process_id"] == process_id for entry in self._neighbours.get(other_id, [])):
+                    self._refresh_row(other)
+            return True
+
+    def _refresh_row(self, row: int) -> None:
+        """Recompute the neighbour list of one process from scratch."""
+        self._neighbours[self._ids[row]] = self._top_neighbours(row, self._vectors @ self._vectors[row])
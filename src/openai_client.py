@@ -0,0 +1,136 @@
+"""
+OpenAI Client Pool for Brandworkz AI Agent
+
+This module provides the shared OpenAI clients used for embeddings and chat.
+Both the synchronous and the async client sit on a single pooled httpx
+client each, with keep-alive, bounded pool sizes and explicit timeouts, so
+concurrent requests reuse a small number of warm connections instead of
+every component opening its own.
+"""
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:
+    from openai import OpenAI, AsyncOpenAI
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class OpenAIClientPool:
+    """Lazily created sync and async OpenAI clients sharing pooled HTTP connections."""
+
+    def __init__(self, api_key: str, max_connections: int = 20, max_keepalive_connections: int = 10,
+                 keepalive_expiry: float = 30.0, timeout: float = 30.0, connect_timeout: float = 5.0,
+                 http2: bool = False, max_retries: int = 2):
+        """
+        Initialize the pool settings; `openai` and `httpx` are not imported and
+        no connection is opened until a client is first used.
+
+        Args:
+            api_key: OpenAI API key
+            max_connections: Maximum open connections per client
+            max_keepalive_connections: Idle connections kept warm per client
+            keepalive_expiry: Seconds an idle connection is kept open
+            timeout: Seconds to wait for a response
+            connect_timeout: Seconds to wait for a connection to be established
+            http2: Use HTTP/2 (requires the `h2` package)
+            max_retries: Retries the OpenAI client makes on transient errors
+        """
+        self.api_key = api_key
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("HTTP/2 requested but the 'h2' package is not installed, using HTTP/1.1")
+                http2 = False
+        self.http2 = http2
+
+        self._lock = threading.Lock()
+        self._client = None
+        self._async_client = None
+
+    def _http_options(self) -> Dict[str, Any]:
+        """Pool limits and timeouts shared by the sync and async `httpx` clients."""
+        import httpx
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry
+            ),
+            "timeout": httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            "http2": self.http2
+        }
+
+    @property
+    def client(self) -> "OpenAI":
+        """Synchronous OpenAI client on a pooled `httpx.Client`."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import httpx
+                    from openai import OpenAI
+                    self._client = OpenAI(
+                        api_key=self.api_key,
+                        max_retries=self.max_retries,
+                        http_client=httpx.Client(**self._http_options())
+                    )
+        return self._client
+
+    @property
+    def async_client(self) -> "AsyncOpenAI":
+        """Async OpenAI client on a pooled `httpx.AsyncClient`."""
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    import httpx
+                    from openai import AsyncOpenAI
+                    self._async_client = AsyncOpenAI(
+                        api_key=self.api_key,
+                        max_retries=self.max_retries,
+                        http_client=httpx.AsyncClient(**self._http_options())
+                    )
+        return self._async_client
+
+    async def aembed(self, texts: List[str], model: str) -> List[List[float]]:
+        """
+        Embed a batch of texts without blocking the event loop.
+
+        Args:
+            texts: Texts to embed
+            model: OpenAI embedding model
+
+        Returns:
+            One embedding per text, in the same order
+        """
+        response = await self.async_client.embeddings.create(model=model, input=texts)
+        embeddings = [None] * len(texts)
+        # Each result carries the index of its input within the batch
+        for item in response.data:
+            embeddings[item.index] = item.embedding
+        return embeddings
+
+    def close(self) -> None:
+        """Close the synchronous client's connections."""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self) -> None:
+        """Close both clients' connections."""
+        self.close()
+        with self._lock:
+            async_client, self._async_client = self._async_client, None
+        if async_client is not None:
+            await async_client.close()
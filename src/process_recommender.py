@@ -5,14 +5,19 @@ This module provides functionality to recommend related processes
 based on semantic similarity and common usage patterns.
 """
 
-import os
-import json
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-import numpy as np
+import threading
+from typing import List, Dict, Any, Optional, Tuple
 
-from config.config import generate_embedding, PROCESS_INSTRUCTIONS, PROCESS_EMBEDDINGS
-from src.analytics import analytics
+from config.config import (
+    generate_embeddings,
+    get_process_embedding,
+    get_process_catalog,
+    get_catalog_version,
+    RECOMMENDER_NEIGHBOURS
+)
+from src.analytics import get_process_analytics
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -21,76 +26,121 @@ logger = logging.getLogger(__name__)
 class ProcessRecommender:
     """Provides recommendations for related processes."""
     
-    def __init__(self):
-        """Initialize the process recommender."""
+    def __init__(self, neighbour_count: int = RECOMMENDER_NEIGHBOURS):
+        """
+        Initialize the process recommender.
+        
+        Args:
+            neighbour_count: Related processes precomputed per process; popularity
+                re-ranks these at request time
+        """
         self.process_cache = {}
-        self._load_processes()
+        # Embeddings generated for processes that have no in-memory embedding (e.g. in vector store mode)
+        self.embedding_cache = {}
+        from src.neighbour_table import NeighbourTable
+        self.neighbours = NeighbourTable(size=neighbour_count)
+        self._lock = threading.Lock()
+        self._catalog_version = None
+        self.refresh()
     
-    def _load_processes(self) -> None:
-        """Load all processes for recommendation."""
-        self.process_cache = {}
-        
-        # Find all process files
-        processes_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'processes')
-        
-        for root, _, files in os.walk(processes_dir):
-            for filename in files:
-                if filename.endswith(".json") and filename != "navigate_to.json":
-                    try:
-                        file_path = os.path.join(root, filename)
-                        process_id = os.path.splitext(filename)[0]
-                        
-                        with open(file_path, 'r') as f:
-                            process_data = json.load(f)
-                            
-                        # Add to cache
-                        self.process_cache[process_id] = {
-                            "title": process_data.get("title", ""),
-                            "description": process_data.get("description", ""),
-                            "keywords": process_data.get("keywords", []),
-                            "category": os.path.basename(root) if os.path.basename(root) != "processes" else "other"
-                        }
-                    except Exception as e:
-                        logger.error(f"Error loading process {filename}: {e}")
+    def _load_processes(self) -> Dict[str, Dict[str, Any]]:
+        """Get the fields used for recommendation from the loaded process catalog."""
+        processes = {}
+        for process_id, entry in get_process_catalog().items():
+            if process_id == "navigate_to":
+                continue
+            process_data = entry["data"]
+            processes[process_id] = {
+                "title": process_data.get("title", ""),
+                "description": process_data.get("description", ""),
+                "keywords": process_data.get("keywords", []),
+                "category": entry["category"],
+                "hash": entry["hash"],
+                # An embedding filled in later (e.g. after a failed load) changes the neighbours too
+                "embedded": get_process_embedding(process_id) is not None
+            }
+        return processes
     
-    def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
-        """Calculate cosine similarity between two vectors."""
-        if not vec1 or not vec2:
-            return 0.0
-            
-        dot_product = np.dot(vec1, vec2)
-        norm_a = np.linalg.norm(vec1)
-        norm_b = np.linalg.norm(vec2)
+    def _is_changed(self, process_id: str, process: Dict[str, Any]) -> bool:
+        """Check whether a process's embedding or neighbour features may differ from the cached ones."""
+        cached = self.process_cache.get(process_id)
+        if cached is None:
+            return True
+        # Any edit to the file, steps included, can change the process embedding
+        return any(cached[field] != process[field] for field in ("hash", "category", "embedded"))
+    
+    def refresh(self) -> None:
+        """
+        Bring the process cache and neighbour table up to date with the catalog.
         
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
+        The table is built in full on the first load; afterwards only the
+        processes that were added, changed or removed are updated.
+        """
+        with self._lock:
+            catalog_version = get_catalog_version()
+            processes = self._load_processes()
+            changed = [process_id for process_id, process in processes.items() if self._is_changed(process_id, process)]
+            removed = [process_id for process_id in self.process_cache if process_id not in processes]
             
-        return dot_product / (norm_a * norm_b)
+            self.process_cache = processes
+            for process_id in changed + removed:
+                self.embedding_cache.pop(process_id, None)
+            
+            # Embed every process lacking an embedding in one batch instead of one call each
+            self._ensure_embeddings()
+            
+            if len(self.neighbours) == 0 or len(changed) + len(removed) > len(processes) // 2:
+                self.neighbours.build({process_id: self._neighbour_features(process_id) for process_id in processes})
+            else:
+                for process_id in removed:
+                    self.neighbours.remove(process_id)
+                for process_id in changed:
+                    self.neighbours.upsert(process_id, *self._neighbour_features(process_id))
+                if changed or removed:
+                    logger.info(f"Updated neighbour table: {len(changed)} changed, {len(removed)} removed")
+            
+            self._catalog_version = catalog_version
+    
+    def _embedding_text(self, process_id: str) -> str:
+        """Build the text embedded for a process that has no shared embedding."""
+        process = self.process_cache[process_id]
+        text = process["title"] + " " + process["description"]
+        if process["keywords"]:
+            text += " " + " ".join(process["keywords"])
+        return text
+    
+    def _ensure_embeddings(self) -> None:
+        """Generate missing process embeddings with batched requests on the shared client."""
+        missing = [
+            process_id for process_id in self.process_cache
+            if process_id not in self.embedding_cache and get_process_embedding(process_id) is None
+        ]
+        if missing:
+            embeddings = generate_embeddings([self._embedding_text(process_id) for process_id in missing])
+            for process_id, embedding in zip(missing, embeddings):
+                if embedding:
+                    self.embedding_cache[process_id] = embedding
     
     def _get_process_embedding(self, process_id: str) -> Optional[List[float]]:
         """Get embedding for a process."""
-        # Check if embedding already exists
-        if process_id in PROCESS_EMBEDDINGS:
-            return PROCESS_EMBEDDINGS[process_id]
-        
-        # Generate new embedding
-        if process_id in self.process_cache:
-            process = self.process_cache[process_id]
-            text = process["title"] + " " + process["description"]
-            if process["keywords"]:
-                text += " " + " ".join(process["keywords"])
-            
-            embedding = generate_embedding(text)
-            if embedding:
-                PROCESS_EMBEDDINGS[process_id] = embedding
-                return embedding
-        
-        return None
+        # Reuse the shared in-memory or quantized embedding instead of keeping a second copy
+        embedding = get_process_embedding(process_id)
+        if embedding is not None:
+            return embedding
+        return self.embedding_cache.get(process_id)
+    
+    def _neighbour_features(self, process_id: str) -> Tuple[Optional[List[float]], str, List[str]]:
+        """Get the embedding, category and keywords the neighbour table scores a process by."""
+        process = self.process_cache[process_id]
+        return self._get_process_embedding(process_id), process["category"], process["keywords"]
     
     def get_related_processes(self, process_id: str, limit: int = 3) -> List[Dict[str, Any]]:
         """
         Get related processes based on semantic similarity and usage patterns.
         
+        Similarity, category and keyword scores come from the precomputed
+        neighbour table; only the popularity bonus is applied per request.
+        
         Args:
             process_id: Process ID to find related processes for
             limit: Maximum number of recommendations to return
@@ -98,77 +148,36 @@ class ProcessRecommender:
         Returns:
             List of related process dictionaries with score and reason
         """
+        if self._catalog_version != get_catalog_version():
+            self.refresh()
+        
         if process_id not in self.process_cache:
             return []
         
-        target_process = self.process_cache[process_id]
-        target_category = target_process["category"]
-        
-        results = []
-        
-        # Get embedding for target process
-        target_embedding = self._get_process_embedding(process_id)
-        
-        # Calculate similarity scores for all processes
-        similarity_scores = {}
-        category_matches = {}
-        keyword_overlap = {}
-        
-        for pid, process in self.process_cache.items():
-            if pid == process_id:
-                continue
-            
-            # Calculate semantic similarity if embeddings are available
-            score = 0.0
-            if target_embedding:
-                process_embedding = self._get_process_embedding(pid)
-                if process_embedding:
-                    score = self._cosine_similarity(target_embedding, process_embedding)
-            
-            similarity_scores[pid] = score
-            
-            # Check if in same category
-            if process["category"] == target_category:
-                category_matches[pid] = True
-            
-            # Calculate keyword overlap
-            if "keywords" in target_process and "keywords" in process:
-                target_keywords = set(target_process["keywords"])
-                process_keywords = set(process["keywords"])
-                overlap = len(target_keywords.intersection(process_keywords))
-                if overlap > 0:
-                    keyword_overlap[pid] = overlap
-        
         # Get popular processes from analytics
         popular_processes = {
             item["process"]: item["count"] 
-            for item in analytics.get_popular_processes(limit=10)
+            for item in get_process_analytics().get_popular_processes(limit=10)
         }
         
-        # Scoring
         process_scores = []
-        for pid, process in self.process_cache.items():
-            if pid == process_id:
+        for neighbour in self.neighbours.neighbours(process_id):
+            pid = neighbour["process_id"]
+            process = self.process_cache.get(pid)
+            if process is None:
                 continue
             
-            # Base score is semantic similarity (0-1)
-            score = similarity_scores.get(pid, 0.0)
-            
-            # Add bonus for same category (0.2)
-            if pid in category_matches:
-                score += 0.2
-            
-            # Add bonus for keyword overlap (0.1 per keyword, max 0.3)
-            overlap = keyword_overlap.get(pid, 0)
-            score += min(overlap * 0.1, 0.3)
+            # Precomputed: semantic similarity (0-1), same category (0.2) and keyword overlap (0.1 per keyword, max 0.3)
+            score = neighbour["score"]
             
             # Add bonus for popularity (0.1 for being in top 10)
             if pid in popular_processes:
                 score += 0.1
             
             # Determine reason for recommendation
+            overlap = neighbour["keyword_overlap"]
             reason = "Related process"
-            if pid in category_matches:
+            if neighbour["same_category"]:
                 reason = "Same category"
             elif overlap > 0:
                 reason = f"Similar keywords ({overlap} common)"
@@ -187,6 +196,37 @@ class ProcessRecommender:
         
         # Return top N recommendations
         return process_scores[:limit]
+    
+    async def aget_related_processes(self, process_id: str, limit: int = 3) -> List[Dict[str, Any]]:
+        """
+        Get related processes without blocking the event loop when the catalog changed.
+        
+        Args:
+            process_id: Process ID to find related processes for
+            limit: Maximum number of recommendations to return
+            
+        Returns:
+            List of related process dictionaries with score and reason
+        """
+        if self._catalog_version != get_catalog_version():
+            # Re-reading files and embedding changed processes happens off the event loop
+            await asyncio.to_thread(self.refresh)
+        return self.get_related_processes(process_id, limit=limit)
 
-# Singleton instance
-recommender = ProcessRecommender()
+# Singleton instance, built on first use once the catalog is loaded
+_recommender = None
+_recommender_lock = threading.Lock()
+
+def get_recommender() -> ProcessRecommender:
+    """
+    Get the shared process recommender.
+    
+    Returns:
+        The ProcessRecommender instance, building its neighbour table on the first call
+    """
+    global _recommender
+    if _recommender is None:
+        with _recommender_lock:
+            if _recommender is None:
+                _recommender = ProcessRecommender()
+    return _recommender
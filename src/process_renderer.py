@@ -0,0 +1,362 @@
+"""
+Process Response Rendering for Brandworkz AI Agent
+
+This module provides the markdown rendering of process answers and guides,
+and a cache of rendered responses keyed by process ID and file content hash.
+Each process is rendered once when the catalog loads or changes; the cache
+keeps the markdown, the JSON body the API returns for it, a gzip copy of
+that body and a server-sent event carrying it, so endpoints serve process
+answers without formatting anything.
+"""
+
+import json
+import gzip
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_BYTES = 512
+
+def encode_json(data: Any) -> bytes:
+    """Encode data exactly as JSONResponse would."""
+    return json.dumps(
+        data,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+def encode_sse_event(event: str, data: Any) -> bytes:
+    """
+    Encode a server-sent event with a JSON payload.
+
+    Args:
+        event: Name of the event
+        data: JSON-serializable payload
+
+    Returns:
+        The event, ready to be written to a text/event-stream response
+    """
+    # Compact JSON never contains a newline, so the payload fits on one data line
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + encode_json(data) + b"\n\n"
+
+def render_process_answer(process_data: Dict[str, Any]) -> str:
+    """
+    Render the chat answer for a matched process.
+
+    Args:
+        process_data: The process data from the JSON file
+
+    Returns:
+        Markdown with the title, description, steps, troubleshooting and tips
+    """
+    # Start with the title and description
+    response_parts = []
+
+    if "title" in process_data:
+        response_parts.append(f"# {process_data['title']}\n")
+
+    if "description" in process_data:
+        response_parts.append(f"{process_data['description']}\n")
+
+    # Add steps section
+    if "steps" in process_data and process_data["steps"]:
+        response_parts.append("\n## Steps\n")
+        for i, step in enumerate(process_data["steps"], 1):
+            response_parts.append(f"{i}. {step}")
+
+    # Add troubleshooting section if present
+    if "troubleshooting" in process_data and process_data["troubleshooting"]:
+        response_parts.append("\n## Troubleshooting\n")
+        for issue in process_data["troubleshooting"]:
+            response_parts.append(f"- {issue}")
+
+    # Add tips section if present
+    if "tips" in process_data and process_data["tips"]:
+        response_parts.append("\n## Tips\n")
+        for tip in process_data["tips"]:
+            response_parts.append(f"- {tip}")
+
+    # Join all parts with newlines
+    return "\n".join(response_parts)
+
+def format_process_steps(instructions: Union[List[str], Dict[str, Any], None]) -> Optional[str]:
+    """
+    Format process instructions with rich structure for complex processes.
+
+    Args:
+        instructions: A list of steps, or the structured process data
+
+    Returns:
+        Formatted string with the process guide or None if there is nothing to format
+    """
+    if not instructions:
+        return None
+
+    # Handle simple list-based process instructions
+    if isinstance(instructions, list):
+        formatted_steps = []
+        for i, step in enumerate(instructions):
+            # Format with the number followed by the step in a way that makes it clear these are exact instructions
+            formatted_steps.append(f"Step {i+1}: {step}")
+
+        # Join with double newlines for better spacing between steps
+        return "\n\n".join(formatted_steps)
+
+    # Handle complex structured process instructions
+    if isinstance(instructions, dict):
+        result = []
+
+        # Add description if available
+        if 'description' in instructions:
+            result.append(f"{instructions['description']}")
+            result.append("")  # Add an empty line after description
+
+        # Add prerequisites if any
+        if 'prerequisites' in instructions:
+            result.append("### Prerequisites")
+            result.append("")  # Add an empty line after header
+            for prereq in instructions['prerequisites']:
+                result.append(f"- {prereq}")
+            result.append("")  # Add an empty line for spacing
+
+        # Add sections
+        if 'sections' in instructions:
+            for i, section in enumerate(instructions['sections']):
+                section_name = section.get('name', f'Section {i+1}')
+                result.append(f"### {section_name}")
+                result.append("")  # Add empty line after section header
+
+                # Add steps as a properly formatted numbered list
+                if 'steps' in section:
+                    for j, step in enumerate(section['steps']):
+                        # Use standard markdown numbered list format
+                        result.append(f"{j+1}. {step}")
+                    result.append("")  # Add spacing between steps and notes
+
+                # Add notes if any
+                if 'notes' in section:
+                    result.append(f"**Note:** {section['notes']}")
+                    result.append("")  # Add spacing after notes
+
+                # Add tips if any
+                if 'tips' in section:
+                    result.append(f"**Tip:** {section['tips']}")
+                    result.append("")  # Add spacing after tips
+
+                # Add troubleshooting if any
+                if 'troubleshooting' in section:
+                    result.append("**Troubleshooting:**")
+                    result.append("")  # Add empty line after troubleshooting header
+                    for issue in section['troubleshooting']:
+                        result.append(f"- {issue}")
+                    result.append("")  # Add spacing after troubleshooting
+
+                result.append("")  # Add extra spacing between sections
+
+        # Join with single newline since we've already added empty lines
+        return "\n".join(result)
+
+    return None
+
+def process_instructions(process_data: Dict[str, Any]) -> Union[List[str], Dict[str, Any]]:
+    """
+    Get the instructions stored for a process: its steps, or the whole structured process.
+
+    Args:
+        process_data: The process data from the JSON file
+
+    Returns:
+        The list of steps for simple processes, otherwise the process data itself
+    """
+    if 'steps' in process_data:
+        # Simple process with just steps
+        return process_data['steps']
+    # Complex process with structured data
+    return process_data
+
+def render_process_guide(process_name: str, instructions: Union[List[str], Dict[str, Any], None]) -> Optional[str]:
+    """
+    Render the step-by-step guide for a process.
+
+    Args:
+        process_name: Name of the process
+        instructions: A list of steps, or the structured process data
+
+    Returns:
+        Markdown guide, or None if the process has no instructions
+    """
+    formatted_guide = format_process_steps(instructions)
+    if not formatted_guide:
+        return None
+
+    friendly_process_name = process_name.replace('_', ' ')
+
+    # Format the guide with proper markdown for a numbered list
+    return f"""## How to {friendly_process_name.title()}
+
+I'd be happy to guide you through the process of {friendly_process_name}! Follow these steps:
+
+{formatted_guide}
+
+**Need more help?** If you have questions about any of these steps, please ask and I'll provide more detailed guidance. I'm here to help make your experience with Brandworkz as smooth as possible!"""
+
+class RenderedResponse:
+    """A rendered response with the API body for it pre-encoded."""
+
+    __slots__ = ("text", "body", "_gzip_body", "_sse_event")
+
+    def __init__(self, text: str, success: bool = True):
+        """
+        Render the API body for a response.
+
+        Args:
+            text: Markdown of the response
+            success: Value of the body's "success" field
+        """
+        self.text = text
+        # Encoded exactly as JSONResponse would, so either can serve it
+        self.body = encode_json({"response": text, "success": success})
+        self._gzip_body = None
+        self._sse_event = None
+
+    @property
+    def gzip_body(self) -> Optional[bytes]:
+        """Gzip-compressed body, compressed on first use; None if the body is too small to benefit."""
+        if len(self.body) < GZIP_MIN_BYTES:
+            return None
+        if self._gzip_body is None:
+            # mtime=0 keeps the output identical for identical bodies
+            self._gzip_body = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzip_body
+
+    @property
+    def sse_event(self) -> bytes:
+        """The body as an "answer" server-sent event, built on first use."""
+        if self._sse_event is None:
+            self._sse_event = b"event: answer\ndata: " + self.body + b"\n\n"
+        return self._sse_event
+
+class RenderedResponseCache:
+    """Rendered answer and guide of every process, keyed by process ID and content hash."""
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self._lock = threading.Lock()
+        # Process ID -> (content hash, chat answer, guide or None)
+        self._entries: Dict[str, Tuple[str, RenderedResponse, Optional[RenderedResponse]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.renders = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def has(self, process_id: str, content_hash: str) -> bool:
+        """
+        Check whether a process is rendered for this content hash.
+
+        Args:
+            process_id: ID of the process
+            content_hash: Hash of the process file content
+
+        Returns:
+            True if its responses are cached, False otherwise
+        """
+        entry = self._entries.get(process_id)
+        return entry is not None and entry[0] == content_hash
+
+    def update(self, process_id: str, content_hash: str, process_data: Dict[str, Any]) -> None:
+        """
+        Render a process unless it is already cached for this content hash.
+
+        Args:
+            process_id: ID of the process
+            content_hash: Hash of the process file content
+            process_data: The process data from the JSON file
+        """
+        if self.has(process_id, content_hash):
+            return
+
+        guide = render_process_guide(process_id, process_instructions(process_data))
+        rendered = (
+            content_hash,
+            RenderedResponse(render_process_answer(process_data)),
+            RenderedResponse(guide) if guide else None
+        )
+        with self._lock:
+            self._entries[process_id] = rendered
+            self.renders += 1
+
+    def remove(self, process_id: str) -> None:
+        """
+        Drop the rendered responses of a process.
+
+        Args:
+            process_id: ID of the process
+        """
+        with self._lock:
+            self._entries.pop(process_id, None)
+
+    def clear(self) -> None:
+        """Drop every rendered response (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, process_id: str, index: int, content_hash: Optional[str]) -> Optional[RenderedResponse]:
+        """Look up one rendered response, counting hits and misses."""
+        entry = self._entries.get(process_id)
+        if entry is None or (content_hash is not None and entry[0] != content_hash) or entry[index] is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[index]
+
+    def answer(self, process_id: str, content_hash: Optional[str] = None) -> Optional[RenderedResponse]:
+        """
+        Get the rendered chat answer of a process.
+
+        Args:
+            process_id: ID of the process
+            content_hash: If given, only a rendering of this content is returned
+
+        Returns:
+            The rendered answer, or None if it is not cached
+        """
+        return self._get(process_id, 1, content_hash)
+
+    def guide(self, process_id: str, content_hash: Optional[str] = None) -> Optional[RenderedResponse]:
+        """
+        Get the rendered guide of a process.
+
+        Args:
+            process_id: ID of the process
+            content_hash: If given, only a rendering of this content is returned
+
+        Returns:
+            The rendered guide, or None if it is not cached or the process has no instructions
+        """
+        return self._get(process_id, 2, content_hash)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with the number of cached processes, hits, misses,
+            hit rate and renders
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "renders": self.renders
+        }
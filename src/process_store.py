@@ -0,0 +1,156 @@
+"""
+Process Store for Brandworkz AI Agent
+
+This module provides a compact keyed store for full process payloads. The
+vector store only keeps the fields needed for ranking, and the complete
+process (steps, sections, troubleshooting, ...) is fetched from here for the
+processes that are actually shown.
+"""
+
+import os
+import json
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def encode_payload(process_data: Dict[str, Any]) -> bytes:
+    """Serialize a process as compact, key-sorted JSON"""
+    return json.dumps(process_data, separators=(",", ":"), sort_keys=True, ensure_ascii=False).encode('utf-8')
+
+def content_hash(process_data: Dict[str, Any]) -> str:
+    """Get the SHA-256 hex digest of a process's canonical JSON encoding"""
+    return hashlib.sha256(encode_payload(process_data)).hexdigest()
+
+class ProcessStore:
+    """SQLite-backed store of zlib-compressed process payloads keyed by process ID."""
+
+    def __init__(self, db_path: str):
+        """
+        Initialize the process store.
+
+        Args:
+            db_path: Path to the SQLite file used for storage
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS payloads (
+                process_id TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                payload BLOB NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def put_many(self, processes: Dict[str, Dict[str, Any]]) -> bool:
+        """
+        Store or replace several process payloads.
+
+        Args:
+            processes: Dictionary mapping process IDs to process data
+
+        Returns:
+            True if successful, False otherwise
+        """
+        rows = []
+        for process_id, process_data in processes.items():
+            encoded = encode_payload(process_data)
+            rows.append((process_id, hashlib.sha256(encoded).hexdigest(), zlib.compress(encoded)))
+        if not rows:
+            return True
+
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO payloads (process_id, content_hash, payload) VALUES (?, ?, ?)",
+                    rows
+                )
+                self._conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error writing process payloads: {e}")
+            return False
+
+    def get(self, process_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a process payload.
+
+        Args:
+            process_id: ID of the process
+
+        Returns:
+            The process data, or None if it is not stored
+        """
+        return self.get_many([process_id]).get(process_id)
+
+    def get_many(self, process_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get several process payloads.
+
+        Args:
+            process_ids: IDs of the processes
+
+        Returns:
+            Dictionary mapping the stored IDs to their process data
+        """
+        process_ids = list(dict.fromkeys(process_ids))
+        payloads = {}
+        try:
+            with self._lock:
+                # Stay well below SQLite's bound-parameter limit
+                for start in range(0, len(process_ids), 500):
+                    chunk = process_ids[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._conn.execute(
+                        f"SELECT process_id, payload FROM payloads WHERE process_id IN ({placeholders})",
+                        chunk
+                    ).fetchall()
+                    for process_id, payload in rows:
+                        payloads[process_id] = json.loads(zlib.decompress(payload))
+        except Exception as e:
+            logger.error(f"Error reading process payloads: {e}")
+        return payloads
+
+    def delete_many(self, process_ids: Iterable[str]) -> bool:
+        """
+        Delete several process payloads.
+
+        Args:
+            process_ids: IDs of the processes
+
+        Returns:
+            True if successful, False otherwise
+        """
+        rows = [(process_id,) for process_id in process_ids]
+        try:
+            with self._lock:
+                self._conn.executemany("DELETE FROM payloads WHERE process_id = ?", rows)
+                self._conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting process payloads: {e}")
+            return False
+
+    def count(self) -> int:
+        """Get the number of stored payloads."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM payloads").fetchone()[0]
+
+    def clear(self) -> None:
+        """Remove all stored payloads."""
+        with self._lock:
+            self._conn.execute("DELETE FROM payloads")
+            self._conn.commit()
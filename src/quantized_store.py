@@ -0,0 +1,502 @@
+"""
+Quantized Embedding Store for Brandworkz AI Agent
+
+This module provides an on-disk embedding matrix stored as int8 with a
+per-row scale (or as float16) that every worker opens with `np.memmap`, so
+the operating system's page cache shares one copy of the embeddings between
+processes. Searches scan the quantized matrix directly and can re-rank the
+best candidates against an optional float32 copy (which takes four times the
+disk space of int8 codes) that is only paged in for those rows. Replacing
+existing embeddings rewrites their rows in place; adding or removing
+embeddings publishes a new generation of the files.
+"""
+
+import os
+import re
+import json
+import glob
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within a process
+    fcntl = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = ("int8", "float16")
+
+class QuantizedEmbeddingStore:
+    """Memory-mapped, quantized cosine similarity index shared between workers."""
+
+    # Rows scored per block so dequantized temporaries stay small for large catalogs
+    BLOCK_ROWS = 8192
+
+    def __init__(self, directory: str, model_name: str, storage_format: str = "int8", rerank_candidates: int = 0):
+        """
+        Initialize the store and open the current embedding files, if any.
+
+        Args:
+            directory: Directory holding the embedding files
+            model_name: Embedding model name; each model gets its own files
+            storage_format: "int8" (per-row scale, 4x smaller than float32) or "float16" (2x smaller)
+            rerank_candidates: Number of top candidates re-scored with float32
+                embeddings; 0 disables re-ranking and the float32 copy, which
+                otherwise takes four times the disk space of int8 codes
+        """
+        if storage_format not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported embedding store format '{storage_format}', expected one of {SUPPORTED_FORMATS}")
+
+        self.directory = directory
+        self.model_name = model_name
+        self.storage_format = storage_format
+        self.rerank_candidates = max(0, rerank_candidates)
+        self._base = re.sub(r"[^A-Za-z0-9_.-]", "_", f"processes_{model_name}_{storage_format}")
+        self.meta_path = os.path.join(directory, f"{self._base}.json")
+        # Held by the worker writing a generation; the metadata file itself is replaced, so it can't be locked
+        self.lock_path = os.path.join(directory, f"{self._base}.lock")
+        self._lock = threading.RLock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._reset()
+        self._open()
+
+    def _reset(self) -> None:
+        """Forget the currently mapped generation (caller holds the lock or is initializing)."""
+        self._meta_stamp = None
+        self._generation = 0
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._full: Optional[np.ndarray] = None
+
+    def _file_path(self, generation: int, kind: str) -> str:
+        """Path of one of the array files of a generation."""
+        return os.path.join(self.directory, f"{self._base}.{generation}.{kind}.npy")
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        """Hold the inter-process lock that serializes writers of the store's files."""
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _temp_path(self, path: str) -> str:
+        """Name private to this writer under which a file is written before it is moved into place."""
+        return f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+
+    def _save_array(self, path: str, array: np.ndarray) -> None:
+        """Write an array file completely under a temporary name, then move it into place."""
+        temp_path = self._temp_path(path)
+        try:
+            with open(temp_path, 'wb') as f:
+                np.save(f, array)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _stamp(self) -> Optional[Tuple[int, int]]:
+        """Identity of the metadata file on disk, or None if it does not exist."""
+        try:
+            stat = os.stat(self.meta_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def _open(self) -> None:
+        """Map the generation named by the metadata file (caller holds the lock or is initializing)."""
+        stamp = self._stamp()
+        if stamp is None:
+            self._reset()
+            return
+
+        try:
+            with open(self.meta_path, 'r') as f:
+                meta = json.load(f)
+            generation = meta["generation"]
+            ids = meta["ids"]
+            codes = scales = full = None
+            if ids:
+                codes = np.load(self._file_path(generation, "codes"), mmap_mode='r')
+                if self.storage_format == "int8":
+                    scales = np.load(self._file_path(generation, "scales"), mmap_mode='r')
+                if meta.get("full_precision"):
+                    full = np.load(self._file_path(generation, "full"), mmap_mode='r')
+        except Exception as e:
+            logger.error(f"Error opening embedding store {self.meta_path}: {e}")
+            self._reset()
+            return
+
+        self._meta_stamp = stamp
+        self._generation = generation
+        self._ids = ids
+        self._rows = {item_id: row for row, item_id in enumerate(ids)}
+        self._fingerprints = meta.get("fingerprints", {})
+        self._codes = codes
+        self._scales = scales
+        self._full = full
+
+    def refresh(self) -> None:
+        """Re-map the embedding files if another worker has written a new generation."""
+        with self._lock:
+            if self._stamp() != self._meta_stamp:
+                self._open()
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        self.refresh()
+        return item_id in self._rows
+
+    @property
+    def ids(self) -> List[str]:
+        """IDs of the stored embeddings, in row order."""
+        self.refresh()
+        return list(self._ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the quantized matrix and scales that a full scan touches."""
+        with self._lock:
+            size = 0 if self._codes is None else self._codes.nbytes
+            if self._scales is not None:
+                size += self._scales.nbytes
+            return size
+
+    def fingerprint(self, item_id: str) -> Optional[str]:
+        """
+        Get the fingerprint recorded with an embedding.
+
+        Args:
+            item_id: ID of the item
+
+        Returns:
+            The fingerprint (e.g. a hash of the embedded text), or None if unknown
+        """
+        self.refresh()
+        return self._fingerprints.get(item_id)
+
+    def _dequantize(self, rows: np.ndarray) -> np.ndarray:
+        """Return the selected rows as float32 unit vectors (caller holds the lock)."""
+        if self._full is not None:
+            return np.asarray(self._full[rows], dtype=np.float32)
+        vectors = np.asarray(self._codes[rows], dtype=np.float32)
+        if self._scales is not None:
+            vectors *= self._scales[rows][:, None]
+        return vectors
+
+    def get(self, item_id: str) -> Optional[List[float]]:
+        """
+        Get a stored embedding.
+
+        Args:
+            item_id: ID of the item
+
+        Returns:
+            The unit-length embedding, or None if it is not stored
+        """
+        self.refresh()
+        with self._lock:
+            row = self._rows.get(item_id)
+            if row is None:
+                return None
+            return self._dequantize(np.array([row]))[0].tolist()
+
+    def _quantize(self, matrix: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Quantize unit-length float32 rows into codes and per-row scales."""
+        if self.storage_format == "float16":
+            return matrix.astype(np.float16), None
+
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def _write_meta(self, meta: Dict) -> None:
+        """Atomically replace the metadata file, which makes every worker re-map the store."""
+        temp_path = self._temp_path(self.meta_path)
+        with open(temp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(temp_path, self.meta_path)
+
+    def _can_update_in_place(self, vectors: Dict[str, np.ndarray], removals: set) -> bool:
+        """Check whether a change only replaces existing rows of the current generation (caller holds the lock)."""
+        return (
+            bool(vectors) and not removals and self._codes is not None
+            and all(item_id in self._rows and vector.shape[0] == self._codes.shape[1] for item_id, vector in vectors.items())
+            # A worker configured for re-ranking needs the float32 file a full rewrite adds
+            and bool(self.rerank_candidates) == (self._full is not None)
+        )
+
+    def _update_in_place(self, vectors: Dict[str, np.ndarray], fingerprints: Dict[str, str]) -> bool:
+        """
+        Overwrite the rows of existing embeddings in the current generation's files.
+
+        Costs a write of the changed rows instead of the whole matrix. Workers
+        map the files shared, so they see the new rows at once; the metadata
+        file is replaced afterwards to publish the new fingerprints. A reader
+        scanning at the same moment may score a row half-written, for that
+        one search only.
+
+        Args:
+            vectors: Unit-length embeddings keyed by IDs already in the store
+            fingerprints: Fingerprints recorded for the updated IDs
+
+        Returns:
+            True if the rows were written, False otherwise
+        """
+        rows = np.array([self._rows[item_id] for item_id in vectors])
+        matrix = np.stack(list(vectors.values()))
+        codes, scales = self._quantize(matrix)
+        arrays = [("codes", codes), ("scales", scales), ("full", matrix if self._full is not None else None)]
+
+        new_fingerprints = dict(self._fingerprints)
+        for item_id in vectors:
+            if item_id in fingerprints:
+                new_fingerprints[item_id] = fingerprints[item_id]
+            else:
+                new_fingerprints.pop(item_id, None)
+
+        try:
+            for kind, values in arrays:
+                if values is None:
+                    continue
+                writable = np.load(self._file_path(self._generation, kind), mmap_mode='r+')
+                writable[rows] = values
+                writable.flush()
+                del writable
+            self._write_meta({
+                "generation": self._generation,
+                "model": self.model_name,
+                "format": self.storage_format,
+                "full_precision": self._full is not None,
+                "ids": self._ids,
+                "fingerprints": new_fingerprints
+            })
+        except Exception as e:
+            logger.error(f"Error updating embedding store {self.meta_path} in place: {e}")
+            return False
+
+        self._open()
+        logger.info(f"Embedding store generation {self._generation}: updated {len(rows)} embeddings in place")
+        return True
+
+    def apply(self, upserts: Dict[str, Sequence[float]], removals: Iterable[str] = (),
+              fingerprints: Optional[Dict[str, str]] = None) -> bool:
+        """
+        Add, replace and remove embeddings.
+
+        A change that only replaces existing embeddings rewrites their rows in
+        place. Otherwise a new generation is written next to the current one
+        and becomes visible to every worker at once when the metadata file is
+        atomically replaced. Writers in other workers are serialized by a file
+        lock, so each one builds on the latest generation.
+
+        Args:
+            upserts: Dictionary mapping IDs to embeddings to add or replace
+            removals: IDs to remove
+            fingerprints: Optional fingerprints recorded for the upserted IDs
+
+        Returns:
+            True if the change was written, False otherwise
+        """
+        removals = set(removals)
+        fingerprints = fingerprints or {}
+
+        vectors = {}
+        for item_id, embedding in upserts.items():
+            vector = np.asarray(embedding, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            if norm == 0:
+                logger.warning(f"Not storing zero-length embedding for {item_id}")
+                continue
+            vectors[item_id] = vector / norm
+
+        with self._lock, self._write_lock():
+            # Another worker may have published a generation since this one was mapped
+            self.refresh()
+            removals &= set(self._rows)
+            if not vectors and not removals:
+                return True
+            if self._can_update_in_place(vectors, removals):
+                return self._update_in_place(vectors, fingerprints)
+
+            kept = [item_id for item_id in self._ids if item_id not in removals and item_id not in vectors]
+            dimensions = {vector.shape[0] for vector in vectors.values()}
+            if self._codes is not None and kept:
+                dimensions.add(self._codes.shape[1])
+            if len(dimensions) > 1:
+                logger.error(f"Embedding store {self.meta_path} received embeddings of mixed dimensions {sorted(dimensions)}")
+                return False
+
+            ids = kept + list(vectors)
+            new_fingerprints = {item_id: self._fingerprints[item_id] for item_id in kept if item_id in self._fingerprints}
+            new_fingerprints.update({item_id: fingerprints[item_id] for item_id in vectors if item_id in fingerprints})
+
+            generation = self._generation + 1
+            meta = {
+                "generation": generation,
+                "model": self.model_name,
+                "format": self.storage_format,
+                "full_precision": bool(self.rerank_candidates),
+                "ids": ids,
+                "fingerprints": new_fingerprints
+            }
+
+            try:
+                if ids:
+                    matrix = np.empty((len(ids), dimensions.pop()), dtype=np.float32)
+                    if kept:
+                        matrix[:len(kept)] = self._dequantize(np.array([self._rows[item_id] for item_id in kept]))
+                    for row, item_id in enumerate(vectors, len(kept)):
+                        matrix[row] = vectors[item_id]
+
+                    codes, scales = self._quantize(matrix)
+                    self._save_array(self._file_path(generation, "codes"), codes)
+                    if scales is not None:
+                        self._save_array(self._file_path(generation, "scales"), scales)
+                    if self.rerank_candidates:
+                        self._save_array(self._file_path(generation, "full"), matrix)
+
+                self._write_meta(meta)
+            except Exception as e:
+                logger.error(f"Error writing embedding store {self.meta_path}: {e}")
+                return False
+
+            self._open()
+            self._remove_stale_generations()
+            logger.info(
+                f"Embedding store generation {generation}: {len(ids)} embeddings, "
+                f"{self.nbytes / 1024:.1f} KB {self.storage_format}"
+            )
+            return True
+
+    def _remove_stale_generations(self) -> None:
+        """
+        Delete array files of older generations; workers still mapping them keep their pages.
+
+        Called with the write lock held, so any temporary file left is from a
+        writer that crashed and is removed as well.
+        """
+        for path in glob.glob(os.path.join(self.directory, f"{glob.escape(self._base)}.*.tmp")):
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not remove stale temporary file {path}: {e}")
+        for path in glob.glob(os.path.join(self.directory, f"{glob.escape(self._base)}.*.npy")):
+            try:
+                generation = int(os.path.basename(path)[len(self._base) + 1:].split(".", 1)[0])
+            except ValueError:
+                continue
+            if generation < self._generation:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning(f"Could not remove stale embedding file {path}: {e}")
+
+    def clear(self) -> None:
+        """Remove every embedding from the store."""
+        with self._lock:
+            self.refresh()
+            if self._ids:
+                self.apply({}, removals=list(self._ids))
+
+    def search(self, query_embedding: Sequence[float], top_k: int = 3) -> List[Tuple[str, float]]:
+        """
+        Find the most similar embeddings to a query.
+
+        Args:
+            query_embedding: Query embedding vector
+            top_k: Number of results to return
+
+        Returns:
+            List of (id, cosine similarity) tuples, most similar first
+        """
+        return self.search_many([query_embedding], top_k)[0]
+
+    def search_many(self, query_embeddings: Sequence[Optional[Sequence[float]]], top_k: int = 3) -> List[List[Tuple[str, float]]]:
+        """
+        Find the most similar embeddings to several queries in one scan.
+
+        Args:
+            query_embeddings: Query embedding vectors; None entries get no results
+            top_k: Number of results to return per query
+
+        Returns:
+            One list of (id, cosine similarity) tuples per query, most similar first
+        """
+        results: List[List[Tuple[str, float]]] = [[] for _ in query_embeddings]
+        if top_k <= 0:
+            return results
+
+        positions = []
+        queries = []
+        for position, embedding in enumerate(query_embeddings):
+            if embedding is None:
+                continue
+            query = np.asarray(embedding, dtype=np.float32)
+            norm = np.linalg.norm(query)
+            if norm:
+                positions.append(position)
+                queries.append(query / norm)
+        if not queries:
+            return results
+
+        self.refresh()
+        with self._lock:
+            count = len(self._ids)
+            if count == 0:
+                return results
+            query_matrix = np.stack(queries)
+            if query_matrix.shape[1] != self._codes.shape[1]:
+                logger.error(f"Query has dimension {query_matrix.shape[1]}, embedding store expects {self._codes.shape[1]}")
+                return results
+
+            # Approximate scores straight from the quantized rows, one block at a time
+            scores = np.empty((count, len(queries)), dtype=np.float32)
+            for start in range(0, count, self.BLOCK_ROWS):
+                stop = min(start + self.BLOCK_ROWS, count)
+                block_scores = np.asarray(self._codes[start:stop], dtype=np.float32) @ query_matrix.T
+                if self._scales is not None:
+                    block_scores *= self._scales[start:stop][:, None]
+                scores[start:stop] = block_scores
+
+            rerank = self._full is not None and self.rerank_candidates > 0
+            shortlist = min(count, max(top_k, self.rerank_candidates) if rerank else top_k)
+
+            for column, position in enumerate(positions):
+                column_scores = scores[:, column]
+                if shortlist < count:
+                    candidates = np.argpartition(-column_scores, shortlist - 1)[:shortlist]
+                else:
+                    candidates = np.arange(count)
+
+                if rerank:
+                    # Only the shortlisted float32 rows are paged in
+                    candidates = np.sort(candidates)
+                    candidate_scores = np.asarray(self._full[candidates], dtype=np.float32) @ query_matrix[column]
+                else:
+                    candidate_scores = column_scores[candidates]
+
+                order = np.argsort(-candidate_scores)[:top_k]
+                results[position] = [(self._ids[candidates[i]], float(candidate_scores[i])) for i in order]
+            return results
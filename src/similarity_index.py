@@ -0,0 +1,181 @@
+"""
+Similarity Index for Brandworkz AI Agent
+
+This module provides an in-memory cosine similarity index backed by a
+contiguous, pre-normalized float32 matrix, so a search is a single
+matrix-vector product instead of a Python loop over embeddings.
+"""
+
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class SimilarityIndex:
+    """Exact cosine similarity index over a growable float32 matrix."""
+
+    def __init__(self, initial_capacity: int = 64):
+        """
+        Initialize an empty index.
+
+        Args:
+            initial_capacity: Number of rows to allocate up front; the matrix
+                doubles in size whenever it fills up
+        """
+        self._initial_capacity = max(1, initial_capacity)
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self) -> None:
+        """Remove every vector from the index."""
+        with self._lock:
+            self._matrix: Optional[np.ndarray] = None
+            self._ids: List[str] = []
+            self._rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._rows
+
+    @property
+    def dimension(self) -> Optional[int]:
+        """Dimension of the indexed vectors, or None while the index is empty."""
+        return None if self._matrix is None else self._matrix.shape[1]
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> Optional[np.ndarray]:
+        """Return the vector as unit-length float32, or None for a zero vector."""
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        if norm == 0:
+            return None
+        return array / norm
+
+    def upsert(self, item_id: str, embedding: Sequence[float]) -> bool:
+        """
+        Add a vector or replace the vector stored for an existing id, in place.
+
+        Args:
+            item_id: ID of the item
+            embedding: Embedding vector
+
+        Returns:
+            True if the vector was stored, False if it was rejected
+        """
+        vector = self._normalize(embedding)
+        if vector is None:
+            logger.warning(f"Not indexing zero-length embedding for {item_id}")
+            return False
+
+        with self._lock:
+            if self._matrix is None or not self._ids:
+                self._matrix = np.zeros((self._initial_capacity, vector.shape[0]), dtype=np.float32)
+            elif vector.shape[0] != self._matrix.shape[1]:
+                logger.error(
+                    f"Embedding for {item_id} has dimension {vector.shape[0]}, "
+                    f"index expects {self._matrix.shape[1]}"
+                )
+                return False
+
+            row = self._rows.get(item_id)
+            if row is None:
+                row = len(self._ids)
+                if row == self._matrix.shape[0]:
+                    grown = np.zeros((row * 2, self._matrix.shape[1]), dtype=np.float32)
+                    grown[:row] = self._matrix
+                    self._matrix = grown
+                self._ids.append(item_id)
+                self._rows[item_id] = row
+
+            self._matrix[row] = vector
+            return True
+
+    def remove(self, item_id: str) -> bool:
+        """
+        Remove a vector by moving the last row into its slot.
+
+        Args:
+            item_id: ID of the item to remove
+
+        Returns:
+            True if the item was in the index, False otherwise
+        """
+        with self._lock:
+            row = self._rows.pop(item_id, None)
+            if row is None:
+                return False
+
+            last = len(self._ids) - 1
+            if row != last:
+                last_id = self._ids[last]
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = last_id
+                self._rows[last_id] = row
+            self._ids.pop()
+            return True
+
+    def search(self, query_embedding: Sequence[float], top_k: int = 3) -> List[Tuple[str, float]]:
+        """
+        Find the most similar vectors to a query.
+
+        Args:
+            query_embedding: Query embedding vector
+            top_k: Number of results to return
+
+        Returns:
+            List of (id, cosine similarity) tuples, most similar first
+        """
+        return self.search_many([query_embedding], top_k)[0]
+
+    def search_many(self, query_embeddings: Sequence[Optional[Sequence[float]]], top_k: int = 3) -> List[List[Tuple[str, float]]]:
+        """
+        Find the most similar vectors to several queries in one pass.
+
+        Args:
+            query_embeddings: Query embedding vectors; None entries get no results
+            top_k: Number of results to return per query
+
+        Returns:
+            One list of (id, cosine similarity) tuples per query, most similar first
+        """
+        results: List[List[Tuple[str, float]]] = [[] for _ in query_embeddings]
+        if top_k <= 0:
+            return results
+
+        positions = []
+        queries = []
+        for position, embedding in enumerate(query_embeddings):
+            query = None if embedding is None else self._normalize(embedding)
+            if query is not None:
+                positions.append(position)
+                queries.append(query)
+        if not queries:
+            return results
+
+        with self._lock:
+            count = len(self._ids)
+            if count == 0:
+                return results
+            query_matrix = np.stack(queries)
+            if query_matrix.shape[1] != self._matrix.shape[1]:
+                logger.error(f"Query has dimension {query_matrix.shape[1]}, index expects {self._matrix.shape[1]}")
+                return results
+
+            # One matrix-matrix product scores every query against every row
+            scores = self._matrix[:count] @ query_matrix.T
+            for column, position in enumerate(positions):
+                column_scores = scores[:, column]
+                if top_k < count:
+                    candidates = np.argpartition(-column_scores, top_k - 1)[:top_k]
+                else:
+                    candidates = np.arange(count)
+                ranked = candidates[np.argsort(-column_scores[candidates])]
+                results[position] = [(self._ids[row], float(column_scores[row])) for row in ranked]
+            return results
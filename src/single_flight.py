@@ -0,0 +1,200 @@
+"""
+Single-Flight Request Coalescing for Brandworkz AI Agent
+
+This module lets concurrent callers asking for the same key share one
+in-flight call instead of each making their own, so a burst of identical
+questions costs one embedding request or vector query rather than one per
+caller. There is a thread-based variant for synchronous code and an
+asyncio variant for the event loop.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Sequence
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class _Counters:
+    """Request counters shared by both single-flight variants."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.requests = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing statistics.
+
+        Returns:
+            Dictionary with requested keys, keys actually executed, keys
+            served by another caller's in-flight call and the coalesced ratio
+        """
+        return {
+            "name": self.name,
+            "requests": self.requests,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalesced_rate": round(self.coalesced / self.requests, 4) if self.requests else 0.0
+        }
+
+class SingleFlight(_Counters):
+    """Coalesces concurrent calls for the same keys across threads."""
+
+    def __init__(self, name: str = "single_flight"):
+        """
+        Initialize the single-flight group.
+
+        Args:
+            name: Name reported in the statistics
+        """
+        super().__init__(name)
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Call `fn` unless a call for `key` is already in flight, then share its result.
+
+        Args:
+            key: Identity of the request
+            fn: Function producing the result
+
+        Returns:
+            The result of the (possibly shared) call; exceptions are shared too
+        """
+        return self.do_many([key], lambda keys: [fn()])[0]
+
+    def do_many(self, keys: Sequence[Hashable], fn: Callable[[List[Hashable]], List[Any]]) -> List[Any]:
+        """
+        Resolve several keys, calling `fn` once for those not already in flight.
+
+        Args:
+            keys: Identities of the requests
+            fn: Function taking the list of keys this caller owns and returning
+                one result per key, in the same order
+
+        Returns:
+            Results aligned with `keys`
+        """
+        owned: List[Hashable] = []
+        futures: Dict[Hashable, Future] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                self.requests += 1
+                future = self._in_flight.get(key)
+                if future is None:
+                    future = Future()
+                    self._in_flight[key] = future
+                    owned.append(key)
+                else:
+                    self.coalesced += 1
+                futures[key] = future
+            self.executions += len(owned)
+
+        if owned:
+            try:
+                results = list(fn(owned))
+                if len(results) != len(owned):
+                    raise ValueError(f"{self.name}: expected {len(owned)} results, got {len(results)}")
+                for key, result in zip(owned, results):
+                    futures[key].set_result(result)
+            except BaseException as e:
+                for key in owned:
+                    if not futures[key].done():
+                        futures[key].set_exception(e)
+                raise
+            finally:
+                with self._lock:
+                    for key in owned:
+                        self._in_flight.pop(key, None)
+
+        return [futures[key].result() for key in keys]
+
+class AsyncSingleFlight(_Counters):
+    """Coalesces concurrent calls for the same keys on one event loop."""
+
+    def __init__(self, name: str = "async_single_flight"):
+        """
+        Initialize the single-flight group.
+
+        Args:
+            name: Name reported in the statistics
+        """
+        super().__init__(name)
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await `fn` unless a call for `key` is already in flight, then share its result.
+
+        Args:
+            key: Identity of the request
+            fn: Coroutine function producing the result
+
+        Returns:
+            The result of the (possibly shared) call; exceptions are shared too
+        """
+        async def call(keys):
+            return [await fn()]
+        return (await self.do_many([key], call))[0]
+
+    async def do_many(self, keys: Sequence[Hashable], fn: Callable[[List[Hashable]], Awaitable[List[Any]]]) -> List[Any]:
+        """
+        Resolve several keys, awaiting `fn` once for those not already in flight.
+
+        Args:
+            keys: Identities of the requests
+            fn: Coroutine function taking the list of keys this caller owns and
+                returning one result per key, in the same order
+
+        Returns:
+            Results aligned with `keys`
+        """
+        loop = asyncio.get_running_loop()
+        owned: List[Hashable] = []
+        futures: Dict[Hashable, asyncio.Future] = {}
+        # No await until every key is registered, so the check-and-claim is atomic on the loop
+        for key in dict.fromkeys(keys):
+            self.requests += 1
+            future = self._in_flight.get(key)
+            if future is None:
+                future = loop.create_future()
+                self._in_flight[key] = future
+                owned.append(key)
+            else:
+                self.coalesced += 1
+            futures[key] = future
+        self.executions += len(owned)
+
+        if owned:
+            # The shared call runs as its own task so a cancelled caller does not cancel it for the others
+            task = asyncio.ensure_future(fn(owned))
+
+            def resolve(task: asyncio.Future) -> None:
+                for key in owned:
+                    self._in_flight.pop(key, None)
+                if task.cancelled():
+                    for key in owned:
+                        futures[key].cancel()
+                    return
+                error = task.exception()
+                if error is None:
+                    results = list(task.result())
+                    if len(results) == len(owned):
+                        for key, result in zip(owned, results):
+                            futures[key].set_result(result)
+                        return
+                    error = ValueError(f"{self.name}: expected {len(owned)} results, got {len(results)}")
+                for key in owned:
+                    futures[key].set_exception(error)
+
+            task.add_done_callback(resolve)
+
+        # Waiters are shielded so one cancelled caller does not cancel the shared call
+        return [await asyncio.shield(futures[key]) for key in keys]
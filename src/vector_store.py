@@ -2,26 +2,38 @@ import os
 import json
 import logging
 import traceback
-import numpy as np
 from typing import List, Dict, Any, Optional, Union
 
 import chromadb
-from chromadb.utils import embedding_functions
-from openai import OpenAI
+
+from src.process_store import ProcessStore, content_hash
 
 logger = logging.getLogger(__name__)
 
+# Collection used by the default OpenAI model; other embedding spaces get their own collection
+DEFAULT_COLLECTION_NAME = "brandworkz_processes"
+DEFAULT_EMBEDDING_MODEL = "text-embedding-ada-002"
+
 class VectorStore:
     """Vector database for semantic search of processes"""
     
-    def __init__(self, persist_directory: str = None):
+    # Version of the metadata layout stored with each item; collections written
+    # with another layout are rebuilt on the next sync
+    METADATA_VERSION = 2
+    
+    def __init__(self, embedding_provider, persist_directory: str = None, embedding_cache=None):
         """
         Initialize the vector store
         
         Args:
+            embedding_provider: EmbeddingProvider used for documents and queries
             persist_directory: Directory to persist the database (optional)
+            embedding_cache: EmbeddingCache consulted before embedding documents (optional)
         """
         self.is_initialized = False
+        self.embedding_provider = embedding_provider
+        self.embedding_model = embedding_provider.model_name
+        self.embedding_cache = embedding_cache
         
         if persist_directory is None:
             # Use default path
@@ -30,144 +42,340 @@ class VectorStore:
             
         # Create directory if it doesn't exist
         os.makedirs(persist_directory, exist_ok=True)
+        self.persist_directory = persist_directory
             
         try:
             # Initialize ChromaDB client
             self.client = chromadb.PersistentClient(path=persist_directory)
             
-            # Set up embedding function
-            openai_api_key = os.getenv("OPENAI_API_KEY")
-            self.embedding_function = embedding_functions.OpenAIEmbeddingFunction(
-                api_key=openai_api_key,
-                model_name="text-embedding-ada-002"
-            )
+            # Embeddings of different models can't share a collection
+            if self.embedding_model == DEFAULT_EMBEDDING_MODEL:
+                self.collection_name = DEFAULT_COLLECTION_NAME
+                manifest_name = 'process_manifest.json'
+                payloads_name = 'process_payloads.sqlite3'
+            else:
+                self.collection_name = f"{DEFAULT_COLLECTION_NAME}_{self.embedding_model}"
+                manifest_name = f"process_manifest_{self.embedding_model}.json"
+                payloads_name = f"process_payloads_{self.embedding_model}.sqlite3"
+            
+            # Content hashes of the indexed process files, kept next to the collection
+            self.manifest_path = os.path.join(persist_directory, manifest_name)
+            
+            # Full process payloads; the collection only holds what ranking needs
+            self.process_store = ProcessStore(os.path.join(persist_directory, payloads_name))
             
-            # Create or get collection
+            # Create or get collection. Documents and queries are always embedded by the
+            # provider (on the pooled OpenAI client), so the collection never embeds anything
+            # itself; this also opens collections created with Chroma's OpenAI function
             self.collection = self.client.get_or_create_collection(
-                name="brandworkz_processes",
-                embedding_function=self.embedding_function
+                name=self.collection_name,
+                embedding_function=None
             )
             
             self.is_initialized = True
-            logger.info(f"Vector store initialized with collection 'brandworkz_processes' at {persist_directory}")
+            logger.info(f"Vector store initialized with collection '{self.collection_name}' at {persist_directory}")
         except Exception as e:
             logger.error(f"Failed to initialize vector store: {e}")
     
-    def _prepare_metadata(self, data: Dict[str, Any]) -> Dict[str, Union[str, int, float, bool]]:
-        """Prepare metadata for storage by converting complex types to JSON strings"""
-        prepared_data = {}
-        for key, value in data.items():
-            # Convert lists and dictionaries to JSON strings
-            if isinstance(value, (list, dict)):
-                prepared_data[key] = json.dumps(value)
-            # Keep primitive types as they are
-            elif isinstance(value, (str, int, float, bool)) or value is None:
-                prepared_data[key] = value
-            else:
-                # Convert other types to strings
-                prepared_data[key] = str(value)
+    def _prepare_metadata(self, data: Dict[str, Any], category: Optional[str] = None) -> Dict[str, Union[str, int, float, bool]]:
+        """
+        Prepare the lean metadata stored with a process in the collection
         
-        return prepared_data
+        Only the fields needed to rank and label a hit are kept; the full
+        process lives in the process store.
+        """
+        return {
+            "category": str(category if category is not None else data.get('category', '')),
+            "title": str(data.get('title', '')),
+            "content_hash": content_hash(data),
+            "metadata_version": self.METADATA_VERSION
+        }
     
     def _parse_metadata(self, metadata):
-        """Parse metadata into a format suitable for ChromaDB"""
+        """Parse stored metadata into a plain dictionary"""
         if not metadata:
             return {}  # Return empty dict if metadata is None
             
-        parsed = {}
-        for key, value in metadata.items():
-            # Convert all values to strings for ChromaDB
-            if isinstance(value, (list, dict)):
-                parsed[key] = json.dumps(value)
-            else:
-                parsed[key] = str(value)
-        return parsed
+        return {key: value for key, value in metadata.items() if key != "metadata_version"}
+    
+    def get_document_text(self, process_data: Dict[str, Any]) -> str:
+        """Build the document text that is embedded for a process"""
+        return f"{process_data.get('title', '')} {process_data.get('description', '')}"
+    
+    def _embed_document(self, document_text: str) -> Optional[List[float]]:
+        """Embed a document, consulting the embedding cache first"""
+        return self._embed_documents([document_text])[0]
     
-    def add_process(self, process_id: str, process_data: Dict[str, Any]) -> bool:
+    def _embed_documents(self, document_texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed documents with the provider, consulting the embedding cache (if any) and generating only the misses in one call"""
+        if not document_texts:
+            return []
+            
+        if self.embedding_cache is not None:
+            embeddings = self.embedding_cache.get_many(self.embedding_model, document_texts)
+        else:
+            embeddings = [None] * len(document_texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            try:
+                generated = self.embedding_provider.embed([document_texts[i] for i in missing])
+                generated = [[float(value) for value in embedding] for embedding in generated]
+                if self.embedding_cache is not None:
+                    self.embedding_cache.set_many(
+                        self.embedding_model,
+                        [(document_texts[i], embedding) for i, embedding in zip(missing, generated)]
+                    )
+                for i, embedding in zip(missing, generated):
+                    embeddings[i] = embedding
+            except Exception as e:
+                logger.error(f"Error embedding {len(missing)} documents: {e}")
+        return embeddings
+    
+    def add_process(self, process_id: str, process_data: Dict[str, Any], embedding: Optional[List[float]] = None) -> bool:
         """
-        Add a process to the vector store
+        Add a process to the vector store, replacing any existing version
         
         Args:
             process_id: Unique ID for the process
             process_data: Dictionary with process data
+            embedding: Precomputed embedding of the document text (optional,
+                looked up in the embedding cache or computed if omitted)
             
         Returns:
             True if successful, False otherwise
         """
-        if not self.is_initialized:
-            logger.error("Cannot add process - vector store not initialized")
-            return False
+        embeddings = {process_id: embedding} if embedding is not None else None
+        return self.upsert_processes({process_id: process_data}, embeddings=embeddings).get(process_id, False)
+    
+    def upsert_processes(self, processes: Dict[str, Dict[str, Any]],
+                         embeddings: Optional[Dict[str, Optional[List[float]]]] = None,
+                         batch_size: int = 500,
+                         categories: Optional[Dict[str, str]] = None) -> Dict[str, bool]:
+        """
+        Add or replace many processes with chunked upserts
+        
+        Each chunk is a single `collection.upsert` round trip. If a chunk is
+        rejected, its processes are retried one by one so a single bad
+        process does not fail the rest.
+        
+        Args:
+            processes: Dictionary mapping process IDs to process data
+            embeddings: Precomputed document embeddings keyed by process ID
+                (optional, missing ones are looked up in the embedding cache
+                or computed)
+            batch_size: Maximum number of processes per upsert call
+            categories: Categories keyed by process ID (optional, defaults to
+                the process's own `category` field)
             
-        try:
-            # Prepare document for embedding
-            document_text = f"{process_data.get('title', '')} {process_data.get('description', '')}"
+        Returns:
+            Dictionary mapping each process ID to True if it was stored, False otherwise
+        """
+        if not self.is_initialized:
+            logger.error("Cannot upsert processes - vector store not initialized")
+            return {process_id: False for process_id in processes}
             
-            # Prepare metadata (convert lists/dicts to strings)
-            metadata = self._prepare_metadata(process_data)
+        if not processes:
+            return {}
             
-            # Check if process already exists and delete it
-            try:
-                self.collection.get(ids=[process_id])
-                self.collection.delete(ids=[process_id])
-                logger.info(f"Replacing existing process {process_id} in vector store")
-            except:
-                pass
-                
-            # Add to collection
-            self.collection.add(
-                ids=[process_id],
-                documents=[document_text],
-                metadatas=[metadata]
+        embeddings = dict(embeddings or {})
+        categories = categories or {}
+        process_ids = list(processes)
+        documents = {process_id: self.get_document_text(processes[process_id]) for process_id in process_ids}
+        
+        missing = [process_id for process_id in process_ids if embeddings.get(process_id) is None]
+        for process_id, embedding in zip(missing, self._embed_documents([documents[process_id] for process_id in missing])):
+            embeddings[process_id] = embedding
+        
+        try:
+            batch_size = max(1, min(batch_size, self.client.get_max_batch_size()))
+        except Exception:
+            batch_size = max(1, batch_size)
+        
+        results = {}
+        
+        def upsert_chunk(chunk_ids: List[str]) -> None:
+            # Write payloads first so a hit never points at a missing payload
+            if not self.process_store.put_many({process_id: processes[process_id] for process_id in chunk_ids}):
+                raise RuntimeError("could not store process payloads")
+            self.collection.upsert(
+                ids=chunk_ids,
+                documents=[documents[process_id] for process_id in chunk_ids],
+                metadatas=[
+                    self._prepare_metadata(processes[process_id], categories.get(process_id))
+                    for process_id in chunk_ids
+                ],
+                embeddings=[embeddings[process_id] for process_id in chunk_ids]
             )
-            
-            logger.info(f"Added process {process_id} to vector store")
-            return True
-        except Exception as e:
-            logger.error(f"Error adding process {process_id} to vector store: {e}")
-            logger.error(traceback.format_exc())
-            return False
+        
+        # The collection does not embed documents itself, so processes that could not be embedded fail here
+        for process_id in process_ids:
+            if embeddings.get(process_id) is None:
+                logger.error(f"Error upserting process {process_id} to vector store: no embedding")
+                results[process_id] = False
+        process_ids = [process_id for process_id in process_ids if process_id not in results]
+        
+        for start in range(0, len(process_ids), batch_size):
+            chunk_ids = process_ids[start:start + batch_size]
+            try:
+                upsert_chunk(chunk_ids)
+                results.update({process_id: True for process_id in chunk_ids})
+            except Exception as e:
+                logger.warning(f"Upsert of {len(chunk_ids)} processes failed, retrying individually: {e}")
+                for process_id in chunk_ids:
+                    try:
+                        upsert_chunk([process_id])
+                        results[process_id] = True
+                    except Exception as e:
+                        logger.error(f"Error upserting process {process_id} to vector store: {e}")
+                        results[process_id] = False
+        
+        succeeded = sum(1 for success in results.values() if success)
+        logger.info(f"Upserted {succeeded}/{len(process_ids)} processes to vector store")
+        return results
     
-    def query(self, query_text: str, n_results: int = 5) -> List[Dict[str, Any]]:
+    def query(self, query_text: str, n_results: int = 5, query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
         """
         Query the vector store for similar processes
         
         Args:
             query_text: Text to search for
             n_results: Number of results to return
+            query_embedding: Precomputed embedding of the query (optional,
+                `query_text` is embedded with the provider if omitted)
             
         Returns:
             List of process IDs and scores
         """
+        query_embeddings = [query_embedding] if query_embedding is not None else None
+        return self.query_many([query_text], n_results=n_results, query_embeddings=query_embeddings)[0]
+    
+    def query_many(self, query_texts: List[str], n_results: int = 5,
+                   query_embeddings: Optional[List[Optional[List[float]]]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Query the vector store for several queries in a single round trip
+        
+        Args:
+            query_texts: Texts to search for
+            n_results: Number of results to return per query
+            query_embeddings: Precomputed embeddings aligned with `query_texts`
+                (optional, missing ones are embedded with the provider)
+            
+        Returns:
+            One list of process IDs and scores per query
+        """
+        empty = [[] for _ in query_texts]
         if not self.is_initialized:
             logger.error("Cannot query - vector store not initialized")
-            return []
+            return empty
+            
+        if not query_texts:
+            return empty
             
         try:
+            query_embeddings = list(query_embeddings) if query_embeddings is not None else [None] * len(query_texts)
+            missing = [i for i, embedding in enumerate(query_embeddings) if embedding is None]
+            if missing:
+                for i, embedding in zip(missing, self.embedding_provider.embed([query_texts[i] for i in missing])):
+                    query_embeddings[i] = embedding
+            
+            # Documents and embeddings are never needed to rank a hit
             results = self.collection.query(
-                query_texts=[query_text],
-                n_results=n_results
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                include=["metadatas", "distances"]
             )
             
-            if results and len(results['metadatas']) > 0:
-                # Parse metadata back into original format
+            if not results or len(results['metadatas']) == 0:
+                return empty
+                
+            # Parse metadata back into original format
+            all_results = []
+            for metadatas, ids, distances in zip(
+                results['metadatas'],
+                results['ids'],
+                results['distances']
+            ):
                 parsed_results = []
-                for metadata, document, id, distance in zip(
-                    results['metadatas'][0],
-                    results['documents'][0],
-                    results['ids'][0],
-                    results['distances'][0]
-                ):
+                for metadata, id, distance in zip(metadatas, ids, distances):
                     parsed_metadata = self._parse_metadata(metadata)
                     parsed_metadata['id'] = id
                     parsed_metadata['distance'] = distance
                     parsed_results.append(parsed_metadata)
-                
-                return parsed_results
-            return []
+                all_results.append(parsed_results)
+            
+            return all_results
         except Exception as e:
             logger.error(f"Error querying vector store: {e}")
             logger.error(traceback.format_exc())
-            return []
+            return empty
+    
+    def delete_processes(self, process_ids: List[str]) -> bool:
+        """
+        Delete processes from the vector store
+        
+        Args:
+            process_ids: IDs of the processes to delete
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.is_initialized:
+            logger.error("Cannot delete processes - vector store not initialized")
+            return False
+            
+        if not process_ids:
+            return True
+            
+        try:
+            self.collection.delete(ids=list(process_ids))
+            self.process_store.delete_many(process_ids)
+            logger.info(f"Deleted {len(process_ids)} processes from vector store")
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting processes from vector store: {e}")
+            logger.error(traceback.format_exc())
+            return False
+    
+    def load_manifest(self) -> Optional[Dict[str, Any]]:
+        """
+        Load the manifest of indexed process files
+        
+        Returns:
+            Manifest dictionary, or None if there is no valid manifest
+        """
+        if not os.path.exists(self.manifest_path):
+            return None
+            
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if isinstance(manifest, dict) and isinstance(manifest.get("processes"), dict):
+                return manifest
+            logger.warning(f"Ignoring malformed manifest at {self.manifest_path}")
+        except Exception as e:
+            logger.error(f"Error loading manifest {self.manifest_path}: {e}")
+        return None
+    
+    def save_manifest(self, manifest: Dict[str, Any]) -> bool:
+        """
+        Save the manifest of indexed process files
+        
+        Args:
+            manifest: Manifest dictionary to persist
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            # Write to a temporary file first so a crash never leaves a truncated manifest
+            temp_path = f"{self.manifest_path}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(temp_path, self.manifest_path)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving manifest {self.manifest_path}: {e}")
+            return False
     
     def clear(self) -> bool:
         """Clear the vector store"""
@@ -184,6 +392,11 @@ class VectorStore:
                 logger.info(f"Cleared vector store - removed {len(all_items['ids'])} items")
             else:
                 logger.info("Vector store is already empty")
+            self.process_store.clear()
+            
+            # A manifest describing deleted items would make incremental syncs skip them
+            if os.path.exists(self.manifest_path):
+                os.remove(self.manifest_path)
             return True
         except Exception as e:
             logger.error(f"Error clearing vector store: {e}")
@@ -209,26 +422,23 @@ class VectorStore:
             
     def get_process(self, process_id: str) -> Optional[Dict[str, Any]]:
         """
-        Get a specific process from the vector store by ID
+        Get the full data of a specific process by ID
+        
+        Only the process store is read; use this for the winning match of a
+        query rather than for every hit.
         
         Args:
             process_id: The ID of the process to retrieve
             
         Returns:
-            Process metadata if found, None otherwise
+            Process data if found, None otherwise
         """
         if not self.is_initialized:
             logger.error("Cannot get process - vector store not initialized")
             return None
             
         try:
-            result = self.collection.get(ids=[process_id])
-            
-            if result and len(result['metadatas']) > 0:
-                # Parse metadata back into original format
-                metadata = self._parse_metadata(result['metadatas'][0])
-                return metadata
-            return None
+            return self.process_store.get(process_id)
         except Exception as e:
             logger.error(f"Error getting process {process_id} from vector store: {e}")
             return None
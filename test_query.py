@@ -9,6 +9,7 @@ to check semantic search functionality.
 import os
 import logging
 from dotenv import load_dotenv
+from config.config import embedding_provider
 from src.vector_store import VectorStore
 
 # Set up logging
@@ -27,7 +28,7 @@ def test_query(query_text, n_results=3):
         n_results: Number of results to return
     """
     try:
-        vector_store = VectorStore()
+        vector_store = VectorStore(embedding_provider)
         
         if not vector_store.is_initialized:
             logger.error("Vector store initialization failed")
@@ -49,19 +50,24 @@ def test_query(query_text, n_results=3):
             
             print(f"\n--- Match #{i+1}: {result.get('id')} (Similarity: {similarity_percent:.1f}%) ---")
             print(f"Title: {result.get('title', 'N/A')}")
-            print(f"Description: {result.get('description', 'N/A')}")
+            print(f"Category: {result.get('category', 'N/A')}")
             
-            # Print keywords if available
-            if 'keywords' in result:
-                print(f"Keywords: {', '.join(result['keywords'])}")
-            
-            # Print the first few steps if available
-            if 'steps' in result and isinstance(result['steps'], list):
-                print("\nFirst steps:")
-                for j, step in enumerate(result['steps'][:3]):
-                    print(f"  {j+1}. {step}")
-                if len(result['steps']) > 3:
-                    print(f"  ... and {len(result['steps']) - 3} more steps")
+            # Only the best match's full process is fetched from the process store
+            if i == 0:
+                process = vector_store.get_process(result.get('id')) or {}
+                print(f"Description: {process.get('description', 'N/A')}")
+                
+                # Print keywords if available
+                if 'keywords' in process:
+                    print(f"Keywords: {', '.join(process['keywords'])}")
+                
+                # Print the first few steps if available
+                if 'steps' in process and isinstance(process['steps'], list):
+                    print("\nFirst steps:")
+                    for j, step in enumerate(process['steps'][:3]):
+                        print(f"  {j+1}. {step}")
+                    if len(process['steps']) > 3:
+                        print(f"  ... and {len(process['steps']) - 3} more steps")
             
             print(f"Distance: {result.get('distance', 'N/A')}")
             print("-" * 80)